@@ -1,5 +1,6 @@
 """Backend package for AI + IoT Smart Plant System."""
 
+from . import startup  # noqa: F401  # first, so its clock starts before the heavy imports
 from .main import main
 
 __all__ = ["main"]
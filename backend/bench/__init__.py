@@ -0,0 +1,16 @@
+"""Offline benchmarks for the cycle pipeline and its hot functions.
+
+Everything runs against the mock services, so no hardware, Supabase or
+Gemini access is needed:
+
+    python -m backend.bench                                 # all cases, prints a table
+    python -m backend.bench --output bench.json             # also write results as JSON
+    python -m backend.bench --baseline bench.json --threshold 0.15
+    python -m backend.bench --only normalize_ai_result cycle_e2e --quick
+
+With `--baseline`, each case's median time per operation is compared to the
+baseline file and the run exits non-zero when any case got slower by more
+than the threshold. Frame cases need OpenCV and NumPy and are reported as
+skipped without them.
+"""
+
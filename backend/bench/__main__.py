@@ -0,0 +1,173 @@
+import argparse
+import datetime
+import gc
+import json
+import platform
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+from backend.bench.cases import CASES, Case, Skip
+from backend.telemetry import percentile
+
+DEFAULT_REPEATS = 15
+QUICK_REPEATS = 5
+# Target wall time of one repeat when the inner loop count is calibrated
+REPEAT_SECONDS = 0.05
+QUICK_REPEAT_SECONDS = 0.01
+DEFAULT_THRESHOLD = 0.10
+
+
+def _calibrate(operation, target: float) -> int:
+    inner = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(inner):
+            operation()
+        elapsed = time.perf_counter() - started
+        if elapsed >= target or inner >= 1 << 20:
+            return inner
+        inner = max(inner * 2, int(inner * target / max(elapsed, 1e-9)))
+
+
+def run_case(case: Case, quick: bool) -> Dict[str, Any]:
+    operation, teardown = case.setup()
+    try:
+        operation()  # warm up caches, lazy imports and the first file write
+        repeats = case.repeats or DEFAULT_REPEATS
+        if quick:
+            repeats = max(3, repeats // 5) if case.repeats else QUICK_REPEATS
+        inner = case.inner or _calibrate(operation, QUICK_REPEAT_SECONDS if quick else REPEAT_SECONDS)
+
+        per_op: List[float] = []
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            for _ in range(repeats):
+                started = time.perf_counter()
+                for _ in range(inner):
+                    operation()
+                per_op.append((time.perf_counter() - started) / inner)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+    finally:
+        if teardown is not None:
+            teardown()
+
+    median = percentile(per_op, 50)
+    result = {
+        "repeats": repeats,
+        "inner": inner,
+        "items": case.items,
+        "per_op_us": {
+            "p50": round(median * 1e6, 3),
+            "p95": round(percentile(per_op, 95) * 1e6, 3),
+            "mean": round(sum(per_op) / len(per_op) * 1e6, 3),
+            "min": round(min(per_op) * 1e6, 3),
+        },
+        "ops_per_s": round(1 / median, 2) if median else None,
+    }
+    if case.items > 1:
+        result["per_item_us"] = round(median / case.items * 1e6, 3)
+    return result
+
+
+def run_all(names: Optional[List[str]], quick: bool) -> Dict[str, Any]:
+    selected = [case for case in CASES if not names or case.name in names]
+    unknown = set(names or []) - {case.name for case in CASES}
+    if unknown:
+        raise SystemExit(f"Unknown case(s): {', '.join(sorted(unknown))}")
+
+    results: Dict[str, Any] = {}
+    for case in selected:
+        try:
+            results[case.name] = run_case(case, quick)
+        except Skip as exc:
+            results[case.name] = {"skipped": str(exc)}
+        print(_format_row(case.name, results[case.name]), flush=True)
+    return {
+        "meta": {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+            "quick": quick,
+        },
+        "results": results,
+    }
+
+
+def _format_row(name: str, result: Dict[str, Any]) -> str:
+    if "skipped" in result:
+        return f"{name:<36} skipped: {result['skipped']}"
+    per_op = result["per_op_us"]
+    row = f"{name:<36} p50 {per_op['p50']:>12.3f}us  p95 {per_op['p95']:>12.3f}us  {result['ops_per_s']:>12.2f} ops/s"
+    if "per_item_us" in result:
+        row += f"  ({result['per_item_us']:.3f}us/item)"
+    return row
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Print p50 changes against the baseline; return the names of regressed cases."""
+    regressions = []
+    print(f"\nCompared to baseline from {baseline.get('meta', {}).get('timestamp', '?')} (threshold {threshold:.0%}):")
+    for name, result in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if "skipped" in result or not base or "skipped" in base:
+            print(f"{name:<36} n/a")
+            continue
+        old, new = base["per_op_us"]["p50"], result["per_op_us"]["p50"]
+        change = (new - old) / old if old else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        elif change < -threshold:
+            flag = "  faster"
+        print(f"{name:<36} {old:>12.3f}us -> {new:>12.3f}us  {change:+7.1%}{flag}")
+    return regressions
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m backend.bench",
+        description="Offline benchmarks for the cycle pipeline (mock services only)",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("--only", nargs="+", metavar="CASE", default=None, help="Run only these cases")
+    parser.add_argument("--list", action="store_true", help="List the cases and exit")
+    parser.add_argument("--quick", action="store_true", help="Fewer, shorter repeats (smoke test, noisy numbers)")
+    parser.add_argument("--output", default=None, help="Write results to this JSON file")
+    parser.add_argument("--baseline", default=None, help="Compare against a previous --output file")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="Relative p50 slowdown counted as a regression (0.10 = 10%%)",
+    )
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for case in CASES:
+            print(case.name)
+        return
+
+    results = run_all(args.only, args.quick)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(results, output_file, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""Benchmark cases. Each setup returns the callable timed as one operation."""
+
+import asyncio
+import dataclasses
+import itertools
+import os
+import tempfile
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from backend.bench.corpus import ai_response_corpus
+from backend.cli import parse_args
+from backend.config import load_settings
+from backend.logger import QuietLogger
+from backend.rollups import rollup_rows
+from backend.services.actuator_service import ActuatorController
+from backend.services.ai_service import _normalize_ai_result
+from backend.services.camera_service import RealWebCamera
+from backend.services.gpio_service import MockGPIOManager
+from backend.services.supabase_service import RealSupabaseService
+from backend.system import SmartPlantSystem
+
+FRAME_SIZES = ((320, 240), (640, 480), (1280, 720), (1920, 1080))
+
+
+class Skip(Exception):
+    """Raised by a setup when the case cannot run here (e.g. missing OpenCV)."""
+
+
+@dataclasses.dataclass
+class Case:
+    name: str
+    # Returns (operation, teardown or None)
+    setup: Callable[[], Tuple[Callable[[], Any], Optional[Callable[[], None]]]]
+    # Items processed per operation, for per-item figures
+    items: int = 1
+    # Fixed loop counts; None means calibrate to the run's time budget
+    repeats: Optional[int] = None
+    inner: Optional[int] = None
+
+
+def _mock_system(image_dir: str) -> SmartPlantSystem:
+    args = parse_args(["--mock", "--pump-duration", "0"])
+    settings = dataclasses.replace(load_settings(mock_override=True), image_path=os.path.join(image_dir, "bench.jpg"))
+    return SmartPlantSystem(args=args, settings=settings, logger=QuietLogger())
+
+
+def _cycle_e2e():
+    image_dir = tempfile.mkdtemp(prefix="plant-bench-")
+    system = _mock_system(image_dir)
+    loop = asyncio.new_event_loop()
+
+    def teardown():
+        loop.close()
+        for name in os.listdir(image_dir):
+            os.remove(os.path.join(image_dir, name))
+        os.rmdir(image_dir)
+
+    return (lambda: loop.run_until_complete(system.run_async())), teardown
+
+
+def _normalize(responses: List[Any]):
+    def run():
+        for raw in responses:
+            _normalize_ai_result(raw)
+
+    return run, None
+
+
+_LABELLED = ai_response_corpus()
+_CORPUS = [raw for _, raw in _LABELLED]
+_WELL_FORMED = [raw for label, raw in _LABELLED if label.startswith("gemini:well_formed")]
+
+
+def _numpy_cv2():
+    try:
+        import cv2  # pylint: disable=import-error
+        import numpy  # pylint: disable=import-error
+    except ImportError as exc:
+        raise Skip(f"needs OpenCV and NumPy ({exc.name} missing)") from None
+    return cv2, numpy
+
+
+def _frame(numpy, width: int, height: int):
+    # Noisy mid-grey, like a real dim capture; the black-frame check has to scan all of it
+    rng = numpy.random.default_rng(0)
+    return rng.integers(40, 90, size=(height, width, 3), dtype=numpy.uint8)
+
+
+def _is_black_frame(width: int, height: int):
+    def setup():
+        cv2, numpy = _numpy_cv2()
+        frame = _frame(numpy, width, height)
+        return (lambda: RealWebCamera._is_black_frame(cv2, frame)), None  # pylint: disable=protected-access
+
+    return setup
+
+
+def _encode_jpeg(width: int, height: int):
+    def setup():
+        cv2, numpy = _numpy_cv2()
+        frame = _frame(numpy, width, height)
+        return (lambda: cv2.imencode(".jpg", frame)), None
+
+    return setup
+
+
+def _actuator_inputs() -> List[Tuple[Dict[str, Any], float, str]]:
+    results = [_normalize_ai_result(raw) for raw in _CORPUS]
+    return [
+        (result, temp, soil)
+        for result, (temp, soil) in zip(results, itertools.cycle([(24.0, "DRY"), (33.5, "WET"), (29.0, "DRY")]))
+    ]
+
+
+def _actuator_apply():
+    controller = ActuatorController(MockGPIOManager(20, [5, 6], 27, 17, QuietLogger()), pump_duration=0)
+    inputs = _actuator_inputs()
+
+    def run():
+        for ai_result, temp, soil in inputs:
+            controller.apply(ai_result, temp, soil)
+
+    return run, None
+
+
+def _log_cycle_payload():
+    image_dir = tempfile.mkdtemp(prefix="plant-bench-")
+    system = _mock_system(image_dir)
+    asyncio.run(system.run_async())
+    payload = system.storage.cycles[-1]
+    prompt_columns = {"prompt_template_id": "0" * 64, "prompt_params": payload.get("prompt_params")}
+
+    def run():
+        # pylint: disable=protected-access
+        RealSupabaseService._cycle_row(payload)
+        RealSupabaseService._child_rows(payload, payload["id"], payload["timestamp"], prompt_columns)
+        rollup_rows(payload)
+
+    def teardown():
+        for name in os.listdir(image_dir):
+            os.remove(os.path.join(image_dir, name))
+        os.rmdir(image_dir)
+
+    return run, teardown
+
+
+CASES: List[Case] = [
+    Case("cycle_e2e", _cycle_e2e, repeats=200, inner=1),
+    Case("normalize_ai_result", lambda: _normalize(_CORPUS), items=len(_CORPUS)),
+    Case("normalize_ai_result:well_formed", lambda: _normalize(_WELL_FORMED), items=len(_WELL_FORMED)),
+    *(Case(f"is_black_frame@{w}x{h}", _is_black_frame(w, h)) for w, h in FRAME_SIZES),
+    *(Case(f"encode_jpeg@{w}x{h}", _encode_jpeg(w, h)) for w, h in FRAME_SIZES),
+    Case("actuator_apply", _actuator_apply, items=len(_CORPUS)),
+    Case("log_cycle_payload", _log_cycle_payload),
+]
@@ -0,0 +1,69 @@
+"""Check that `_normalize_ai_result` still returns what it did before the fast path.
+
+    python -m backend.bench.check_normalize
+    python -m backend.bench.check_normalize --fuzz 50000 --seed 7
+
+Every corpus response, plus `--fuzz` seeded mutations of well-formed ones
+(wrong types, nested containers, integers wider than 64 bits, fences), is
+normalized by the current `_normalize_ai_result` (schema fast path, orjson
+when installed) and by `normalize_reference`, a frozen copy of the
+normalizer from before the fast path. Results must match exactly, key
+order included; an exception on either side counts as a result. Prints the
+first few differences and exits non-zero if there are any.
+"""
+
+import argparse
+import copy
+import json
+import sys
+
+from backend.bench import normalize_reference
+from backend.bench.corpus import ai_response_corpus, fuzzed_responses
+from backend.services import ai_service
+
+MAX_SHOWN = 5
+
+
+def _outcome(normalize, raw) -> str:
+    try:
+        return json.dumps(normalize(copy.deepcopy(raw)))
+    except Exception as exc:  # pylint: disable=broad-exception-caught
+        return f"raised {type(exc).__name__}: {exc}"
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m backend.bench.check_normalize",
+        description="Compare _normalize_ai_result with the pre-fast-path normalizer",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("--fuzz", type=int, default=20000, help="Fuzzed responses added to the corpus")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the fuzzed responses")
+    args = parser.parse_args(argv)
+
+    corpus = ai_response_corpus() + fuzzed_responses(args.fuzz, args.seed)
+    fast = mismatches = 0
+    # pylint: disable=protected-access
+    for label, raw in corpus:
+        expected = _outcome(normalize_reference._normalize_ai_result, raw)
+        actual = _outcome(ai_service._normalize_ai_result, raw)
+        if actual != expected:
+            mismatches += 1
+            if mismatches <= MAX_SHOWN:
+                print(f"MISMATCH {label}")
+                print(f"  input:    {raw if isinstance(raw, str) else json.dumps(raw)}")
+                print(f"  expected: {expected}")
+                print(f"  actual:   {actual}")
+            continue
+        raw_dict = ai_service._as_dict(copy.deepcopy(raw))
+        fast += bool(raw_dict) and ai_service._normalize_schema_result(raw_dict) is not None
+
+    parser_name = "orjson" if ai_service.orjson is not None else "json"
+    if mismatches:
+        print(f"{mismatches} of {len(corpus)} responses differ (parsed with {parser_name})")
+        sys.exit(1)
+    print(f"{len(corpus)} responses identical ({fast} via the schema fast path, parsed with {parser_name})")
+
+
+if __name__ == "__main__":
+    main()
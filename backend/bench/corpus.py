@@ -0,0 +1,229 @@
+"""Gemini response corpus for `_normalize_ai_result` benchmarks and checks.
+
+Real responses come from `backup.json` (the `response_markdown` of each
+`ai_analyses` row, older prompt format included); the rest are synthetic:
+well-formed schema output as Gemini returns it with `response_json_schema`,
+the mock service's output, and the malformed shapes the normalizer has to
+survive (code fences, wrong types, truncated JSON, plain text, empty), plus
+schema-valid edge cases for the fast path (blank names, no todos).
+`fuzzed_responses` adds seeded random mutations of the well-formed ones.
+"""
+
+import copy
+import json
+import os
+import random
+from typing import Any, Dict, List, Tuple
+
+from backend.logger import QuietLogger
+from backend.services.ai_service import MockAIService, mock_analysis
+
+DEFAULT_BACKUP_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "backup.json")
+
+WELL_FORMED: Dict[str, Any] = {
+    "plant": {"name": "Tomato", "confidence": 91.5},
+    "disease": {"name": "Early blight", "confidence": 78.0, "reason": "Concentric brown lesions on lower leaves."},
+    "environment": {"temperature": 31.2, "humidity": 64.0, "light": "BRIGHT", "soil": "2/6 DRY"},
+    "todos": [
+        {"action": "Remove infected leaves", "priority": "HIGH", "reason": "Limits fungal spread."},
+        {"action": "Increase airflow around the plant", "priority": "MEDIUM", "reason": "Humidity is high."},
+        {"action": "Reduce ambient temperature", "priority": "HIGH", "reason": "Temperature is above 30C."},
+    ],
+}
+
+HEALTHY: Dict[str, Any] = {
+    "plant": {"name": "Basil", "confidence": 88},
+    "disease": {"name": "No disease found", "confidence": 95, "reason": "Leaves are uniformly green."},
+    "environment": {"temperature": 24.5, "humidity": 52, "light": "DIM", "soil": "4/6 WET"},
+    "todos": [
+        {"action": "Check for fungal rot at the stem", "priority": "HIGH", "reason": "Routine disease check."},
+        {"action": "Continue routine monitoring", "priority": "LOW", "reason": "No issues."},
+    ],
+}
+
+
+def _backup_responses(path: str) -> List[Tuple[str, Any]]:
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as backup_file:
+        backup = json.load(backup_file)
+    return [
+        (f"backup:{row.get('id')}", row["response_markdown"])
+        for row in backup.get("ai_analyses", [])
+        if row.get("response_markdown")
+    ]
+
+
+def _synthetic() -> List[Tuple[str, Any]]:
+    no_plant = copy.deepcopy(WELL_FORMED)
+    no_plant["plant"] = {"name": "No plant detected", "confidence": 12}
+
+    loose_types = copy.deepcopy(WELL_FORMED)
+    loose_types["plant"]["confidence"] = "87.5"
+    loose_types["disease"]["confidence"] = 250
+    loose_types["environment"]["temperature"] = "n/a"
+    loose_types["todos"] = [
+        {"action": "Water", "priority": "high", "reason": ""},
+        "not a todo",
+        {"action": "", "priority": "LOW", "reason": "Dropped: no action"},
+        {"action": "Inspect pests", "priority": "urgent", "reason": "Unknown priority"},
+    ]
+
+    flat = {
+        "plant": "Pepper",
+        "disease": "Leaf spot",
+        "confidence": -4,
+        "temperature": 29,
+        "humidity": "70",
+        "light": "BRIGHT",
+        "soil": "5/6 DRY",
+        "recommendation": {"water_plant": "yes", "increase_airflow": 1, "reduce_temperature": "off"},
+    }
+
+    string_fields = copy.deepcopy(WELL_FORMED)
+    string_fields["environment"] = json.dumps(WELL_FORMED["environment"])
+    string_fields["recommendation"] = json.dumps({"water_plant": True})
+    string_fields["todos"] = "Water the plant"
+
+    blank_fields = copy.deepcopy(HEALTHY)
+    blank_fields["plant"]["name"] = "   "
+    blank_fields["disease"]["name"] = ""
+    blank_fields["todos"] = [
+        {"action": "  ", "priority": "HIGH", "reason": "Dropped: blank action"},
+        {"action": " Prune rotting stems ", "priority": "HIGH", "reason": " "},
+    ]
+
+    no_todos = copy.deepcopy(WELL_FORMED)
+    no_todos["todos"] = []
+
+    well_formed_json = json.dumps(WELL_FORMED, indent=2)
+    return [
+        ("gemini:well_formed", json.dumps(WELL_FORMED)),
+        ("gemini:well_formed_pretty", well_formed_json),
+        ("gemini:healthy", json.dumps(HEALTHY)),
+        ("gemini:fenced", f"```json\n{well_formed_json}\n```"),
+        ("gemini:no_plant", json.dumps(no_plant)),
+        ("gemini:loose_types", json.dumps(loose_types)),
+        ("gemini:flat_legacy", json.dumps(flat)),
+        ("gemini:string_fields", json.dumps(string_fields)),
+        ("gemini:blank_fields", json.dumps(blank_fields)),
+        ("gemini:no_todos", json.dumps(no_todos)),
+        ("gemini:nan_confidence", json.dumps(WELL_FORMED).replace("91.5", "NaN")),
+        ("gemini:extra_key", json.dumps({**WELL_FORMED, "recommendation": {"water_plant": "no"}})),
+        ("parsed:dict", copy.deepcopy(WELL_FORMED)),
+        ("parsed:healthy_dict", copy.deepcopy(HEALTHY)),
+        ("malformed:truncated", well_formed_json[: len(well_formed_json) // 2]),
+        ("malformed:plain_text", "I could not analyze this image."),
+        ("malformed:empty", ""),
+        ("malformed:whitespace", "   \n"),
+        ("malformed:list", json.dumps([WELL_FORMED])),
+        ("malformed:null", "null"),
+        ("malformed:none", None),
+        ("malformed:number", 42),
+        ("malformed:empty_object", "{}"),
+        ("malformed:fence_only", "```json\n```"),
+    ]
+
+
+def _mock_responses() -> List[Tuple[str, Any]]:
+    service = MockAIService(settings=None, image_path="", logger=QuietLogger())
+    return [
+        (label, service.analyze(*reading)[2])
+        for label, reading in (
+            ("mock:dry", (25.5, 58.0, "BRIGHT", "4/6 DRY")),
+            ("mock:hot", (33.0, 40.0, "DIM", "1/6 DRY")),
+        )
+    ]
+
+
+# Values swapped into fuzzed responses: wrong types, nested containers, integers
+# wider than 64 bits, and strings a loose parser might accept
+FUZZ_VALUES: List[Any] = [
+    None,
+    True,
+    False,
+    0,
+    -7,
+    42,
+    101,
+    2**64,
+    -(2**63) - 1,
+    10**30,
+    12345678901234567890123,
+    0.5,
+    -1e300,
+    1e-320,
+    "",
+    "  ",
+    "HIGH",
+    " high ",
+    "MEDIUM",
+    "LOW",
+    "No disease found",
+    "No plant detected",
+    "unknown",
+    "3/4 DRY",
+    "1/4 WET",
+    "31.5",
+    "true",
+    "NaN",
+    "Check for fungal rot",
+    [],
+    ["HIGH"],
+    [1, [2, [3]]],
+    {},
+    {"name": "Tomato"},
+    {"nested": {"deeper": [None, {"x": 1}]}},
+]
+
+
+def _fuzz_paths(value: Any, path: Tuple = ()) -> List[Tuple]:
+    paths = [path]
+    if isinstance(value, dict):
+        for key, item in value.items():
+            paths.extend(_fuzz_paths(item, path + (key,)))
+    elif isinstance(value, list):
+        for index, item in enumerate(value):
+            paths.extend(_fuzz_paths(item, path + (index,)))
+    return paths
+
+
+def _mutate(rng: random.Random, response: Any) -> Any:
+    path = rng.choice(_fuzz_paths(response)[1:])
+    parent = response
+    for key in path[:-1]:
+        parent = parent[key]
+    key = path[-1]
+    action = rng.random()
+    if action < 0.1 and isinstance(parent, dict):
+        del parent[key]
+    elif action < 0.15 and isinstance(parent, dict):
+        parent[f"extra_{rng.randrange(3)}"] = rng.choice(FUZZ_VALUES)
+    else:
+        parent[key] = copy.deepcopy(rng.choice(FUZZ_VALUES))
+    return response
+
+
+def fuzzed_responses(count: int, seed: int = 0) -> List[Tuple[str, Any]]:
+    """`count` mutated well-formed responses, as JSON text (most) or already parsed."""
+    rng = random.Random(seed)
+    bases = (WELL_FORMED, HEALTHY, mock_analysis(25.5, 58.0, "BRIGHT", "4/6 DRY"))
+    responses = []
+    for index in range(count):
+        response = copy.deepcopy(rng.choice(bases))
+        for _ in range(rng.choice((1, 1, 2, 3))):
+            response = _mutate(rng, response)
+        form = rng.random()
+        if form < 0.15:
+            raw = response
+        elif form < 0.3:
+            raw = f"```json\n{json.dumps(response, indent=2)}\n```"
+        else:
+            raw = json.dumps(response)
+        responses.append((f"fuzz:{seed}:{index}", raw))
+    return responses
+
+
+def ai_response_corpus(backup_path: str = DEFAULT_BACKUP_PATH) -> List[Tuple[str, Any]]:
+    """(label, raw response) pairs; raw is usually a string, sometimes already parsed."""
+    return _backup_responses(backup_path) + _synthetic() + _mock_responses()
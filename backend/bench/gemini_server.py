@@ -0,0 +1,369 @@
+"""Local stand-in for the Gemini `generateContent` REST API.
+
+    python -m backend.bench.gemini_server --latency lognormal:900,0.4 --error-rate 0.05 --rpm 15
+    GEMINI_API_KEY=local GEMINI_BASE_URL=http://127.0.0.1:8085 python3 run.py --metrics-port 9108
+
+Speaks enough of the protocol for `google-genai` pointed at it through
+GEMINI_BASE_URL: `POST /<version>/models/<model>:generateContent` and
+`:streamGenerateContent` (SSE with `alt=sse`, otherwise a JSON array).
+The answer is `mock_analysis` for the sensor values in the prompt, so a
+healthy request looks like what Gemini returns with the response schema.
+
+Faults are drawn per request from a seeded generator: 429
+RESOURCE_EXHAUSTED (at random and/or above a requests-per-minute budget,
+with Retry-After and RetryInfo), 500/503 errors, malformed model text
+(truncated JSON or prose around a fence) and empty SAFETY-blocked answers.
+Every answer except a 429 waits for a latency drawn from `--latency`.
+`GET /stats` returns the outcome counters as JSON.
+"""
+
+import argparse
+import collections
+import dataclasses
+import json
+import math
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from backend.services.ai_service import mock_analysis
+
+DEFAULT_PORT = 8085
+_PATH = re.compile(r"^/[^/]+/models/(?P<model>[^/:]+):(?P<method>generateContent|streamGenerateContent)$")
+_SENSOR_LINES = {
+    "temp": re.compile(r"^- Temperature: (.*) C$", re.MULTILINE),
+    "humidity": re.compile(r"^- Humidity: (.*) %$", re.MULTILINE),
+    "light": re.compile(r"^- Light: (.*)$", re.MULTILINE),
+    "soil": re.compile(r"^- Soil Moisture: (.*)$", re.MULTILINE),
+}
+_ERRORS = ((500, "INTERNAL", "An internal error has occurred."), (503, "UNAVAILABLE", "The model is overloaded."))
+
+
+class Latency:
+    """Per-request delay from a `kind:params` spec, milliseconds in and seconds out.
+
+    const:MS, uniform:LO,HI, normal:MEAN,SD, lognormal:MEDIAN,SIGMA, exp:MEAN
+    """
+
+    KINDS: Dict[str, Tuple[int, Callable[[random.Random, List[float]], float]]] = {
+        "const": (1, lambda rng, p: p[0]),
+        "uniform": (2, lambda rng, p: rng.uniform(p[0], p[1])),
+        "normal": (2, lambda rng, p: rng.gauss(p[0], p[1])),
+        "lognormal": (2, lambda rng, p: rng.lognormvariate(math.log(p[0]), p[1]) if p[0] > 0 else 0.0),
+        "exp": (1, lambda rng, p: rng.expovariate(1 / p[0]) if p[0] > 0 else 0.0),
+    }
+
+    def __init__(self, spec: str):
+        kind, _, params = spec.partition(":")
+        if kind not in self.KINDS:
+            raise ValueError(f"unknown latency kind {kind!r}, expected one of {', '.join(self.KINDS)}")
+        arity, self._draw = self.KINDS[kind]
+        try:
+            self.params = [float(value) for value in params.split(",")] if params else []
+        except ValueError:
+            raise ValueError(f"latency {spec!r} has a non-numeric parameter") from None
+        if len(self.params) != arity:
+            raise ValueError(f"latency kind {kind!r} takes {arity} parameter(s), got {spec!r}")
+        self.spec = spec
+
+    def sample(self, rng: random.Random) -> float:
+        return max(0.0, self._draw(rng, self.params)) / 1000
+
+    def __repr__(self) -> str:
+        return self.spec
+
+
+def _latency(spec: str) -> Latency:
+    try:
+        return Latency(spec)
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(str(exc)) from None
+
+
+def _rate(value: str) -> float:
+    rate = float(value)
+    if not 0.0 <= rate <= 1.0:
+        raise argparse.ArgumentTypeError(f"rate must be between 0 and 1, got {value}")
+    return rate
+
+
+@dataclasses.dataclass
+class Faults:
+    latency: Latency = dataclasses.field(default_factory=lambda: Latency("const:0"))
+    # Fractions of requests; drawn in this order, so they add up rather than overlap
+    rate_limit_rate: float = 0.0
+    error_rate: float = 0.0
+    malformed_rate: float = 0.0
+    empty_rate: float = 0.0
+    # Requests per minute before every further one gets a 429; 0 means unlimited
+    rpm: int = 0
+    retry_after: float = 2.0
+    stream_chunks: int = 4
+    stream_chunk_ms: float = 50.0
+
+
+class GeminiStandIn(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], faults: Faults, seed: Optional[int] = None, verbose: bool = False):
+        super().__init__(address, _GeminiHandler)
+        self.faults = faults
+        self.verbose = verbose
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._window: Deque[float] = collections.deque()
+        self.stats: Dict[str, int] = collections.Counter()
+
+    def decide(self) -> Tuple[str, float]:
+        """Outcome and latency for one request: ok, rate_limited, error, malformed or empty."""
+        faults = self.faults
+        with self._lock:
+            self.stats["requests"] += 1
+            now = time.monotonic()
+            while self._window and now - self._window[0] >= 60:
+                self._window.popleft()
+            draw = self._rng.random()
+            if faults.rpm and len(self._window) >= faults.rpm:
+                outcome = "rate_limited"
+            else:
+                self._window.append(now)
+                outcome = "ok"
+                for name, rate in (
+                    ("rate_limited", faults.rate_limit_rate),
+                    ("error", faults.error_rate),
+                    ("malformed", faults.malformed_rate),
+                    ("empty", faults.empty_rate),
+                ):
+                    if draw < rate:
+                        outcome = name
+                        break
+                    draw -= rate
+            self.stats[outcome] += 1
+            delay = 0.0 if outcome == "rate_limited" else faults.latency.sample(self._rng)
+            return outcome, delay
+
+    def choice(self, options):
+        with self._lock:
+            return self._rng.choice(options)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"faults": {**dataclasses.asdict(self.faults), "latency": repr(self.faults.latency)}, **self.stats}
+
+
+def _prompt_text(request: Dict[str, Any]) -> str:
+    return "\n".join(
+        part.get("text", "")
+        for content in request.get("contents") or []
+        for part in (content.get("parts") or [])
+        if isinstance(part, dict)
+    )
+
+
+def _answer_text(prompt: str) -> str:
+    values = {}
+    for name, pattern in _SENSOR_LINES.items():
+        match = pattern.search(prompt)
+        values[name] = match.group(1).strip() if match else None
+    return json.dumps(mock_analysis(values["temp"], values["humidity"], values["light"], values["soil"]), indent=2)
+
+
+def _malformed(text: str, style: str) -> str:
+    if style == "truncated":
+        return text[: len(text) // 2]
+    return f"Here is the analysis you asked for:\n```json\n{text}\n```\nLet me know if you need anything else."
+
+
+def _response(model: str, prompt: str, text: Optional[str], finish_reason: Optional[str] = "STOP") -> Dict[str, Any]:
+    candidate: Dict[str, Any] = {"index": 0}
+    if text is not None:
+        candidate["content"] = {"parts": [{"text": text}], "role": "model"}
+    if finish_reason:
+        candidate["finishReason"] = finish_reason
+    prompt_tokens, answer_tokens = len(prompt) // 4, len(text or "") // 4
+    return {
+        "candidates": [candidate],
+        "usageMetadata": {
+            "promptTokenCount": prompt_tokens,
+            "candidatesTokenCount": answer_tokens,
+            "totalTokenCount": prompt_tokens + answer_tokens,
+        },
+        "modelVersion": model,
+    }
+
+
+class _GeminiHandler(BaseHTTPRequestHandler):
+    server: GeminiStandIn
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; with Nagle on, delayed ACKs add ~40ms to each answer
+    disable_nagle_algorithm = True
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        if self.path.split("?", 1)[0] != "/stats":
+            self._error(404, "NOT_FOUND", f"Unknown path {self.path}")
+            return
+        self._json(200, self.server.snapshot())
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        path, _, query = self.path.partition("?")
+        match = _PATH.match(path)
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if not match:
+            self._error(404, "NOT_FOUND", f"Unknown path {path}")
+            return
+        try:
+            request = json.loads(body or b"{}")
+        except ValueError:
+            self._error(400, "INVALID_ARGUMENT", "Invalid JSON payload received.")
+            return
+
+        outcome, delay = self.server.decide()
+        if outcome == "rate_limited":
+            retry_after = self.server.faults.retry_after
+            self._error(
+                429,
+                "RESOURCE_EXHAUSTED",
+                "Resource has been exhausted (e.g. check quota).",
+                details=[{"@type": "type.googleapis.com/google.rpc.RetryInfo", "retryDelay": f"{retry_after:g}s"}],
+                headers={"Retry-After": f"{math.ceil(retry_after)}"},
+            )
+            return
+        time.sleep(delay)
+        if outcome == "error":
+            self._error(*self.server.choice(_ERRORS))
+            return
+
+        model, prompt = match.group("model"), _prompt_text(request)
+        text: Optional[str] = _answer_text(prompt)
+        finish_reason = "STOP"
+        if outcome == "malformed":
+            text = _malformed(text, self.server.choice(("truncated", "prose")))
+        elif outcome == "empty":
+            text, finish_reason = None, "SAFETY"
+
+        if match.group("method") == "generateContent":
+            self._json(200, _response(model, prompt, text, finish_reason))
+        elif "alt=sse" in query:
+            self._stream(model, prompt, text, finish_reason)
+        else:
+            chunks = self._chunks(text)
+            self._json(200, [_response(model, prompt, chunk, finish_reason if last else None) for chunk, last in chunks])
+
+    def _chunks(self, text: Optional[str]) -> List[Tuple[Optional[str], bool]]:
+        if text is None:
+            return [(None, True)]
+        count = max(1, min(self.server.faults.stream_chunks, len(text)))
+        size = math.ceil(len(text) / count)
+        pieces = [text[i : i + size] for i in range(0, len(text), size)] or [""]
+        return [(piece, i == len(pieces) - 1) for i, piece in enumerate(pieces)]
+
+    def _stream(self, model: str, prompt: str, text: Optional[str], finish_reason: str) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        for i, (chunk, last) in enumerate(self._chunks(text)):
+            if i:
+                time.sleep(self.server.faults.stream_chunk_ms / 1000)
+            event = _response(model, prompt, chunk, finish_reason if last else None)
+            self.wfile.write(b"data: " + json.dumps(event).encode("utf-8") + b"\r\n\r\n")
+            self.wfile.flush()
+
+    def _error(
+        self,
+        code: int,
+        status: str,
+        message: str,
+        details: Optional[List[Dict[str, Any]]] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> None:
+        error: Dict[str, Any] = {"code": code, "message": message, "status": status}
+        if details:
+            error["details"] = details
+        self._json(code, {"error": error}, headers)
+
+    def _json(self, code: int, payload: Any, headers: Optional[Dict[str, str]] = None) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json; charset=UTF-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def start_server(
+    faults: Faults, host: str = "127.0.0.1", port: int = 0, seed: Optional[int] = None, verbose: bool = False
+) -> GeminiStandIn:
+    """Serve on a daemon thread; port 0 picks a free one (see `server.server_address`)."""
+    server = GeminiStandIn((host, port), faults, seed=seed, verbose=verbose)
+    threading.Thread(target=server.serve_forever, name="gemini-stand-in", daemon=True).start()
+    return server
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m backend.bench.gemini_server",
+        description="Local Gemini generateContent stand-in with latency and failure injection",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Bind address")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Bind port")
+    parser.add_argument(
+        "--latency",
+        type=_latency,
+        default=Latency("const:0"),
+        help="Response delay in ms: const:MS, uniform:LO,HI, normal:MEAN,SD, lognormal:MEDIAN,SIGMA or exp:MEAN",
+    )
+    parser.add_argument("--rate-limit-rate", type=_rate, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--rpm", type=int, default=0, help="Requests per minute before 429s (0 = unlimited)")
+    parser.add_argument("--retry-after", type=float, default=2.0, help="Seconds advertised in 429 responses")
+    parser.add_argument("--error-rate", type=_rate, default=0.0, help="Fraction of requests answered with 500/503")
+    parser.add_argument("--malformed-rate", type=_rate, default=0.0, help="Fraction of answers with broken JSON text")
+    parser.add_argument("--empty-rate", type=_rate, default=0.0, help="Fraction of answers blocked with no text")
+    parser.add_argument("--stream-chunks", type=int, default=4, help="Chunks per streamed answer")
+    parser.add_argument("--stream-chunk-ms", type=float, default=50.0, help="Delay between streamed chunks")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for latency and fault draws")
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    args = parser.parse_args(argv)
+
+    total = args.rate_limit_rate + args.error_rate + args.malformed_rate + args.empty_rate
+    if total > 1.0:
+        parser.error(f"fault rates add up to {total:g}, more than 1")
+
+    faults = Faults(
+        latency=args.latency,
+        rate_limit_rate=args.rate_limit_rate,
+        error_rate=args.error_rate,
+        malformed_rate=args.malformed_rate,
+        empty_rate=args.empty_rate,
+        rpm=args.rpm,
+        retry_after=args.retry_after,
+        stream_chunks=args.stream_chunks,
+        stream_chunk_ms=args.stream_chunk_ms,
+    )
+    server = GeminiStandIn((args.host, args.port), faults, seed=args.seed, verbose=args.verbose)
+    host, port = server.server_address[:2]
+    print(f"Gemini stand-in on http://{host}:{port} (latency {faults.latency}); stats at /stats", flush=True)
+    print(f"Point the backend at it with GEMINI_BASE_URL=http://{host}:{port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(server.snapshot(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""Frozen copy of `_normalize_ai_result` as it was before the schema fast path.
+
+`check_normalize` holds the current normalizer to this output. Do not edit:
+it is the reference, bugs included. DEFAULT_AI_RESULT is copied for the same
+reason.
+"""
+
+import json
+from typing import Any, Dict, List
+
+DEFAULT_AI_RESULT: Dict[str, Any] = {
+    "plant": {
+        "name": "No plant detected",
+        "confidence": 0.0,
+    },
+    "disease": {
+        "name": "Unknown",
+        "confidence": 0.0,
+        "reason": "Plant or disease could not be reliably identified.",
+    },
+    "environment": {
+        "temperature": None,
+        "humidity": None,
+        "light": "unknown",
+        "soil": "unknown",
+    },
+    "todos": [],
+    "recommendation": {
+        "reduce_temperature": False,
+        "water_plant": False,
+        "increase_airflow": False,
+    },
+}
+
+
+def _default_ai_result() -> Dict[str, Any]:
+    return {
+        "plant": DEFAULT_AI_RESULT["plant"].copy(),
+        "disease": DEFAULT_AI_RESULT["disease"].copy(),
+        "environment": DEFAULT_AI_RESULT["environment"].copy(),
+        "todos": [],
+        "recommendation": DEFAULT_AI_RESULT["recommendation"].copy(),
+    }
+
+
+def _to_bool(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        return value != 0
+    if isinstance(value, str):
+        normalized = value.strip().lower()
+        if normalized in {"1", "true", "yes", "on"}:
+            return True
+        if normalized in {"0", "false", "no", "off", ""}:
+            return False
+    return bool(value)
+
+
+def _to_float(value: Any, default: float = 0.0) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _to_confidence(value: Any, default: float = 0.0) -> float:
+    score = _to_float(value, default)
+    if score < 0:
+        return 0.0
+    if score > 100:
+        return 100.0
+    return score
+
+
+def _to_optional_float(value: Any) -> Any:
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _normalize_priority(value: Any) -> str:
+    normalized = str(value).strip().upper()
+    return normalized if normalized in {"HIGH", "MEDIUM", "LOW"} else "LOW"
+
+
+def _soil_is_majority_dry(soil_summary: Any) -> bool:
+    return "DRY" in str(soil_summary).upper()
+
+
+def _default_todos(temperature: Any, soil_summary: Any) -> List[Dict[str, str]]:
+    todos: List[Dict[str, str]] = []
+    if _soil_is_majority_dry(soil_summary):
+        todos.append(
+            {
+                "action": "Irrigate the plant",
+                "priority": "HIGH",
+                "reason": "Majority soil reading is DRY.",
+            }
+        )
+
+    temp_value = _to_float(temperature, 0.0)
+    if temp_value > 30:
+        todos.append(
+            {
+                "action": "Reduce ambient temperature",
+                "priority": "HIGH",
+                "reason": "Temperature is above 30C.",
+            }
+        )
+        todos.append(
+            {
+                "action": "Increase airflow around the plant",
+                "priority": "MEDIUM",
+                "reason": "Higher temperature increases stress and disease risk.",
+            }
+        )
+
+    if not todos:
+        todos.append(
+            {
+                "action": "Continue routine monitoring",
+                "priority": "LOW",
+                "reason": "No immediate intervention is required.",
+            }
+        )
+    return todos
+
+
+def _derive_recommendation(
+    disease_name: str,
+    temperature: Any,
+    soil_summary: Any,
+    todos: List[Dict[str, str]],
+) -> Dict[str, bool]:
+    temp_value = _to_float(temperature, 0.0)
+    disease_detected = disease_name.strip().lower() not in {"", "no disease found", "unknown"}
+    todos_text = " ".join(
+        f"{item.get('action', '')} {item.get('reason', '')}" for item in todos
+    ).lower()
+
+    return {
+        "reduce_temperature": temp_value > 30 or "cool" in todos_text or "temperature" in todos_text,
+        "water_plant": _soil_is_majority_dry(soil_summary),
+        "increase_airflow": disease_detected or temp_value > 30 or "airflow" in todos_text or "fan" in todos_text,
+    }
+
+
+def _normalize_todos(value: Any) -> List[Dict[str, str]]:
+    if not isinstance(value, list):
+        return []
+
+    todos: List[Dict[str, str]] = []
+    for item in value:
+        if not isinstance(item, dict):
+            continue
+        action = str(item.get("action", "")).strip()
+        reason = str(item.get("reason", "")).strip()
+        if not action:
+            continue
+        todos.append(
+            {
+                "action": action,
+                "priority": _normalize_priority(item.get("priority")),
+                "reason": reason or "No reason provided.",
+            }
+        )
+    return todos
+
+
+def _strip_code_fence(value: str) -> str:
+    return value.replace("```json", "").replace("```", "").strip()
+
+
+def _as_dict(value: Any) -> Dict[str, Any]:
+    if isinstance(value, dict):
+        return value
+    if not isinstance(value, str):
+        return {}
+
+    candidate = _strip_code_fence(value)
+    try:
+        parsed = json.loads(candidate)
+    except json.JSONDecodeError:
+        return {}
+    return parsed if isinstance(parsed, dict) else {}
+
+
+def _normalize_ai_result(raw_result: Any) -> Dict[str, Any]:
+    raw_dict = _as_dict(raw_result)
+    result = _default_ai_result()
+
+    if not raw_dict:
+        return result
+
+    plant_raw = raw_dict.get("plant", {})
+    if isinstance(plant_raw, dict):
+        plant_name = str(plant_raw.get("name", result["plant"]["name"])).strip() or result["plant"]["name"]
+        plant_confidence = _to_confidence(plant_raw.get("confidence", result["plant"]["confidence"]))
+    else:
+        plant_name = str(plant_raw).strip() or result["plant"]["name"]
+        plant_confidence = _to_confidence(raw_dict.get("confidence", result["plant"]["confidence"]))
+
+    disease_raw = raw_dict.get("disease", {})
+    if isinstance(disease_raw, dict):
+        disease_name = str(disease_raw.get("name", result["disease"]["name"])).strip() or result["disease"]["name"]
+        disease_confidence = _to_confidence(disease_raw.get("confidence", result["disease"]["confidence"]))
+        disease_reason = str(disease_raw.get("reason", result["disease"]["reason"]))
+    else:
+        disease_name = str(disease_raw).strip() or result["disease"]["name"]
+        disease_confidence = _to_confidence(raw_dict.get("confidence", result["disease"]["confidence"]))
+        disease_reason = result["disease"]["reason"]
+
+    if plant_name.lower() == "no plant detected":
+        disease_name = "Unknown"
+        disease_reason = "Plant not detected, disease classification is unknown."
+
+    env_raw = _as_dict(raw_dict.get("environment", {}))
+    env_temperature = _to_optional_float(env_raw.get("temperature", raw_dict.get("temperature")))
+    env_humidity = _to_optional_float(env_raw.get("humidity", raw_dict.get("humidity")))
+    env_light = str(env_raw.get("light", raw_dict.get("light", result["environment"]["light"])))
+    env_soil = str(env_raw.get("soil", raw_dict.get("soil", result["environment"]["soil"])))
+
+    todos = _normalize_todos(raw_dict.get("todos", []))
+    if not todos:
+        todos = _default_todos(env_temperature, env_soil)
+
+    if disease_name.lower() == "no disease found":
+        for todo in todos:
+            todo_text = f"{todo['action']} {todo['reason']}".lower()
+            if todo["priority"] == "HIGH" and any(
+                token in todo_text for token in {"disease", "infection", "fung", "rot", "pest"}
+            ):
+                todo["priority"] = "MEDIUM"
+
+    rec_raw = _as_dict(raw_dict.get("recommendation", {}))
+    if rec_raw:
+        recommendation = {
+            "reduce_temperature": _to_bool(rec_raw.get("reduce_temperature", False)),
+            "water_plant": _to_bool(rec_raw.get("water_plant", False)),
+            "increase_airflow": _to_bool(rec_raw.get("increase_airflow", False)),
+        }
+    else:
+        recommendation = _derive_recommendation(
+            disease_name=disease_name,
+            temperature=env_temperature,
+            soil_summary=env_soil,
+            todos=todos,
+        )
+
+    result["plant"] = {
+        "name": plant_name,
+        "confidence": plant_confidence,
+    }
+    result["disease"] = {
+        "name": disease_name,
+        "confidence": disease_confidence,
+        "reason": disease_reason,
+    }
+    result["environment"] = {
+        "temperature": env_temperature,
+        "humidity": env_humidity,
+        "light": env_light,
+        "soil": env_soil,
+    }
+    result["todos"] = todos
+    result["recommendation"] = recommendation
+    return result
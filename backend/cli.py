@@ -1,7 +1,11 @@
 import argparse
 
+from backend.config import device_channel
+from backend.logger import DEFAULT_DEBUG_RING, DEFAULT_LOG_BACKUPS, DEFAULT_LOG_MAX_BYTES, LEVELS
+from backend.scheduler import parse_duration, parse_quiet_hours
 
-def parse_args():
+
+def parse_args(argv=None):
     parser = argparse.ArgumentParser(
         description="AI + IoT Smart Plant System",
         formatter_class=argparse.ArgumentDefaultsHelpFormatter,
@@ -47,6 +51,25 @@ def parse_args():
         default=1,
         help="Number of seconds the water pump stays on when watering",
     )
+    parser.add_argument(
+        "--max-manual-pump",
+        type=parse_duration,
+        default=30.0,
+        help="Longest pump run a realtime pump_for command may request, e.g. 20s",
+    )
+    parser.add_argument(
+        "--camera-index",
+        type=int,
+        default=None,
+        help="OpenCV camera device index (default: scan for the first working camera)",
+    )
+    parser.add_argument(
+        "--fleet",
+        type=str,
+        default=None,
+        metavar="CONFIG",
+        help="Run every station in this TOML/YAML fleet config concurrently in one process",
+    )
     parser.add_argument(
         "--mock",
         action="store_true",
@@ -61,15 +84,151 @@ def parse_args():
         "--command-channel",
         type=str,
         default=None,
-        help="Supabase realtime channel name for control commands",
+        help="Supabase realtime channel name for control commands (default: derived from the device id)",
+    )
+    parser.add_argument(
+        "--device-id",
+        type=str,
+        default=None,
+        help="Device id stored on every cycle and used to derive the command channel (default: DEVICE_ID env)",
+    )
+    parser.add_argument(
+        "--interval",
+        type=parse_duration,
+        default=None,
+        help="Run cycles on a fixed schedule in this process, e.g. 15m or 1h (works with or without --listen-commands)",
+    )
+    parser.add_argument(
+        "--jitter",
+        type=parse_duration,
+        default=0.0,
+        help="Random delay of up to this long added to each scheduled tick, e.g. 30s",
+    )
+    parser.add_argument(
+        "--quiet-hours",
+        type=parse_quiet_hours,
+        default=None,
+        metavar="HH:MM-HH:MM",
+        help="Local time window in which scheduled cycles are skipped, e.g. 22:00-06:00",
+    )
+    parser.add_argument(
+        "--max-runtime",
+        type=parse_duration,
+        default=None,
+        help="Abort any cycle that runs longer than this, e.g. 5m",
+    )
+    parser.add_argument(
+        "--run-retention",
+        action="store_true",
+        help="Run the history retention job (downsample/drop old monthly partitions) and exit",
+    )
+    parser.add_argument(
+        "--retention-full-months",
+        type=int,
+        default=3,
+        help="Months of history kept at full detail before downsampling and image archiving",
+    )
+    parser.add_argument(
+        "--retention-keep-months",
+        type=int,
+        default=12,
+        help="Months of history kept before partitions are dropped (rollups are always kept)",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Run the first cycle under the stack-sampling profiler (also triggered by the profile_next_cycle command)",
+    )
+    parser.add_argument(
+        "--profile-dir",
+        default="profiles",
+        help="Directory profiles are written to (collapsed-stack format)",
+    )
+    parser.add_argument(
+        "--profile-upload",
+        action="store_true",
+        help="Also upload profiles to the image storage bucket under profiles/",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=None,
+        help="Serve Prometheus metrics on this port (e.g. 9108)",
+    )
+    parser.add_argument(
+        "--metrics-host",
+        default="127.0.0.1",
+        help="Address the metrics endpoint binds to (0.0.0.0 to let a remote Prometheus scrape it)",
+    )
+    parser.add_argument(
+        "--log-level",
+        type=str.upper,
+        choices=list(LEVELS),
+        default="INFO",
+        help="Minimum level written; suppressed DEBUG lines are only kept for the ring buffer",
+    )
+    parser.add_argument(
+        "--log-json",
+        default=None,
+        metavar="PATH",
+        help="Also write JSON lines to this file (rotated at --log-max-bytes)",
+    )
+    parser.add_argument(
+        "--log-max-bytes",
+        type=int,
+        default=DEFAULT_LOG_MAX_BYTES,
+        help="Rotate the JSON-lines log when it reaches this size",
+    )
+    parser.add_argument(
+        "--log-backups",
+        type=int,
+        default=DEFAULT_LOG_BACKUPS,
+        help="Rotated JSON-lines files to keep",
+    )
+    parser.add_argument(
+        "--debug-ring",
+        type=int,
+        default=DEFAULT_DEBUG_RING,
+        help="Recent suppressed DEBUG lines kept in memory and written out before the next ERROR (0 disables)",
+    )
+    parser.add_argument(
+        "--trace",
+        default=None,
+        metavar="TRACE_ID",
+        help="Print one cycle's timeline from --log-json and the database, then exit",
+    )
+    parser.add_argument(
+        "--timing-report",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Print per-stage timing percentiles over the last N cycles (of --device-id, if given) and exit",
+    )
+    parser.add_argument(
+        "--startup-report",
+        action="store_true",
+        help="After the first cycle, print import and initialization time per service and time to first reading",
+    )
+    parser.add_argument(
+        "--no-warm",
+        action="store_true",
+        help="Build services only on first use instead of warming them in background threads at startup",
     )
 
-    return parser.parse_args()
+    args = parser.parse_args(argv)
+    if args.interval is not None and args.interval <= 0:
+        parser.error("--interval must be greater than 0")
+    if args.interval and args.jitter >= args.interval:
+        parser.error("--jitter must be smaller than --interval")
+    return args
 
 
-def log_configuration(log, args, is_mock: bool) -> None:
+def log_configuration(log, args, settings) -> None:
     log.section("AI + IoT Smart Plant System")
-    log.info("CONFIG", f"Mode       = {'MOCK' if is_mock else 'REAL'}")
+    log.info("CONFIG", f"Mode       = {'MOCK' if settings.mock else 'REAL'}")
+    if args.fleet:
+        log.info("CONFIG", f"Fleet      = {args.fleet} (per-station pins/channels below)")
+    log.info("CONFIG", f"Device id  = {settings.device_id}")
     log.info("CONFIG", f"DHT pins   = {args.dht_pins}")
     log.info("CONFIG", f"LDR pin    = {args.ldr_pin}")
     log.info("CONFIG", f"Soil pins  = {args.soil_pins}")
@@ -77,6 +236,13 @@ def log_configuration(log, args, is_mock: bool) -> None:
     log.info("CONFIG", f"Pump pin   = {args.pump_pin}")
     log.info("CONFIG", f"Pump dur   = {args.pump_duration}s")
     log.info("CONFIG", f"Cmd mode   = {'ON' if args.listen_commands else 'OFF'}")
+    if args.interval:
+        log.info("CONFIG", f"Interval   = {args.interval:g}s (jitter {args.jitter:g}s)")
+        if args.quiet_hours:
+            start, end = args.quiet_hours
+            log.info("CONFIG", f"Quiet hrs  = {start:%H:%M}-{end:%H:%M}")
+    if args.max_runtime:
+        log.info("CONFIG", f"Max runtime= {args.max_runtime:g}s")
     if args.listen_commands:
-        channel = args.command_channel if args.command_channel else "(from SUPABASE_COMMAND_CHANNEL)"
+        channel = args.command_channel or device_channel(settings.supabase_command_channel, settings.device_id)
         log.info("CONFIG", f"Cmd channel= {channel}")
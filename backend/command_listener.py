@@ -1,9 +1,15 @@
 import asyncio
 import datetime
-from typing import Any, Awaitable, Callable, Optional
+import itertools
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
 
-from supabase import acreate_client
-from supabase.lib.client_options import AsyncClientOptions
+from backend.metrics import QUEUE_DEPTH
+from backend.services.actuator_service import ActuatorSafetyError
+from backend.telemetry import HeartbeatPublisher
+from backend.tracing import new_trace_id, trace
 
 
 REALTIME_TIMEOUT_SECONDS = 30
@@ -20,119 +26,395 @@ def _cancel_join_timeout(channel, logger) -> None:
         logger.debug("Realtime", f"Failed to cancel join timeout task: {exc}")
 
 
-class FrequentCycleRunner:
+MANUAL_PRIORITY = 0
+SCHEDULED_PRIORITY = 10
+# Commands that bypass the cycle queue and act on the relays/sensors directly
+DIRECT_COMMANDS = ("pump_for", "fan_on", "fan_off", "read_sensors_only", "profile_next_cycle")
+
+
+@dataclass
+class CommandRequest:
+    request_id: str
+    command: str
+    source: str
+    priority: int
+    accepted_at: float = field(default_factory=time.monotonic)
+    trace_id: Optional[str] = None
+
+
+@dataclass
+class _QueuedCommand:
+    key: str
+    handler: Callable[[], Awaitable[Any]]
+    priority: int
+    seq: int
+    requests: List[CommandRequest] = field(default_factory=list)
+    # Shared by every request coalesced into this run
+    trace_id: str = field(default_factory=new_trace_id)
+
+
+def _command_data(payload: Any) -> Dict[str, Any]:
+    # Broadcast callbacks receive {"event", "payload", ...}; the dashboard's fields sit under "payload".
+    # A malformed broadcast may carry anything there, and must not raise inside the realtime callback.
+    data = payload.get("payload", payload) if isinstance(payload, dict) else None
+    return data if isinstance(data, dict) else {}
+
+
+def _elapsed_ms(start: float, end: float) -> int:
+    return int(round((end - start) * 1000))
+
+
+class CommandQueue:
+    """Run commands one at a time, highest priority first.
+
+    Requests with the same key that arrive before their command starts are
+    coalesced into it, so a burst of identical requests runs once more at
+    most. Each request is reported through `on_event` as accepted, started
+    and completed, with queue/run timings.
+    """
+
     def __init__(
         self,
-        system,
         logger,
+        on_event: Callable[[str, Dict[str, Any]], Awaitable[None]],
         on_state_change: Callable[[str, bool], Awaitable[None]],
     ):
-        self.system = system
         self.log = logger
-        self._cycle_lock = asyncio.Lock()
-        self._task: Optional[asyncio.Task[None]] = None
+        self._on_event = on_event
         self._on_state_change = on_state_change
+        self._pending: Dict[str, _QueuedCommand] = {}
+        self._current: Optional[_QueuedCommand] = None
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._closing = False
+        self._worker: Optional[asyncio.Task[None]] = None
 
     @property
     def is_running(self) -> bool:
-        return self._task is not None and not self._task.done()
+        return self._current is not None
 
-    async def start(self) -> None:
-        if self.is_running:
-            self.log.info(
-                "Command",
-                "Reading cycle already running",
-            )
-            return
+    @property
+    def depth(self) -> int:
+        return len(self._pending)
 
-        self._task = asyncio.create_task(self._run_cycle())
-        await self._on_state_change("running", True)
-        self.log.success("Command", "Reading cycle started")
+    def start(self) -> None:
+        if self._worker is None:
+            self._worker = asyncio.create_task(self._run())
 
-    async def shutdown(self) -> None:
-        if self._task and not self._task.done():
-            await self._task
+    async def submit(
+        self,
+        key: str,
+        handler: Callable[[], Awaitable[Any]],
+        *,
+        command: Optional[str] = None,
+        request_id: Optional[str] = None,
+        source: str = "dashboard",
+        priority: int = MANUAL_PRIORITY,
+    ) -> CommandRequest:
+        entry = self._pending.get(key)
+        coalesced = entry is not None
+        if entry is None:
+            entry = _QueuedCommand(key=key, handler=handler, priority=priority, seq=next(self._seq))
+            self._pending[key] = entry
+        else:
+            entry.priority = min(entry.priority, priority)
+        request = CommandRequest(
+            request_id=request_id or uuid.uuid4().hex,
+            command=command or key,
+            source=source,
+            priority=priority,
+            trace_id=entry.trace_id,
+        )
+        entry.requests.append(request)
+        self._wakeup.set()
+
+        with trace(entry.trace_id):
+            if coalesced:
+                self.log.info("Command", f"{request.command} ({request.request_id}) coalesced into the queued run")
+            else:
+                self.log.info("Command", f"{request.command} ({request.request_id}) queued from {source}")
+            await self._emit(
+                "command_accepted",
+                request,
+                coalesced=coalesced,
+                queue_depth=self.depth,
+                running=self.is_running,
+            )
+        return request
 
-    async def _execute_cycle(self) -> None:
-        async with self._cycle_lock:
-            try:
-                await asyncio.to_thread(self.system.run)
-            except Exception as exc:  # pylint: disable=broad-except
-                self.log.error("Command", f"Cycle execution failed: {exc}")
+    async def shutdown(self) -> None:
+        """Drop queued commands and wait for the running one to finish."""
+        self._closing = True
+        self._pending.clear()
+        self._wakeup.set()
+        if self._worker is not None:
+            await self._worker
+
+    async def _emit(self, event: str, request: CommandRequest, **data: Any) -> None:
+        await self._on_event(
+            event,
+            {
+                "request_id": request.request_id,
+                "command": request.command,
+                "source": request.source,
+                "trace_id": request.trace_id,
+                "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                **data,
+            },
+        )
+
+    async def _run(self) -> None:
+        while not self._closing:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            while self._pending and not self._closing:
+                entry = min(self._pending.values(), key=lambda item: (item.priority, item.seq))
+                del self._pending[entry.key]
+                await self._execute(entry)
+
+    async def _execute(self, entry: _QueuedCommand) -> None:
+        with trace(entry.trace_id):
+            await self._execute_traced(entry)
+
+    async def _execute_traced(self, entry: _QueuedCommand) -> None:
+        started_at = time.monotonic()
+        self._current = entry
+        for request in entry.requests:
+            await self._emit(
+                "command_started",
+                request,
+                batch_size=len(entry.requests),
+                queued_ms=_elapsed_ms(request.accepted_at, started_at),
+            )
+        await self._on_state_change("running", True)
+        self.log.success("Command", f"Running {entry.key} for {len(entry.requests)} request(s)")
 
-    async def _run_cycle(self) -> None:
+        error: Optional[str] = None
         try:
-            self.log.info("Command", "Executing smart plant cycle")
-            await self._execute_cycle()
+            await entry.handler()
+        except Exception as exc:  # pylint: disable=broad-except
+            error = str(exc)
+            self.log.error("Command", f"{entry.key} failed: {exc}")
         finally:
-            self._task = None
+            self._current = None
             await self._on_state_change("live", False)
 
+        finished_at = time.monotonic()
+        for request in entry.requests:
+            await self._emit(
+                "command_completed",
+                request,
+                ok=error is None,
+                error=error,
+                queued_ms=_elapsed_ms(request.accepted_at, started_at),
+                run_ms=_elapsed_ms(started_at, finished_at),
+                total_ms=_elapsed_ms(request.accepted_at, finished_at),
+            )
+
+
+class _ChannelLink:
+    """Broadcast through whichever channel is currently subscribed; a no-op while disconnected."""
 
-async def listen_for_control_commands(system, settings, logger, channel_name: str) -> None:
+    def __init__(self, logger):
+        self.log = logger
+        self.channel = None
+        self.heartbeat: Optional[HeartbeatPublisher] = None
+
+    async def send(self, event: str, data: Dict[str, Any]) -> None:
+        if self.channel is None:
+            return
+        try:
+            await self.channel.send_broadcast(event=event, data=data)
+        except Exception as exc:  # pylint: disable=broad-except
+            self.log.debug("Realtime", f"{event} broadcast failed: {exc}")
+
+    async def device_state(self, status: str, is_running: bool) -> None:
+        if self.channel is None or self.heartbeat is None:
+            return
+        await self.heartbeat.state_changed(status, is_running)
+
+
+async def run_direct_command(system, link: _ChannelLink, logger, command: str, data: Dict[str, Any], received_at: float) -> None:
+    """Run an actuator/sensor command immediately, outside the cycle queue, and acknowledge it.
+
+    These only touch the relays or sensors (or arm the profiler for the next
+    cycle), so they do not wait for a running cycle. The `command_completed` ack carries the measured execution latency.
+    """
+    request = CommandRequest(
+        request_id=str(data.get("request_id") or uuid.uuid4().hex),
+        command=command,
+        source=str(data.get("source") or "dashboard"),
+        priority=MANUAL_PRIORITY,
+        accepted_at=received_at,
+        trace_id=new_trace_id(),
+    )
+    handlers: Dict[str, Callable[[], Awaitable[Any]]] = {
+        "pump_for": lambda: system.pump_for(data.get("seconds")),
+        "fan_on": lambda: system.set_fan(True, data.get("seconds")),
+        "fan_off": lambda: system.set_fan(False),
+        "read_sensors_only": system.read_sensors_only,
+        "profile_next_cycle": lambda: system.profile_next_cycle(data.get("upload")),
+    }
+    with trace(request.trace_id):
+        started_at = time.monotonic()
+        result: Any = None
+        error: Optional[str] = None
+        try:
+            result = await handlers[command]()
+        except ActuatorSafetyError as exc:
+            error = str(exc)
+            logger.warning("Command", f"{command} ({request.request_id}) refused: {exc}")
+        except Exception as exc:  # pylint: disable=broad-except
+            error = str(exc)
+            logger.error("Command", f"{command} ({request.request_id}) failed: {exc}")
+        finished_at = time.monotonic()
+        if error is None:
+            logger.success("Command", f"{command} ({request.request_id}) done in {_elapsed_ms(started_at, finished_at)}ms")
+
+        await link.send(
+            "command_completed",
+            {
+                "request_id": request.request_id,
+                "command": command,
+                "source": request.source,
+                "trace_id": request.trace_id,
+                "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                "direct": True,
+                "ok": error is None,
+                "error": error,
+                "result": result,
+                "queued_ms": _elapsed_ms(received_at, started_at),
+                "run_ms": _elapsed_ms(started_at, finished_at),
+                "total_ms": _elapsed_ms(received_at, finished_at),
+            },
+        )
+
+
+class RealtimeConnection:
+    """One async Supabase client, so one realtime socket, shared by every command channel of the process.
+
+    Fleet stations each subscribe their own channel on it. The client reconnects
+    the socket by itself, and subscribing a channel reopens it if it was closed.
+    """
+
+    def __init__(self, settings):
+        self.settings = settings
+        self._client = None
+        self._lock = asyncio.Lock()
+
+    async def client(self):
+        async with self._lock:
+            if self._client is None:
+                from supabase import acreate_client  # pylint: disable=import-error
+                from supabase.lib.client_options import AsyncClientOptions  # pylint: disable=import-error
+
+                self._client = await acreate_client(
+                    self.settings.supabase_url,
+                    self.settings.supabase_service_role_key,
+                    options=AsyncClientOptions(
+                        realtime={
+                            "auto_reconnect": True,
+                            "max_retries": 10,
+                            "initial_backoff": 2.0,
+                            "timeout": REALTIME_TIMEOUT_SECONDS,
+                        }
+                    ),
+                )
+        return self._client
+
+
+async def listen_for_control_commands(
+    system, settings, logger, channel_name: str, scheduler=None, realtime: Optional[RealtimeConnection] = None
+) -> None:
+    realtime = realtime or RealtimeConnection(settings)
     max_retries = 10
     retry_count = 0
     base_retry_delay = 2
 
-    while retry_count < max_retries:
-        try:
-            await _listen_with_reconnect(system, settings, logger, channel_name)
-            retry_count = 0  # Reset on success
-        except KeyboardInterrupt:
-            logger.info("Realtime", "Command listener stopped by user")
-            break
-        except Exception as exc:  # pylint: disable=broad-except
-            retry_count += 1
-            if retry_count >= max_retries:
-                logger.error("Realtime", f"Max retries ({max_retries}) exceeded. Giving up.")
+    # The queue (and scheduler) outlive individual channel connections, so
+    # reconnects neither drop queued commands nor reset the schedule.
+    link = _ChannelLink(logger)
+    queue = CommandQueue(logger, on_event=link.send, on_state_change=link.device_state)
+    link.heartbeat = HeartbeatPublisher(system, queue, link.send)
+    QUEUE_DEPTH.set_function(lambda: queue.depth, device=settings.device_id)
+    queue.start()
+
+    scheduler_task: Optional[asyncio.Task[None]] = None
+    if scheduler is not None:
+        scheduler_task = asyncio.create_task(
+            scheduler.run(
+                lambda: queue.submit(
+                    "cycle",
+                    system.run_async,
+                    command="scheduled_reading",
+                    source="scheduler",
+                    priority=SCHEDULED_PRIORITY,
+                )
+            )
+        )
+
+    try:
+        while retry_count < max_retries:
+            try:
+                await _listen_with_reconnect(system, realtime, logger, channel_name, queue, link)
+                retry_count = 0  # Reset on success
+            except KeyboardInterrupt:
+                logger.info("Realtime", "Command listener stopped by user")
                 break
+            except Exception as exc:  # pylint: disable=broad-except
+                retry_count += 1
+                if retry_count >= max_retries:
+                    logger.error("Realtime", f"Max retries ({max_retries}) exceeded. Giving up.")
+                    if scheduler_task is not None:
+                        logger.warning("Realtime", "Continuing scheduled cycles without realtime commands")
+                        await scheduler_task
+                    break
+
+                backoff = min(base_retry_delay * (1.5 ** (retry_count - 1)), 60)
+                logger.warning(
+                    "Realtime",
+                    f"Listener connection failed (retry {retry_count}/{max_retries}, waiting {backoff:.0f}s): {exc}",
+                )
+                await asyncio.sleep(backoff)
+    finally:
+        if scheduler_task is not None:
+            scheduler_task.cancel()
+            await asyncio.gather(scheduler_task, return_exceptions=True)
+        await queue.shutdown()
 
-            backoff = min(base_retry_delay * (1.5 ** (retry_count - 1)), 60)
-            logger.warning(
-                "Realtime",
-                f"Listener connection failed (retry {retry_count}/{max_retries}, waiting {backoff:.0f}s): {exc}",
-            )
-            await asyncio.sleep(backoff)
-
-
-async def _listen_with_reconnect(system, settings, logger, channel_name: str) -> None:
-    client = await acreate_client(
-        settings.supabase_url,
-        settings.supabase_service_role_key,
-        options=AsyncClientOptions(
-            realtime={
-                "auto_reconnect": True,
-                "max_retries": 10,
-                "initial_backoff": 2.0,
-                "timeout": REALTIME_TIMEOUT_SECONDS,
-            }
-        ),
-    )
+
+async def _listen_with_reconnect(
+    system, realtime: RealtimeConnection, logger, channel_name: str, queue: CommandQueue, link: _ChannelLink
+) -> None:
+    client = await realtime.client()
     ready = asyncio.Event()
     channel_error: Optional[str] = None
     has_subscribed = False
 
     channel = client.channel(channel_name)
 
-    async def broadcast_device_state(status: str, is_running: bool) -> None:
-        try:
-            await channel.send_broadcast(
-                event="device_heartbeat",
-                data={
-                    "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
-                    "status": status,
-                    "is_running": is_running,
-                },
+    def on_start_reading(payload: dict[str, Any]) -> None:
+        data = _command_data(payload)
+        logger.info("Realtime", "Received start_reading command")
+        asyncio.create_task(
+            queue.submit(
+                "cycle",
+                system.run_async,
+                command="start_reading",
+                request_id=data.get("request_id"),
+                source=str(data.get("source") or "dashboard"),
+                priority=MANUAL_PRIORITY,
             )
-        except Exception as exc:  # pylint: disable=broad-except
-            logger.debug("Realtime", f"Device state broadcast failed: {exc}")
+        )
 
-    runner = FrequentCycleRunner(system, logger, on_state_change=broadcast_device_state)
+    def on_direct_command(command: str) -> Callable[[dict[str, Any]], None]:
+        def callback(payload: dict[str, Any]) -> None:
+            received_at = time.monotonic()
+            data = _command_data(payload)
+            logger.info("Realtime", f"Received {command} command")
+            asyncio.create_task(run_direct_command(system, link, logger, command, data, received_at))
 
-    def on_start_reading(payload: dict[str, Any]) -> None:
-        _ = payload
-        logger.info("Realtime", "Received start_reading command")
-        asyncio.create_task(runner.start())
+        return callback
 
     def on_subscribe(status: Any, err: Optional[Exception]) -> None:
         nonlocal channel_error, has_subscribed
@@ -158,6 +440,8 @@ async def _listen_with_reconnect(system, settings, logger, channel_name: str) ->
             ready.set()
 
     channel.on_broadcast("start_reading", on_start_reading)
+    for command in DIRECT_COMMANDS:
+        channel.on_broadcast(command, on_direct_command(command))
     await channel.subscribe(on_subscribe)
 
     await ready.wait()
@@ -165,25 +449,22 @@ async def _listen_with_reconnect(system, settings, logger, channel_name: str) ->
         raise RuntimeError(channel_error)
 
     logger.success("Realtime", f"Listening on channel '{channel_name}' for control commands")
-    await broadcast_device_state("live", False)
-
-    async def send_heartbeat_loop() -> None:
-        while True:
-            await broadcast_device_state("running" if runner.is_running else "live", runner.is_running)
-            await asyncio.sleep(20)
+    link.channel = channel
+    link.heartbeat.reset()
+    await link.device_state("running" if queue.is_running else "live", queue.is_running)
 
-    heartbeat_task = asyncio.create_task(send_heartbeat_loop())
+    heartbeat_task = asyncio.create_task(link.heartbeat.run())
 
     wait_forever = asyncio.Event()
     try:
         await wait_forever.wait()
     finally:
+        link.channel = None
         heartbeat_task.cancel()
         try:
             await asyncio.gather(heartbeat_task, return_exceptions=True)
         except asyncio.CancelledError:
             pass
-        await runner.shutdown()
         try:
             await client.remove_channel(channel)
         except Exception as exc:  # pylint: disable=broad-except
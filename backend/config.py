@@ -4,6 +4,9 @@ from typing import Optional
 
 from dotenv import load_dotenv
 
+# Rows written before devices were tracked carry this id (the column default in schema.sql).
+DEFAULT_DEVICE_ID = "default"
+
 
 @dataclass
 class Settings:
@@ -12,8 +15,12 @@ class Settings:
     supabase_url: str
     supabase_service_role_key: str
     supabase_storage_bucket: str
+    supabase_cold_storage_bucket: str
     supabase_command_channel: str
     mock: bool
+    device_id: str = DEFAULT_DEVICE_ID
+    # Overrides the Gemini API endpoint (e.g. http://127.0.0.1:8085 for the local stand-in)
+    gemini_base_url: str = ""
 
 
 def _to_bool(value: Optional[str]) -> bool:
@@ -22,6 +29,13 @@ def _to_bool(value: Optional[str]) -> bool:
     return value.strip().lower() in {"1", "true", "yes", "on"}
 
 
+def device_channel(base: str, device_id: str) -> str:
+    """Command channel for one device; the default device keeps the bare base name."""
+    if not device_id or device_id == DEFAULT_DEVICE_ID:
+        return base
+    return f"{base}:{device_id}"
+
+
 def load_settings(mock_override: Optional[bool] = None) -> Settings:
     load_dotenv()
     env_mock = _to_bool(os.environ.get("MOCK"))
@@ -33,6 +47,9 @@ def load_settings(mock_override: Optional[bool] = None) -> Settings:
         supabase_url=os.environ.get("SUPABASE_URL", ""),
         supabase_service_role_key=os.environ.get("SUPABASE_SERVICE_ROLE_KEY", ""),
         supabase_storage_bucket=os.environ.get("SUPABASE_STORAGE_BUCKET", "plant-images"),
+        supabase_cold_storage_bucket=os.environ.get("SUPABASE_COLD_STORAGE_BUCKET", "plant-images-cold"),
         supabase_command_channel=os.environ.get("SUPABASE_COMMAND_CHANNEL", "plant-control"),
         mock=mock_value,
+        device_id=os.environ.get("DEVICE_ID", "").strip() or DEFAULT_DEVICE_ID,
+        gemini_base_url=os.environ.get("GEMINI_BASE_URL", "").strip(),
     )
@@ -1,3 +1,4 @@
+import asyncio
 from abc import ABC, abstractmethod
 from typing import Any, List, Mapping, Optional, Tuple
 
@@ -54,11 +55,38 @@ class BaseStorageService(ABC):
         raise NotImplementedError
 
     @abstractmethod
-    def log_cycle(self, payload: Mapping[str, Any]) -> None:
+    def log_cycle(self, payload: Mapping[str, Any]) -> Optional[str]:
+        """Store one cycle and return its id."""
         raise NotImplementedError
 
+    def upload_profile(self, path: str) -> Optional[str]:
+        """Upload a cycle profile and return its URL; services without a bucket keep it local."""
+        _ = path
+        return None
+
+    def log_timings(self, record: Mapping[str, Any]) -> None:
+        """Store one cycle's stage timings; services without a timings table drop them."""
+        _ = record
+
+    # Async variants default to the blocking call on a worker thread; services
+    # with native async clients override them.
+    async def upload_image_async(self, path: str) -> str:
+        return await asyncio.to_thread(self.upload_image, path)
+
+    async def log_cycle_async(self, payload: Mapping[str, Any]) -> Optional[str]:
+        return await asyncio.to_thread(self.log_cycle, payload)
+
+    async def upload_profile_async(self, path: str) -> Optional[str]:
+        return await asyncio.to_thread(self.upload_profile, path)
+
+    async def log_timings_async(self, record: Mapping[str, Any]) -> None:
+        await asyncio.to_thread(self.log_timings, record)
+
 
 class BasePlantAI(ABC):
     @abstractmethod
     def analyze(self, temp: Any, humidity: Any, light: str, soil_summary: str):
         raise NotImplementedError
+
+    async def analyze_async(self, temp: Any, humidity: Any, light: str, soil_summary: str):
+        return await asyncio.to_thread(self.analyze, temp, humidity, light, soil_summary)
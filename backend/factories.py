@@ -1,42 +1,122 @@
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
 from backend.config import Settings
-from backend.services.ai_service import create_ai_service
+from backend.startup import timed_build
+from backend.services.ai_service import create_ai_service, create_genai_client
 from backend.services.camera_service import create_camera_service
 from backend.services.gpio_service import create_gpio_manager
 from backend.services.sensor_service import create_sensor_manager
 from backend.services.supabase_service import create_supabase_service
 
 
-def build_services(args, settings: Settings, logger):
+def build_shared_clients(settings: Settings, logger) -> Dict[str, Any]:
+    """Build the station-independent clients once so several stations can share them."""
     force_mock = bool(settings.mock)
+    ai_client = None
+    if not force_mock and settings.gemini_api_key:
+        ai_client = create_genai_client(settings)
+
+    return {
+        "storage": create_supabase_service(is_mock=force_mock, settings=settings, logger=logger),
+        "ai_client": ai_client,
+    }
 
-    gpio = create_gpio_manager(
-        is_mock=force_mock,
-        ldr_pin=args.ldr_pin,
-        soil_pins=args.soil_pins,
-        fan_pin=args.fan_pin,
-        pump_pin=args.pump_pin,
-        logger=logger,
-    )
-
-    sensors = create_sensor_manager(
-        is_mock=force_mock,
-        dht_pins=args.dht_pins,
-        ldr_pin=args.ldr_pin,
-        soil_pins=args.soil_pins,
-        gpio=gpio,
-        logger=logger,
-    )
-
-    # Camera, Supabase, and AI self-select real/mock based on platform and credentials.
-    # force_mock=True only when --mock is explicitly passed (e.g. CI / no hardware at all).
-    camera = create_camera_service(is_mock=force_mock, image_path=settings.image_path, logger=logger)
-    storage = create_supabase_service(is_mock=force_mock, settings=settings, logger=logger)
-    ai = create_ai_service(is_mock=force_mock, settings=settings, image_path=settings.image_path, logger=logger)
 
+def _service_builders(args, settings: Settings, logger, shared: Dict[str, Any], get: Callable[[str], Any]):
+    """name -> (dependencies, build). `build` receives already-built dependencies via `get`."""
+    force_mock = bool(settings.mock)
     return {
-        "gpio": gpio,
-        "sensors": sensors,
-        "camera": camera,
-        "storage": storage,
-        "ai": ai,
+        "gpio": (
+            (),
+            lambda: create_gpio_manager(
+                is_mock=force_mock,
+                ldr_pin=args.ldr_pin,
+                soil_pins=args.soil_pins,
+                fan_pin=args.fan_pin,
+                pump_pin=args.pump_pin,
+                logger=logger,
+            ),
+        ),
+        "sensors": (
+            ("gpio",),
+            lambda: create_sensor_manager(
+                is_mock=force_mock,
+                dht_pins=args.dht_pins,
+                ldr_pin=args.ldr_pin,
+                soil_pins=args.soil_pins,
+                gpio=get("gpio"),
+                logger=logger,
+            ),
+        ),
+        # Camera, Supabase, and AI self-select real/mock based on platform and credentials.
+        # force_mock=True only when --mock is explicitly passed (e.g. CI / no hardware at all).
+        "camera": (
+            (),
+            lambda: create_camera_service(
+                is_mock=force_mock,
+                image_path=settings.image_path,
+                logger=logger,
+                device_index=args.camera_index,
+            ),
+        ),
+        "storage": (
+            (),
+            lambda: shared.get("storage") or create_supabase_service(is_mock=force_mock, settings=settings, logger=logger),
+        ),
+        "ai": (
+            (),
+            lambda: create_ai_service(
+                is_mock=force_mock,
+                settings=settings,
+                image_path=settings.image_path,
+                logger=logger,
+                client=shared.get("ai_client"),
+            ),
+        ),
     }
+
+
+class LazyServices:
+    """A station's services, each built on first use (or by `warm`) exactly once.
+
+    Builds are thread-safe: a service requested while a warm-up thread is
+    still building it waits for that build instead of starting another.
+    """
+
+    def __init__(self, args, settings: Settings, logger, shared: Optional[Dict[str, Any]] = None):
+        self.log = logger
+        self._builders: Dict[str, Tuple[Tuple[str, ...], Callable[[], Any]]] = _service_builders(
+            args, settings, logger, shared or {}, self.get
+        )
+        self._built: Dict[str, Any] = {}
+        self._locks = {name: threading.Lock() for name in self._builders}
+
+    def get(self, name: str) -> Any:
+        try:
+            return self._built[name]
+        except KeyError:
+            pass
+        dependencies, build = self._builders[name]
+        for dependency in dependencies:
+            self.get(dependency)
+        with self._locks[name]:
+            if name not in self._built:
+                self._built[name] = timed_build(name, build)
+        return self._built[name]
+
+    def built(self, name: str) -> bool:
+        return name in self._built
+
+    def _warm_one(self, name: str) -> None:
+        try:
+            self.get(name)
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            # First use raises the same error again where it can be handled
+            self.log.warning("Startup", f"Background build of {name} failed: {exc}")
+
+    def warm(self, names: Iterable[str]) -> None:
+        """Build `names` in parallel daemon threads so first use finds them ready."""
+        for name in names:
+            threading.Thread(target=self._warm_one, args=(name,), name=f"warm-{name}", daemon=True).start()
+
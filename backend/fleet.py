@@ -0,0 +1,287 @@
+"""Run several plant stations from one process.
+
+A fleet config (TOML, or YAML when PyYAML is installed) lists stations, each
+with its own pins, camera and device id. Every station gets its own
+`SmartPlantSystem` and hardware worker, while the Supabase and Gemini clients
+are built once and shared. All stations run concurrently on one asyncio loop,
+each with its own command channel (all on one realtime connection) and schedule.
+Shared services label their metrics with the device id of the cycle they serve.
+
+    command_channel = "plant-control"   # optional, stations default to "<base>:<device_id>"
+
+    [defaults]
+    pump_duration = 2
+    interval = "15m"
+
+    [[stations]]
+    name = "bench-a"
+    dht_pins = [4]
+    ldr_pin = 20
+    soil_pins = [5, 6]
+    fan_pin = 27
+    pump_pin = 17
+    camera_index = 0
+"""
+
+import argparse
+import asyncio
+import dataclasses
+import datetime
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from backend.command_listener import RealtimeConnection, listen_for_control_commands
+from backend.config import Settings, device_channel
+from backend.factories import build_shared_clients
+from backend.logger import StationLogger
+from backend.scheduler import CycleScheduler, parse_duration, parse_quiet_hours
+from backend.system import SmartPlantSystem
+
+STATION_KEYS = {
+    "name",
+    "device_id",
+    "dht_pins",
+    "ldr_pin",
+    "soil_pins",
+    "fan_pin",
+    "pump_pin",
+    "pump_duration",
+    "camera_index",
+    "image_path",
+    "command_channel",
+    "interval",
+    "jitter",
+    "quiet_hours",
+    "max_runtime",
+}
+
+
+@dataclasses.dataclass
+class StationConfig:
+    name: str
+    device_id: str
+    dht_pins: List[int]
+    ldr_pin: int
+    soil_pins: List[int]
+    fan_pin: int
+    pump_pin: int
+    pump_duration: int
+    camera_index: Optional[int]
+    image_path: str
+    command_channel: str
+    interval: Optional[float]
+    jitter: float
+    quiet_hours: Optional[Tuple[datetime.time, datetime.time]]
+    max_runtime: Optional[float]
+
+    @property
+    def pins(self) -> List[int]:
+        return [*self.dht_pins, self.ldr_pin, *self.soil_pins, self.fan_pin, self.pump_pin]
+
+
+def _read_config(path: Path) -> Mapping[str, Any]:
+    if path.suffix.lower() in (".yaml", ".yml"):
+        try:
+            import yaml  # pylint: disable=import-error
+        except ImportError:
+            raise ValueError("YAML fleet configs need PyYAML (pip install pyyaml); or use TOML") from None
+        with path.open("r", encoding="utf-8") as config_file:
+            data = yaml.safe_load(config_file) or {}
+    else:
+        try:
+            import tomllib
+        except ImportError:  # Python 3.10
+            try:
+                import tomli as tomllib  # pylint: disable=import-error
+            except ImportError:
+                raise ValueError("TOML fleet configs need Python 3.11+ or tomli (pip install tomli)") from None
+
+        with path.open("rb") as config_file:
+            data = tomllib.load(config_file)
+    if not isinstance(data, Mapping):
+        raise ValueError(f"{path}: expected a mapping at the top level")
+    return data
+
+
+def _duration(value: Any, field: str, station: str) -> Optional[float]:
+    if value is None:
+        return None
+    try:
+        return parse_duration(str(value))
+    except argparse.ArgumentTypeError as exc:
+        raise ValueError(f"Station '{station}': {field}: {exc}") from None
+
+
+def _station(raw: Mapping[str, Any], args, settings: Settings, base_channel: str) -> StationConfig:
+    name = str(raw.get("name") or "").strip()
+    if not name:
+        raise ValueError("Every station needs a name")
+    unknown = set(raw) - STATION_KEYS
+    if unknown:
+        raise ValueError(f"Station '{name}': unknown keys {sorted(unknown)}")
+
+    device_id = str(raw.get("device_id") or name)
+    stem, suffix = os.path.splitext(settings.image_path)
+    quiet_hours = raw.get("quiet_hours")
+    if quiet_hours is not None:
+        try:
+            quiet_hours = parse_quiet_hours(str(quiet_hours))
+        except argparse.ArgumentTypeError as exc:
+            raise ValueError(f"Station '{name}': quiet_hours: {exc}") from None
+    else:
+        quiet_hours = args.quiet_hours
+
+    interval = _duration(raw.get("interval"), "interval", name)
+    jitter = _duration(raw.get("jitter"), "jitter", name)
+    max_runtime = _duration(raw.get("max_runtime"), "max_runtime", name)
+    interval = interval if interval is not None else args.interval
+    jitter = jitter if jitter is not None else args.jitter
+    if interval is not None and interval <= 0:
+        raise ValueError(f"Station '{name}': interval must be greater than 0")
+    if interval and jitter >= interval:
+        raise ValueError(f"Station '{name}': jitter must be smaller than the interval")
+    camera_index = raw.get("camera_index", args.camera_index)
+
+    return StationConfig(
+        name=name,
+        device_id=device_id,
+        dht_pins=[int(pin) for pin in raw.get("dht_pins", args.dht_pins)],
+        ldr_pin=int(raw.get("ldr_pin", args.ldr_pin)),
+        soil_pins=[int(pin) for pin in raw.get("soil_pins", args.soil_pins)],
+        fan_pin=int(raw.get("fan_pin", args.fan_pin)),
+        pump_pin=int(raw.get("pump_pin", args.pump_pin)),
+        pump_duration=int(raw.get("pump_duration", args.pump_duration)),
+        camera_index=None if camera_index is None else int(camera_index),
+        image_path=str(raw.get("image_path") or f"{stem}_{device_id}{suffix}"),
+        command_channel=str(raw.get("command_channel") or device_channel(base_channel, device_id)),
+        interval=interval,
+        jitter=jitter,
+        quiet_hours=quiet_hours,
+        max_runtime=max_runtime if max_runtime is not None else args.max_runtime,
+    )
+
+
+def _check_conflicts(stations: List[StationConfig]) -> None:
+    seen: Dict[Tuple[str, Any], str] = {}
+    for station in stations:
+        claims = [("name", station.name), ("device id", station.device_id), ("image path", station.image_path)]
+        claims += [("pin", pin) for pin in set(station.pins)]
+        if station.camera_index is not None:
+            claims.append(("camera index", station.camera_index))
+        for kind, value in claims:
+            owner = seen.setdefault((kind, value), station.name)
+            if owner != station.name:
+                raise ValueError(f"Stations '{owner}' and '{station.name}' both use {kind} {value}")
+
+
+def load_fleet_config(path: str, args, settings: Settings) -> List[StationConfig]:
+    """Parse a fleet config; values missing from a station fall back to [defaults], then the CLI."""
+    config_path = Path(path)
+    data = _read_config(config_path)
+    defaults = data.get("defaults") or {}
+    stations_raw = data.get("stations") or []
+    if not isinstance(stations_raw, list) or not stations_raw:
+        raise ValueError(f"{config_path}: no [[stations]] defined")
+
+    base_channel = str(data.get("command_channel") or args.command_channel or settings.supabase_command_channel)
+    stations = [_station({**defaults, **raw}, args, settings, base_channel) for raw in stations_raw]
+    _check_conflicts(stations)
+    return stations
+
+
+def station_args(args, station: StationConfig) -> argparse.Namespace:
+    """Copy the CLI namespace with one station's overrides applied."""
+    values = vars(args).copy()
+    values.update(
+        dht_pins=station.dht_pins,
+        ldr_pin=station.ldr_pin,
+        soil_pins=station.soil_pins,
+        fan_pin=station.fan_pin,
+        pump_pin=station.pump_pin,
+        pump_duration=station.pump_duration,
+        camera_index=station.camera_index,
+        command_channel=station.command_channel,
+        interval=station.interval,
+        jitter=station.jitter,
+        quiet_hours=station.quiet_hours,
+        max_runtime=station.max_runtime,
+    )
+    return argparse.Namespace(**values)
+
+
+async def _run_station(
+    system: SmartPlantSystem, station: StationConfig, settings: Settings, logger, realtime: Optional[RealtimeConnection]
+) -> None:
+    scheduler = None
+    if station.interval:
+        scheduler = CycleScheduler(
+            logger, interval=station.interval, jitter=station.jitter, quiet_hours=station.quiet_hours
+        )
+
+    if realtime is not None:
+        await listen_for_control_commands(
+            system=system,
+            settings=settings,
+            logger=logger,
+            channel_name=station.command_channel,
+            scheduler=scheduler,
+            realtime=realtime,
+        )
+    elif scheduler is not None:
+        await scheduler.run(system.run_async)
+    else:
+        await system.run_async()
+
+
+async def run_fleet_async(args, settings: Settings, logger) -> None:
+    try:
+        stations = load_fleet_config(args.fleet, args, settings)
+    except (OSError, ValueError) as exc:
+        logger.error("Fleet", f"Invalid fleet config: {exc}")
+        return
+
+    listen = bool(args.listen_commands)
+    if listen and settings.mock:
+        logger.warning("Realtime", "Command listener requires real Supabase mode. Running without it in mock mode.")
+        listen = False
+    elif listen and (not settings.supabase_url or not settings.supabase_service_role_key):
+        logger.warning("Realtime", "Supabase credentials missing. Running without the command listener.")
+        listen = False
+
+    shared = build_shared_clients(settings, logger)
+    # Every station subscribes its own channel on one realtime socket
+    realtime = RealtimeConnection(settings) if listen else None
+    runs = []
+    for station in stations:
+        station_log = StationLogger(logger, station.name)
+        station_settings = dataclasses.replace(settings, image_path=station.image_path, device_id=station.device_id)
+        system = SmartPlantSystem(
+            args=station_args(args, station),
+            settings=station_settings,
+            logger=station_log,
+            shared=shared,
+        )
+        logger.info(
+            "Fleet",
+            (
+                f"{station.name}: device={station.device_id} pins={station.pins} "
+                f"camera={'auto' if station.camera_index is None else station.camera_index} "
+                f"channel={station.command_channel if listen else '-'}"
+            ),
+        )
+        runs.append(_run_station(system, station, station_settings, station_log, realtime))
+
+    logger.success("Fleet", f"Starting {len(runs)} station(s)")
+    # One station failing must not stop the others.
+    results = await asyncio.gather(*runs, return_exceptions=True)
+    for station, result in zip(stations, results):
+        if isinstance(result, BaseException) and not isinstance(result, asyncio.CancelledError):
+            logger.error("Fleet", f"{station.name}: stopped with error: {result}")
+
+
+def run_fleet(args, settings: Settings, logger) -> None:
+    try:
+        asyncio.run(run_fleet_async(args, settings, logger))
+    except KeyboardInterrupt:
+        logger.info("Fleet", "Fleet stopped by user")
@@ -0,0 +1,400 @@
+"""Columnar export of cycle history to Parquet or Arrow IPC files.
+
+Each cycle becomes one row of the `cycles` dataset, with its sensor, AI and
+actuator rows joined in and the per-pin readings as typed list columns. AI
+todos are flattened into a separate `todos` dataset with one row per todo.
+Both datasets are partitioned by month (`cycles/month=2026-03/part-00000.parquet`)
+so they can be read with `pyarrow.dataset`, pandas, DuckDB or Polars.
+"""
+
+import datetime
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+from backend.config import DEFAULT_DEVICE_ID
+from backend.rollups import action_labels
+from backend.sensor_codec import decode_dht, decode_soil
+
+EXPORT_FORMATS = ("parquet", "arrow")
+FILE_SUFFIXES = {"parquet": ".parquet", "arrow": ".arrow"}
+DEFAULT_ROWS_PER_FILE = 50_000
+CHILD_TABLES = ("sensor_readings", "ai_analyses", "actuator_actions")
+# Child rows are matched to their cycle within this distance of its captured_at
+JOIN_WINDOW = datetime.timedelta(hours=1)
+
+
+def _timestamp(value: Any) -> Optional[datetime.datetime]:
+    if not value:
+        return None
+    if isinstance(value, datetime.datetime):
+        ts = value
+    else:
+        ts = datetime.datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=datetime.timezone.utc)
+    return ts.astimezone(datetime.timezone.utc)
+
+
+def _cycle_schema(pa):
+    return pa.schema(
+        [
+            ("cycle_id", pa.string()),
+            ("captured_at", pa.timestamp("us", tz="UTC")),
+            ("device_id", pa.string()),
+            ("image_url", pa.string()),
+            ("temp_c", pa.float64()),
+            ("humidity_pct", pa.float64()),
+            ("light_state", pa.string()),
+            ("soil_summary", pa.string()),
+            ("soil_majority", pa.string()),
+            ("soil_wetness_pct", pa.float64()),
+            ("temp_readings", pa.list_(pa.float64())),
+            ("hum_readings", pa.list_(pa.float64())),
+            ("soil_readings", pa.list_(pa.string())),
+            ("plant", pa.string()),
+            ("disease", pa.string()),
+            ("confidence", pa.float64()),
+            ("water_plant", pa.bool_()),
+            ("increase_airflow", pa.bool_()),
+            ("reduce_temperature", pa.bool_()),
+            ("todo_count", pa.int32()),
+            ("actions", pa.string()),
+            ("action_labels", pa.list_(pa.string())),
+        ]
+    )
+
+
+def _todo_schema(pa):
+    return pa.schema(
+        [
+            ("cycle_id", pa.string()),
+            ("captured_at", pa.timestamp("us", tz="UTC")),
+            ("position", pa.int16()),
+            ("action", pa.string()),
+            ("priority", pa.string()),
+            ("reason", pa.string()),
+        ]
+    )
+
+
+def sensor_lists(sensor: Mapping[str, Any]) -> Tuple[Optional[list], Optional[list], Optional[list]]:
+    """Per-pin readings from either the legacy array columns or the compact encodings."""
+    temps = sensor.get("temp_readings")
+    if temps is None:
+        temps = decode_dht(sensor.get("temp_x10"))
+    hums = sensor.get("hum_readings")
+    if hums is None:
+        hums = decode_dht(sensor.get("hum_x10"))
+    soils = sensor.get("soil_readings")
+    if soils is None:
+        soils = decode_soil(sensor.get("soil_mask"), sensor.get("soil_pin_count"))
+    return temps, hums, soils
+
+
+def flatten_cycle(
+    cycle: Mapping[str, Any],
+    sensor: Optional[Mapping[str, Any]],
+    analysis: Optional[Mapping[str, Any]],
+    action: Optional[Mapping[str, Any]],
+) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """Return the `cycles` row and the `todos` rows for one joined cycle."""
+    sensor = sensor or {}
+    analysis = analysis or {}
+    action = action or {}
+    captured_at = _timestamp(cycle.get("captured_at"))
+    temps, hums, soils = sensor_lists(sensor)
+    recommendation = analysis.get("recommendation") or {}
+    todos = [todo for todo in analysis.get("todos") or [] if isinstance(todo, Mapping)]
+    actions = action.get("actions")
+
+    row = {
+        "cycle_id": cycle.get("id"),
+        "captured_at": captured_at,
+        "device_id": cycle.get("device_id") or DEFAULT_DEVICE_ID,
+        "image_url": cycle.get("image_url"),
+        "temp_c": sensor.get("temp_c"),
+        "humidity_pct": sensor.get("humidity_pct"),
+        "light_state": sensor.get("light_state"),
+        "soil_summary": sensor.get("soil_summary"),
+        "soil_majority": sensor.get("soil_majority"),
+        "soil_wetness_pct": sensor.get("soil_wetness_pct"),
+        "temp_readings": temps,
+        "hum_readings": hums,
+        "soil_readings": soils,
+        "plant": analysis.get("plant"),
+        "disease": analysis.get("disease"),
+        "confidence": analysis.get("confidence"),
+        "water_plant": recommendation.get("water_plant"),
+        "increase_airflow": recommendation.get("increase_airflow"),
+        "reduce_temperature": recommendation.get("reduce_temperature"),
+        "todo_count": len(todos),
+        "actions": actions,
+        "action_labels": action_labels(actions) if action else None,
+    }
+    todo_rows = [
+        {
+            "cycle_id": cycle.get("id"),
+            "captured_at": captured_at,
+            "position": position,
+            "action": todo.get("action"),
+            "priority": todo.get("priority"),
+            "reason": todo.get("reason"),
+        }
+        for position, todo in enumerate(todos)
+    ]
+    return row, todo_rows
+
+
+@dataclass
+class JoinStats:
+    """Rows join_cycle_rows could not pair up, per child table."""
+
+    # Cycles that got no row from this table
+    unmatched_cycles: Dict[str, int] = field(default_factory=Counter)
+    # Child rows whose cycle never came: evicted from the window or left over at the end
+    orphaned_rows: Dict[str, int] = field(default_factory=Counter)
+    # Times a stream's captured_at went backwards; rows out of order by more
+    # than the window can miss their cycle
+    backwards: Dict[str, int] = field(default_factory=Counter)
+
+
+class _ChildStream:
+    """Look up child rows by cycle_id while reading their (roughly time-ordered) stream lazily."""
+
+    def __init__(
+        self,
+        table: str,
+        rows: Iterable[Mapping[str, Any]],
+        window: datetime.timedelta,
+        stats: JoinStats,
+        on_warning: Optional[Callable[[str], None]] = None,
+    ):
+        self._table = table
+        self._rows = iter(rows)
+        self._window = window
+        self._stats = stats
+        self._on_warning = on_warning
+        self._buffer: Dict[Any, Mapping[str, Any]] = {}
+        self._high: Optional[datetime.datetime] = None
+        self._last: Optional[datetime.datetime] = None
+        self._exhausted = False
+
+    def _read(self) -> bool:
+        row = next(self._rows, None)
+        if row is None:
+            self._exhausted = True
+            return False
+        self._buffer[row.get("cycle_id")] = row
+        row_ts = _timestamp(row.get("captured_at"))
+        if row_ts is not None:
+            if self._last is not None and row_ts < self._last:
+                if not self._stats.backwards[self._table] and self._on_warning:
+                    self._on_warning(
+                        f"{self._table} captured_at goes backwards ({self._last.isoformat()} -> "
+                        f"{row_ts.isoformat()}); rows more than {self._window} out of order won't be joined"
+                    )
+                self._stats.backwards[self._table] += 1
+            self._last = row_ts
+            if self._high is None or row_ts > self._high:
+                self._high = row_ts
+        return True
+
+    def take(self, cycle_id: Any, captured_at: Optional[datetime.datetime]) -> Optional[Mapping[str, Any]]:
+        while cycle_id not in self._buffer and not self._exhausted:
+            # Stop once the stream has moved past this cycle; a missing child shouldn't drain it
+            if captured_at is not None and self._high is not None and self._high > captured_at + self._window:
+                break
+            if not self._read():
+                break
+        row = self._buffer.pop(cycle_id, None)
+        if row is None:
+            self._stats.unmatched_cycles[self._table] += 1
+        return row
+
+    def evict_before(self, cutoff: datetime.datetime) -> None:
+        # Orphans (rows whose cycle was never seen) would otherwise accumulate
+        stale = [
+            key
+            for key, row in self._buffer.items()
+            if (_timestamp(row.get("captured_at")) or cutoff) < cutoff
+        ]
+        for key in stale:
+            del self._buffer[key]
+        self._stats.orphaned_rows[self._table] += len(stale)
+
+    def finish(self) -> None:
+        """Count the rows no cycle claimed, including any the join never had to read."""
+        while self._read():
+            pass
+        self._stats.orphaned_rows[self._table] += len(self._buffer)
+        self._buffer.clear()
+
+
+def join_cycle_rows(
+    cycles: Iterable[Mapping[str, Any]],
+    sensors: Iterable[Mapping[str, Any]],
+    analyses: Iterable[Mapping[str, Any]],
+    actions: Iterable[Mapping[str, Any]],
+    window: datetime.timedelta = JOIN_WINDOW,
+    stats: Optional[JoinStats] = None,
+    on_warning: Optional[Callable[[str], None]] = None,
+) -> Iterator[Tuple[Mapping[str, Any], Any, Any, Any]]:
+    """Join per-table streams (as stored in backups) into (cycle, sensor, analysis, action) tuples.
+
+    Streams are expected in roughly the same time order, as backups and mock
+    NDJSON files are; only rows within `window` of the current cycle are held
+    in memory. Child rows without `captured_at` (pre-partitioning backups) are
+    kept until their cycle arrives. Pass `stats` to get the rows that could not
+    be paired up once the join is exhausted, and `on_warning` to hear the first
+    time each stream's captured_at goes backwards.
+    """
+    stats = stats if stats is not None else JoinStats()
+    streams = [
+        _ChildStream(table, rows, window, stats, on_warning)
+        for table, rows in zip(CHILD_TABLES, (sensors, analyses, actions))
+    ]
+    for index, cycle in enumerate(cycles):
+        captured_at = _timestamp(cycle.get("captured_at"))
+        yield (cycle, *(stream.take(cycle.get("id"), captured_at) for stream in streams))
+        if captured_at is not None and index % 1000 == 999:
+            for stream in streams:
+                stream.evict_before(captured_at - window)
+    for stream in streams:
+        stream.finish()
+
+
+def format_join_stats(stats: JoinStats, unmatched: bool = True, orphans: bool = True) -> List[str]:
+    """Report lines for a join, empty when every row found its partner."""
+    lines = []
+    sections = [
+        (unmatched, "Cycles without a row in", stats.unmatched_cycles),
+        (orphans, "Rows without their cycle in", stats.orphaned_rows),
+        (True, "Times captured_at went backwards in", stats.backwards),
+    ]
+    for enabled, label, counts in sections:
+        if not enabled:
+            continue
+        for table in CHILD_TABLES:
+            if counts.get(table):
+                lines.append(f"⚠️  {label} {table}: {counts[table]}")
+    return lines
+
+
+def _first(value: Any) -> Optional[Mapping[str, Any]]:
+    if isinstance(value, list):
+        return value[0] if value else None
+    return value
+
+
+def split_embedded_cycle(row: Mapping[str, Any]) -> Tuple[Mapping[str, Any], Any, Any, Any]:
+    """Split a plant_cycles row with embedded children (a PostgREST select) into a join tuple."""
+    return (
+        row,
+        _first(row.get("sensor_readings")),
+        _first(row.get("ai_analyses")),
+        _first(row.get("actuator_actions")),
+    )
+
+
+class PartitionedWriter:
+    """Buffer rows per month and write them as numbered part files under `<root>/month=YYYY-MM/`."""
+
+    def __init__(self, root: Path, schema, fmt: str, rows_per_file: int):
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format: {fmt}")
+        self.root = Path(root)
+        self.schema = schema
+        self.fmt = fmt
+        self.rows_per_file = rows_per_file
+        self.rows_written = 0
+        self.files_written = 0
+        self.bytes_written = 0
+        self._buffers: Dict[str, List[Dict[str, Any]]] = {}
+        self._parts: Dict[str, int] = {}
+        self._buffered = 0
+
+    def write(self, row: Dict[str, Any]) -> None:
+        captured_at = row.get("captured_at")
+        month = captured_at.strftime("%Y-%m") if captured_at else "unknown"
+        buffer = self._buffers.setdefault(month, [])
+        buffer.append(row)
+        self._buffered += 1
+        if len(buffer) >= self.rows_per_file:
+            self._flush(month)
+        elif self._buffered >= self.rows_per_file * 2:
+            # Many months open at once (unordered input); keep memory bounded anyway
+            for key in list(self._buffers):
+                self._flush(key)
+
+    def close(self) -> None:
+        for month in list(self._buffers):
+            self._flush(month)
+
+    def _flush(self, month: str) -> None:
+        rows = self._buffers.pop(month, None)
+        if not rows:
+            return
+        import pyarrow as pa  # pylint: disable=import-error
+
+        part = self._parts.get(month, 0)
+        self._parts[month] = part + 1
+        directory = self.root / f"month={month}"
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"part-{part:05d}{FILE_SUFFIXES[self.fmt]}"
+
+        table = pa.Table.from_pylist(rows, schema=self.schema)
+        if self.fmt == "parquet":
+            import pyarrow.parquet as pq  # pylint: disable=import-error
+
+            pq.write_table(table, path, compression="zstd")
+        else:
+            import pyarrow.feather as feather  # pylint: disable=import-error
+
+            feather.write_feather(table, path, compression="zstd")
+
+        self._buffered -= len(rows)
+        self.rows_written += len(rows)
+        self.files_written += 1
+        self.bytes_written += path.stat().st_size
+
+
+@dataclass
+class ExportReport:
+    cycles: int = 0
+    todos: int = 0
+    files: int = 0
+    bytes_written: int = 0
+
+
+def export_history(
+    joined: Iterable[Tuple[Mapping[str, Any], Any, Any, Any]],
+    out_dir: Path,
+    fmt: str = "parquet",
+    rows_per_file: int = DEFAULT_ROWS_PER_FILE,
+) -> ExportReport:
+    """Write joined cycles to `<out_dir>/cycles/` and `<out_dir>/todos/` as month-partitioned files."""
+    import pyarrow as pa  # pylint: disable=import-error
+
+    out_dir = Path(out_dir)
+    for name in ("cycles", "todos"):
+        if (out_dir / name).exists():
+            raise FileExistsError(f"{out_dir / name} already exists")
+
+    cycles = PartitionedWriter(out_dir / "cycles", _cycle_schema(pa), fmt, rows_per_file)
+    todos = PartitionedWriter(out_dir / "todos", _todo_schema(pa), fmt, rows_per_file)
+    for cycle, sensor, analysis, action in joined:
+        row, todo_rows = flatten_cycle(cycle, sensor, analysis, action)
+        cycles.write(row)
+        for todo in todo_rows:
+            todos.write(todo)
+    cycles.close()
+    todos.close()
+
+    return ExportReport(
+        cycles=cycles.rows_written,
+        todos=todos.rows_written,
+        files=cycles.files_written + todos.files_written,
+        bytes_written=cycles.bytes_written + todos.bytes_written,
+    )
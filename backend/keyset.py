@@ -0,0 +1,15 @@
+"""Keyset pagination for PostgREST queries.
+
+Pages are ordered by (column, id) and each next page starts strictly after the
+last row seen, so rows sharing a timestamp across a page boundary are neither
+skipped nor repeated, and rows updated out of the filter don't shift the pages.
+"""
+
+
+def keyset_after(query, watermark, column="created_at"):
+    """Restrict `query` to rows strictly after (column, id) = watermark."""
+    if not watermark:
+        return query
+    value = watermark[column]
+    row_id = watermark["id"]
+    return query.or_(f'{column}.gt."{value}",and({column}.eq."{value}",id.gt."{row_id}")')
@@ -1,4 +1,82 @@
+"""Leveled console logger with optional JSON-lines output.
+
+Log calls only enqueue a record; a background thread formats it and does the
+I/O, so a slow terminal or disk never stalls the event loop. Messages below
+the configured level are dropped before any formatting, except DEBUG lines,
+which are kept in a small ring buffer and written out (oldest first) just
+before the next ERROR so failures come with their context. Each record
+carries the trace id current when it was logged (see `backend.tracing`).
+"""
+
+import atexit
 import datetime
+import json
+import os
+import queue
+import sys
+import threading
+from collections import deque
+from typing import Any, Deque, Optional, TextIO, Tuple
+
+from backend.tracing import current_trace_id
+
+LEVELS = {"DEBUG": 10, "INFO": 20, "SUCCESS": 25, "WARNING": 30, "ERROR": 40}
+DEFAULT_DEBUG_RING = 200
+DEFAULT_LOG_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_LOG_BACKUPS = 5
+
+# (kind, timestamp, level, module, message, trace id); kind is "log", "ring" or "section"
+_Record = Tuple[str, datetime.datetime, str, str, str, Optional[str]]
+
+
+class _RotatingJSONLines:
+    """Append JSON lines to a file, rotating to path.1 .. path.N at max_bytes."""
+
+    def __init__(self, path: str, max_bytes: int, backups: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._file: Optional[TextIO] = None
+        self._size = 0
+
+    def _open(self) -> TextIO:
+        if self._file is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")  # pylint: disable=consider-using-with
+            self._size = self._file.tell()
+        return self._file
+
+    def _rotate(self) -> None:
+        self.close()
+        for index in range(self.backups - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+    def write(self, record: dict) -> None:
+        line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+        # max_bytes is a file size; non-ASCII text takes more bytes than characters
+        size = len(line.encode("utf-8"))
+        if self.max_bytes and self._size and self._size + size > self.max_bytes:
+            self._rotate()
+        handle = self._open()
+        handle.write(line)
+        self._size += size
+
+    def flush(self) -> None:
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
 
 
 class Logger:
@@ -16,15 +94,129 @@ class Logger:
         "DEBUG": ("\033[2m", "DEBUG  "),
     }
 
+    def __init__(self):
+        self._min_level = LEVELS["DEBUG"]
+        self._console = True
+        self._json: Optional[_RotatingJSONLines] = None
+        self._ring: Optional[Deque[_Record]] = None
+        self._ring_size = DEFAULT_DEBUG_RING
+        self._queue: "queue.SimpleQueue[Optional[_Record]]" = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._closing_registered = False
+
+    def configure(
+        self,
+        level: str = "DEBUG",
+        json_path: Optional[str] = None,
+        console: bool = True,
+        max_bytes: int = DEFAULT_LOG_MAX_BYTES,
+        backups: int = DEFAULT_LOG_BACKUPS,
+        debug_ring: int = DEFAULT_DEBUG_RING,
+    ) -> None:
+        """Set the minimum level and outputs; call before the first message."""
+        self._min_level = LEVELS[level.upper()]
+        self._console = console
+        self._json = _RotatingJSONLines(json_path, max_bytes, backups) if json_path else None
+        self._ring_size = debug_ring
+
+    def _ensure_worker(self) -> None:
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._worker, name="logger", daemon=True)
+                self._thread.start()
+                if not self._closing_registered:
+                    atexit.register(self.close)
+                    self._closing_registered = True
+
+    def _enqueue(self, kind: str, level: str, module: str, msg: Any) -> None:
+        if self._thread is None:
+            self._ensure_worker()
+        self._queue.put((kind, datetime.datetime.now(datetime.timezone.utc), level, module, msg, current_trace_id()))
+
     def _log(self, level: str, module: str, msg: str) -> None:
+        if LEVELS[level] >= self._min_level:
+            self._enqueue("log", level, module, msg)
+        elif level == "DEBUG" and self._ring_size:
+            self._enqueue("ring", level, module, msg)
+
+    def _console_line(self, ts: datetime.datetime, level: str, module: str, msg: str, trace_id: Optional[str]) -> str:
         color, label = self._LEVELS[level]
-        ts = datetime.datetime.now().strftime("%H:%M:%S")
         prefix = (
-            f"{self.DIM}[{ts}]{self.RESET} "
+            f"{self.DIM}[{ts.astimezone().strftime('%H:%M:%S')}]{self.RESET} "
             f"{color}{self.BOLD}[{label}]{self.RESET} "
             f"\033[96m[{module:<12}]{self.RESET}"
         )
-        print(f"{prefix} {msg}", flush=True)
+        if trace_id:
+            prefix += f" {self.DIM}{trace_id}{self.RESET}"
+        return f"{prefix} {msg}"
+
+    def _write_json(self, ts: datetime.datetime, level: str, module: str, msg: str, trace_id: Optional[str]) -> None:
+        if self._json is None:
+            return
+        entry = {"ts": ts.isoformat(), "level": level, "module": module, "msg": str(msg)}
+        if trace_id:
+            entry["trace_id"] = trace_id
+        self._json.write(entry)
+
+    def _write(self, ts: datetime.datetime, level: str, module: str, msg: str, trace_id: Optional[str]) -> None:
+        if self._console:
+            print(self._console_line(ts, level, module, msg, trace_id))
+        self._write_json(ts, level, module, msg, trace_id)
+
+    def _handle(self, record: _Record) -> None:
+        kind, ts, level, module, msg, trace_id = record
+        if kind == "ring":
+            if self._ring is None:
+                self._ring = deque(maxlen=self._ring_size)
+            self._ring.append(record)
+            return
+        if kind == "section":
+            if self._console:
+                bar = "=" * (len(msg) + 4)
+                print(f"\n{self.BOLD}[{bar}]\n[  {msg}  ]\n[{bar}]{self.RESET}\n")
+            self._write_json(ts, "INFO", "Section", msg, trace_id)
+            return
+        if level == "ERROR" and self._ring:
+            self._write(ts, "DEBUG", "Logger", f"Last {len(self._ring)} suppressed debug lines before this error:", None)
+            for _, ring_ts, ring_level, ring_module, ring_msg, ring_trace in self._ring:
+                self._write(ring_ts, ring_level, ring_module, ring_msg, ring_trace)
+            self._ring.clear()
+        self._write(ts, level, module, msg, trace_id)
+
+    def _flush_outputs(self) -> None:
+        if self._console:
+            try:
+                sys.stdout.flush()
+            except (OSError, ValueError):
+                pass
+        if self._json is not None:
+            self._json.flush()
+
+    def _worker(self) -> None:
+        while True:
+            record = self._queue.get()
+            if record is None:
+                self._flush_outputs()
+                return
+            try:
+                self._handle(record)
+            except Exception:  # pylint: disable=broad-exception-caught
+                # A broken sink must not kill the logging thread.
+                pass
+            if self._queue.empty():
+                self._flush_outputs()
+
+    def close(self) -> None:
+        """Write out everything queued so far and stop the worker."""
+        thread = self._thread
+        if thread is None:
+            return
+        self._queue.put(None)
+        thread.join(timeout=5)
+        self._thread = None
+        if self._json is not None:
+            self._json.close()
 
     def info(self, module: str, msg: str) -> None:
         self._log("INFO", module, msg)
@@ -42,8 +234,56 @@ class Logger:
         self._log("DEBUG", module, msg)
 
     def section(self, title: str) -> None:
-        bar = "=" * (len(title) + 4)
-        print(f"\n{self.BOLD}[{bar}]\n[  {title}  ]\n[{bar}]{self.RESET}\n", flush=True)
+        if LEVELS["INFO"] >= self._min_level:
+            self._enqueue("section", "INFO", "", title)
+
+
+class StationLogger:
+    """Prefix every message with a station name so interleaved fleet output stays readable."""
+
+    def __init__(self, logger, station: str):
+        self._log = logger
+        self.station = station
+
+    def info(self, module: str, msg: str) -> None:
+        self._log.info(module, f"[{self.station}] {msg}")
+
+    def success(self, module: str, msg: str) -> None:
+        self._log.success(module, f"[{self.station}] {msg}")
+
+    def warning(self, module: str, msg: str) -> None:
+        self._log.warning(module, f"[{self.station}] {msg}")
+
+    def error(self, module: str, msg: str) -> None:
+        self._log.error(module, f"[{self.station}] {msg}")
+
+    def debug(self, module: str, msg: str) -> None:
+        self._log.debug(module, f"[{self.station}] {msg}")
+
+    def section(self, title: str) -> None:
+        self._log.section(f"{title} [{self.station}]")
+
+
+class QuietLogger:
+    """Logger stand-in that drops everything, for benchmarks and offline replays."""
+
+    def info(self, module: str, msg: str) -> None:
+        pass
+
+    def success(self, module: str, msg: str) -> None:
+        pass
+
+    def warning(self, module: str, msg: str) -> None:
+        pass
+
+    def error(self, module: str, msg: str) -> None:
+        pass
+
+    def debug(self, module: str, msg: str) -> None:
+        pass
+
+    def section(self, title: str) -> None:
+        pass
 
 
 log = Logger()
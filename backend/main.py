@@ -1,32 +1,85 @@
 import asyncio
+import dataclasses
 
 from backend.cli import log_configuration, parse_args
 from backend.command_listener import listen_for_control_commands
-from backend.config import load_settings
+from backend.config import device_channel, load_settings
+from backend.fleet import run_fleet
 from backend.logger import log
+from backend.metrics import start_metrics_server
+from backend.retention import run_retention
+from backend.scheduler import CycleScheduler
+from backend.startup import enable_import_timing, mark
 from backend.system import SmartPlantSystem
+from backend.timeline import run_trace_timeline
+from backend.timing import run_timing_report
+
+
+def _run_standalone(system: SmartPlantSystem, scheduler) -> None:
+    if scheduler is None:
+        system.run()
+        return
+
+    try:
+        asyncio.run(scheduler.run(system.run_async))
+    except KeyboardInterrupt:
+        log.info("Scheduler", "Scheduler stopped by user")
 
 
 def main() -> None:
+    mark("main")
     args = parse_args()
+    if args.startup_report:
+        enable_import_timing()
+    log.configure(
+        level=args.log_level,
+        json_path=args.log_json,
+        max_bytes=args.log_max_bytes,
+        backups=args.log_backups,
+        debug_ring=args.debug_ring,
+    )
     settings = load_settings(mock_override=args.mock)
+    if args.device_id:
+        settings = dataclasses.replace(settings, device_id=args.device_id)
+
+    log_configuration(log, args, settings)
+
+    if args.run_retention:
+        run_retention(args, settings, log)
+        return
 
-    log_configuration(log, args, settings.mock)
+    if args.timing_report:
+        run_timing_report(args, settings, log)
+        return
+
+    if args.trace:
+        run_trace_timeline(args, settings, log)
+        return
+
+    if args.metrics_port:
+        start_metrics_server(args.metrics_port, args.metrics_host, log)
+
+    if args.fleet:
+        run_fleet(args, settings, log)
+        return
 
     system = SmartPlantSystem(args=args, settings=settings, logger=log)
+    scheduler = None
+    if args.interval:
+        scheduler = CycleScheduler(log, interval=args.interval, jitter=args.jitter, quiet_hours=args.quiet_hours)
 
     if args.listen_commands:
         if settings.mock:
-            log.warning("Realtime", "Command listener requires real Supabase mode. Running one cycle in mock mode.")
-            system.run()
+            log.warning("Realtime", "Command listener requires real Supabase mode. Running without it in mock mode.")
+            _run_standalone(system, scheduler)
             return
 
         if not settings.supabase_url or not settings.supabase_service_role_key:
-            log.warning("Realtime", "Supabase credentials missing. Running one cycle instead of command listener.")
-            system.run()
+            log.warning("Realtime", "Supabase credentials missing. Running without the command listener.")
+            _run_standalone(system, scheduler)
             return
 
-        channel_name = args.command_channel or settings.supabase_command_channel
+        channel_name = args.command_channel or device_channel(settings.supabase_command_channel, settings.device_id)
 
         try:
             asyncio.run(
@@ -35,13 +88,14 @@ def main() -> None:
                     settings=settings,
                     logger=log,
                     channel_name=channel_name,
+                    scheduler=scheduler,
                 )
             )
         except KeyboardInterrupt:
             log.info("Realtime", "Command listener stopped by user")
         return
 
-    system.run()
+    _run_standalone(system, scheduler)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,219 @@
+"""Prometheus metrics for long-running stations.
+
+A small stdlib-only registry (counters, gauges, histograms) rendered in the
+Prometheus text exposition format, served by `start_metrics_server` on a
+daemon thread so it works the same in listener, scheduled and fleet mode.
+Every series carries a `device` label, so one scrape config covers the fleet.
+
+    python3 run.py --listen-commands --metrics-port 9108
+    curl -s localhost:9108/metrics
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+# Seconds; cycles and Gemini calls take seconds, writes and stages less.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name}: expected labels {self.label_names}, got {sorted(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines += [f"{name}{labels} {_format_value(value)}" for name, labels, value in self.samples()]
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            yield self.name, _format_labels(self.label_names, key), value
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[LabelValues, float] = {}
+        self._functions: Dict[LabelValues, Callable[[], float]] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def set_function(self, func: Callable[[], float], **labels: str) -> None:
+        """Read the value from `func` at scrape time."""
+        key = self._key(labels)
+        with self._lock:
+            self._functions[key] = func
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+            functions = dict(self._functions)
+        for key, func in functions.items():
+            values[key] = func()
+        for key, value in sorted(values.items()):
+            yield self.name, _format_labels(self.label_names, key), value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, documentation: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # label values -> (per-bucket counts, sum)
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.setdefault(key, ([0] * len(self.buckets), [0.0]))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            total[0] += value
+
+    def samples(self):
+        with self._lock:
+            values = sorted((key, (list(counts), total[0])) for key, (counts, total) in self._values.items())
+        names = (*self.label_names, "le")
+        for key, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                yield f"{self.name}_bucket", _format_labels(names, (*key, _format_value(bound))), cumulative
+            yield f"{self.name}_sum", _format_labels(self.label_names, key), total
+            yield f"{self.name}_count", _format_labels(self.label_names, key), cumulative
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+CYCLES = REGISTRY.register(Counter("plant_cycles_total", "Cycles run, by outcome", ("device", "outcome")))
+CYCLE_SECONDS = REGISTRY.register(Histogram("plant_cycle_seconds", "Wall time of a whole cycle", ("device",)))
+STAGE_SECONDS = REGISTRY.register(Histogram("plant_stage_seconds", "Wall time of one cycle stage", ("device", "stage")))
+STAGE_FAILURES = REGISTRY.register(
+    Counter("plant_stage_failures_total", "Stages that raised, timed out or were cancelled", ("device", "stage"))
+)
+GEMINI_REQUESTS = REGISTRY.register(Counter("plant_gemini_requests_total", "Gemini analysis requests", ("device",)))
+GEMINI_ERRORS = REGISTRY.register(
+    Counter(
+        "plant_gemini_errors_total",
+        "Gemini analyses that fell back to the default result (request, empty, invalid_json)",
+        ("device", "reason"),
+    )
+)
+GEMINI_SECONDS = REGISTRY.register(Histogram("plant_gemini_request_seconds", "Gemini request latency", ("device",)))
+SUPABASE_WRITE_SECONDS = REGISTRY.register(
+    Histogram("plant_supabase_write_seconds", "Time to write one cycle to the relational tables", ("device",))
+)
+DHT_READS = REGISTRY.register(Counter("plant_dht_reads_total", "DHT sensor reads", ("device",)))
+DHT_FAILURES = REGISTRY.register(Counter("plant_dht_read_failures_total", "DHT reads with no value", ("device",)))
+QUEUE_DEPTH = REGISTRY.register(Gauge("plant_command_queue_depth", "Commands waiting in the cycle queue", ("device",)))
+CACHE_REQUESTS = REGISTRY.register(
+    Counter("plant_cache_requests_total", "In-process cache lookups", ("device", "cache", "result"))
+)
+
+
+def observe_cycle(device_id: str, outcome: str, seconds: float, spans) -> None:
+    """Record a finished cycle and its `timing.Span`s."""
+    CYCLES.inc(device=device_id, outcome=outcome)
+    CYCLE_SECONDS.observe(seconds, device=device_id)
+    for item in spans:
+        STAGE_SECONDS.observe(item.duration, device=device_id, stage=item.name)
+        if item.outcome != "ok":
+            STAGE_FAILURES.inc(device=device_id, stage=item.name)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+
+def start_metrics_server(port: int, host: str, logger) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    logger.success("Metrics", f"Serving Prometheus metrics on http://{host}:{server.server_address[1]}/metrics")
+    return server
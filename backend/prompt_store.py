@@ -0,0 +1,46 @@
+"""Deduplicated prompt storage and compressed AI responses.
+
+Cycles store `prompt_templates.id` (the template's SHA-256) plus the stringified
+parameters substituted into it, so the exact prompt can be rebuilt with
+`render_prompt` here or `public.render_prompt_template` in SQL.
+"""
+
+import hashlib
+import zlib
+from typing import Any, Dict, Mapping, Optional
+
+_COMPRESSION_LEVEL = 9
+
+
+def template_id(template: str) -> str:
+    return hashlib.sha256(template.encode("utf-8")).hexdigest()
+
+
+def prompt_params(temp: Any, humidity: Any, light: Any, soil_summary: Any) -> Dict[str, str]:
+    # str() matches what str.format() substitutes, so rendering stays byte-exact.
+    return {
+        "temp": str(temp),
+        "humidity": str(humidity),
+        "light": str(light),
+        "soil": str(soil_summary),
+    }
+
+
+def render_prompt(template: str, params: Mapping[str, str]) -> str:
+    return template.format(**params)
+
+
+def compress_response(text: Optional[str]) -> Optional[str]:
+    """Return zlib-compressed text in PostgREST's `\\x<hex>` bytea form."""
+    if text is None:
+        return None
+    return "\\x" + zlib.compress(text.encode("utf-8"), _COMPRESSION_LEVEL).hex()
+
+
+def decompress_response(value: Any) -> Optional[str]:
+    """Inverse of `compress_response`; accepts `\\x<hex>` strings or raw bytes."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = bytes.fromhex(value[2:] if value.startswith("\\x") else value)
+    return zlib.decompress(bytes(value)).decode("utf-8")
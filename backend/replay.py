@@ -0,0 +1,256 @@
+"""Replay recorded cycles through the decision pipeline, offline.
+
+    python db_mock.py replay --source backup.json
+    python db_mock.py replay --source mock_data/ --sink mock --diffs-out diffs.ndjson
+    python db_mock.py replay --source backups/20260101T120000Z --pace recorded --speed 600
+
+Each joined cycle's stored AI response (`response_markdown`, or the
+compressed `response_zlib`; rows with neither are rebuilt from their columns)
+goes through `_normalize_ai_result`, then `ActuatorController.apply` on mock
+GPIO, then a storage sink. The replayed recommendation, plant/disease names
+and actuator actions are compared with what was recorded, so a change to the
+normalizer or the actuator rules shows up as a list of decision diffs.
+Actions are compared as labels (see `rollups.action_labels`), so pump
+durations do not count; the pump is never actually run.
+"""
+
+import dataclasses
+import datetime
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from backend.config import DEFAULT_DEVICE_ID
+from backend.history_export import CHILD_TABLES, sensor_lists
+from backend.logger import QuietLogger
+from backend.prompt_store import decompress_response, prompt_params, template_id
+from backend.rollups import action_labels, rollup_rows
+from backend.services.actuator_service import ActuatorController
+from backend.services.ai_service import BaseAIService, _normalize_ai_result
+from backend.services.gpio_service import MockGPIOManager
+from backend.services.supabase_service import MockSupabaseService, RealSupabaseService
+
+SINKS = ("rows", "mock", "none")
+PACES = ("fast", "recorded")
+RECOMMENDATION_KEYS = ("water_plant", "increase_airflow", "reduce_temperature")
+# Longest sleep between two cycles at recorded pace, so gaps in history don't stall a replay
+MAX_PACE_SLEEP_SECONDS = 5.0
+
+
+@dataclasses.dataclass
+class Diff:
+    cycle_id: Any
+    captured_at: Any
+    field: str
+    recorded: Any
+    replayed: Any
+
+    def as_dict(self) -> Dict[str, Any]:
+        return dataclasses.asdict(self)
+
+
+@dataclasses.dataclass
+class ReplayReport:
+    cycles: int = 0
+    seconds: float = 0.0
+    # Time spent per pipeline step, summed over all cycles
+    step_seconds: Dict[str, float] = dataclasses.field(default_factory=lambda: Counter())
+    diff_counts: Dict[str, int] = dataclasses.field(default_factory=lambda: Counter())
+    cycles_with_diffs: int = 0
+    # Cycles missing a child row; fields from a missing row are not compared
+    incomplete_cycles: int = 0
+    missing_rows: Dict[str, int] = dataclasses.field(default_factory=lambda: Counter())
+    # First diffs only; `on_diff` sees all of them
+    diffs: List[Diff] = dataclasses.field(default_factory=list)
+
+    @property
+    def cycles_per_second(self) -> float:
+        return self.cycles / self.seconds if self.seconds else 0.0
+
+
+def _timestamp(value: Any) -> Optional[datetime.datetime]:
+    if not value:
+        return None
+    ts = datetime.datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    return ts if ts.tzinfo else ts.replace(tzinfo=datetime.timezone.utc)
+
+
+def recorded_response(analysis: Mapping[str, Any]) -> Any:
+    """The raw AI response as stored, or the analysis columns in the legacy flat shape."""
+    text = analysis.get("response_markdown")
+    if text:
+        return text
+    if analysis.get("response_zlib"):
+        return decompress_response(analysis["response_zlib"])
+    return {
+        "plant": analysis.get("plant"),
+        "disease": analysis.get("disease"),
+        "confidence": analysis.get("confidence"),
+        "todos": analysis.get("todos") or [],
+        "recommendation": analysis.get("recommendation") or {},
+    }
+
+
+class _Sink:
+    """Where replayed payloads go: row building only, the in-memory mock store, or nowhere."""
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.storage = MockSupabaseService(settings=None, logger=QuietLogger()) if kind == "mock" else None
+        self._prompt_template_id = template_id(BaseAIService.PROMPT)
+
+    def write(self, payload: Dict[str, Any], cycle_id: Any) -> None:
+        if self.kind == "mock":
+            self.storage.log_cycle(payload)
+        elif self.kind == "rows":
+            # What RealSupabaseService.log_cycle sends, minus the network
+            prompt_columns = {"prompt_template_id": self._prompt_template_id, "prompt_params": payload["prompt_params"]}
+            # pylint: disable=protected-access
+            RealSupabaseService._cycle_row(payload)
+            RealSupabaseService._child_rows(payload, cycle_id, payload["timestamp"], prompt_columns)
+            rollup_rows(payload)
+
+
+def _recorded_labels(action: Optional[Mapping[str, Any]]) -> Optional[List[str]]:
+    if not action or action.get("actions") is None:
+        return None
+    return sorted(action_labels(action["actions"]))
+
+
+def compare_cycle(
+    cycle: Mapping[str, Any],
+    analysis: Optional[Mapping[str, Any]],
+    action: Optional[Mapping[str, Any]],
+    ai_result: Mapping[str, Any],
+    actions: str,
+) -> List[Diff]:
+    """Differences between the recorded decisions and the replayed ones; unrecorded fields are skipped."""
+    cycle_id, captured_at = cycle.get("id"), cycle.get("captured_at")
+    diffs: List[Diff] = []
+
+    def check(field: str, recorded: Any, replayed: Any) -> None:
+        if recorded is not None and recorded != replayed:
+            diffs.append(Diff(cycle_id, captured_at, field, recorded, replayed))
+
+    analysis = analysis or {}
+    recommendation = analysis.get("recommendation") or {}
+    for key in RECOMMENDATION_KEYS:
+        check(f"recommendation.{key}", recommendation.get(key), ai_result["recommendation"][key])
+    check("plant", analysis.get("plant"), ai_result["plant"]["name"])
+    check("disease", analysis.get("disease"), ai_result["disease"]["name"])
+    check("actions", _recorded_labels(action), sorted(action_labels(actions)))
+    return diffs
+
+
+def _payload(
+    cycle: Mapping[str, Any],
+    sensor: Mapping[str, Any],
+    raw_response: Any,
+    ai_result: Dict[str, Any],
+    actions: str,
+) -> Dict[str, Any]:
+    temp, hum = sensor.get("temp_c"), sensor.get("humidity_pct")
+    light, soil_summary = sensor.get("light_state"), sensor.get("soil_summary")
+    temp_readings, hum_readings, soil_readings = sensor_lists(sensor)
+    return {
+        "timestamp": cycle.get("captured_at"),
+        "device_id": cycle.get("device_id") or DEFAULT_DEVICE_ID,
+        "trace_id": cycle.get("trace_id"),
+        "temp": temp,
+        "hum": hum,
+        "temp_readings": temp_readings,
+        "hum_readings": hum_readings,
+        "light": light,
+        "soil_summary": soil_summary,
+        "soil_majority": sensor.get("soil_majority"),
+        "soil_readings": soil_readings,
+        "soil_wetness_pct": sensor.get("soil_wetness_pct"),
+        "image_url": cycle.get("image_url"),
+        "ai_result": ai_result,
+        "actions": actions,
+        "prompt_template": BaseAIService.PROMPT,
+        "prompt_params": prompt_params(temp, hum, light, soil_summary),
+        "response_md": raw_response if isinstance(raw_response, str) else None,
+    }
+
+
+def replay_cycles(
+    joined: Iterable[Tuple[Mapping[str, Any], Any, Any, Any]],
+    sink: str = "rows",
+    pace: str = "fast",
+    speed: float = 1.0,
+    keep_diffs: int = 50,
+    on_diff: Optional[Callable[[Diff], None]] = None,
+) -> ReplayReport:
+    """Run joined (cycle, sensor, analysis, action) tuples through normalize -> apply -> sink."""
+    report = ReplayReport()
+    writer = _Sink(sink)
+    # Pins only matter to real hardware; the mock just records output states
+    controller = ActuatorController(MockGPIOManager(0, [], 1, 2, QuietLogger()), pump_duration=0)
+    steps = report.step_seconds
+    previous_ts: Optional[datetime.datetime] = None
+    started = time.perf_counter()
+
+    for cycle, sensor, analysis, action in joined:
+        missing = [table for table, row in zip(CHILD_TABLES, (sensor, analysis, action)) if not row]
+        if missing:
+            report.incomplete_cycles += 1
+            for table in missing:
+                report.missing_rows[table] += 1
+        sensor = sensor or {}
+        if pace == "recorded":
+            captured_at = _timestamp(cycle.get("captured_at"))
+            if previous_ts is not None and captured_at is not None:
+                gap = (captured_at - previous_ts).total_seconds() / speed
+                if gap > 0:
+                    time.sleep(min(gap, MAX_PACE_SLEEP_SECONDS))
+            previous_ts = captured_at or previous_ts
+
+        t0 = time.perf_counter()
+        raw_response = recorded_response(analysis or {})
+        ai_result = _normalize_ai_result(raw_response)
+        t1 = time.perf_counter()
+        actions = controller.apply(ai_result, sensor.get("temp_c"), sensor.get("soil_majority"))
+        t2 = time.perf_counter()
+        writer.write(_payload(cycle, sensor, raw_response, ai_result, actions), cycle.get("id"))
+        t3 = time.perf_counter()
+        steps["normalize"] += t1 - t0
+        steps["apply"] += t2 - t1
+        steps["sink"] += t3 - t2
+
+        diffs = compare_cycle(cycle, analysis, action, ai_result, actions)
+        report.cycles += 1
+        if diffs:
+            report.cycles_with_diffs += 1
+            for diff in diffs:
+                report.diff_counts[diff.field] += 1
+                if len(report.diffs) < keep_diffs:
+                    report.diffs.append(diff)
+                if on_diff is not None:
+                    on_diff(diff)
+
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def format_report(report: ReplayReport) -> List[str]:
+    lines = [
+        f"Replayed {report.cycles} cycles in {report.seconds:.2f}s ({report.cycles_per_second:,.0f} cycles/s)",
+    ]
+    for step in ("normalize", "apply", "sink"):
+        seconds = report.step_seconds.get(step, 0.0)
+        per_cycle = seconds / report.cycles * 1e6 if report.cycles else 0.0
+        lines.append(f"  {step:<10} {seconds:>8.3f}s  {per_cycle:>9.1f}us/cycle")
+    other = report.seconds - sum(report.step_seconds.values())
+    lines.append(f"  {'read/diff':<10} {other:>8.3f}s  (source parsing, joining, comparing and pacing)")
+    lines.append(f"Cycles missing child rows (partly or not compared): {report.incomplete_cycles}")
+    for table, count in sorted(report.missing_rows.items()):
+        lines.append(f"  no {table:<29} {count}")
+    lines.append(f"Cycles with decision diffs: {report.cycles_with_diffs}")
+    for field, count in sorted(report.diff_counts.items(), key=lambda item: -item[1]):
+        lines.append(f"  {field:<32} {count}")
+    for diff in report.diffs:
+        lines.append(
+            f"  {diff.captured_at} {diff.cycle_id} {diff.field}: recorded={diff.recorded!r} replayed={diff.replayed!r}"
+        )
+    return lines
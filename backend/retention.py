@@ -0,0 +1,225 @@
+import datetime
+from dataclasses import dataclass, field
+from typing import Iterator, List, Optional
+
+from backend.config import Settings
+from backend.keyset import keyset_after
+
+
+def _month_start(value: datetime.date) -> datetime.date:
+    return value.replace(day=1)
+
+
+def _add_months(value: datetime.date, months: int) -> datetime.date:
+    index = value.year * 12 + (value.month - 1) + months
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def _format_bytes(value: int) -> str:
+    size = float(value)
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+@dataclass
+class RetentionReport:
+    partitions_created: int = 0
+    downsampled_months: List[str] = field(default_factory=list)
+    dropped_months: List[str] = field(default_factory=list)
+    images_moved: int = 0
+    image_bytes_moved: int = 0
+    images_deleted: int = 0
+    image_bytes_deleted: int = 0
+    table_bytes_reclaimed: int = 0
+
+    @property
+    def bytes_reclaimed(self) -> int:
+        # Moved images still take up space, in the cold bucket
+        return self.table_bytes_reclaimed + self.image_bytes_deleted
+
+
+class RetentionJob:
+    """Downsample or drop old monthly history partitions and archive their images.
+
+    Months newer than `full_detail_months` are untouched. Older months are
+    downsampled to one cycle per hour, and the images of the surviving cycles
+    are moved to the cold bucket; months older than `keep_months` are dropped
+    entirely, images included. `cycle_rollups` is never touched, so dashboards
+    keep their long-range aggregates.
+    """
+
+    PAGE_SIZE = 500
+    MONTHS_AHEAD = 3
+
+    def __init__(self, client, settings: Settings, logger, full_detail_months: int, keep_months: int):
+        if full_detail_months < 1:
+            raise ValueError("full_detail_months must be at least 1")
+        if keep_months < full_detail_months:
+            raise ValueError("keep_months must be greater than or equal to full_detail_months")
+
+        self._client = client
+        self.settings = settings
+        self.log = logger
+        self.full_detail_months = full_detail_months
+        self.keep_months = keep_months
+
+    def run(self, today: Optional[datetime.date] = None) -> RetentionReport:
+        report = RetentionReport()
+        this_month = _month_start(today or datetime.datetime.now(datetime.timezone.utc).date())
+        downsample_before = _add_months(this_month, -self.full_detail_months)
+        drop_before = _add_months(this_month, -self.keep_months)
+
+        report.partitions_created = self._rpc(
+            "ensure_history_partitions",
+            {"p_from": this_month.isoformat(), "p_months": self.MONTHS_AHEAD},
+        ) or 0
+
+        for row in self._rpc("list_history_partitions", {}) or []:
+            month = datetime.date.fromisoformat(str(row["month_start"])[:10])
+            if month >= downsample_before:
+                continue
+
+            label = month.strftime("%Y-%m")
+            if month < drop_before:
+                # No row will point at these images once the partitions are gone
+                self._delete_month_images(month, report)
+                reclaimed = self._rpc("drop_history_partition", {"p_month": month.isoformat()}) or 0
+                report.dropped_months.append(label)
+                self.log.info("Retention", f"Dropped {label} ({_format_bytes(reclaimed)})")
+            else:
+                result = self._rpc("downsample_history_partition", {"p_month": month.isoformat()}) or {}
+                reclaimed = result.get("bytes") or 0
+                self._delete_images(result.get("image_urls") or [], report)
+                # Only the cycles that survived downsampling have images worth archiving
+                self._archive_images(month, report)
+                report.downsampled_months.append(label)
+                self.log.info("Retention", f"Downsampled {label} ({_format_bytes(reclaimed)})")
+            report.table_bytes_reclaimed += int(reclaimed)
+
+        return report
+
+    def _rpc(self, name: str, params):
+        return self._client.rpc(name, params).execute().data
+
+    def _object_name(self, image_url: Optional[str], bucket: str) -> Optional[str]:
+        marker = f"/object/public/{bucket}/"
+        if not image_url or marker not in image_url:
+            return None
+        return image_url.split(marker, 1)[1].split("?", 1)[0] or None
+
+    def _image_pages(self, month: datetime.date, bucket: str) -> Iterator[List[dict]]:
+        """Page the month's cycles whose image is in `bucket`, keyset-ordered by (captured_at, id)."""
+        month_start = datetime.datetime.combine(month, datetime.time(), tzinfo=datetime.timezone.utc)
+        month_end = datetime.datetime.combine(_add_months(month, 1), datetime.time(), tzinfo=datetime.timezone.utc)
+        watermark = None
+
+        while True:
+            query = (
+                self._client.table("plant_cycles")
+                .select("id,captured_at,image_url")
+                .gte("captured_at", month_start.isoformat())
+                .lt("captured_at", month_end.isoformat())
+                .like("image_url", f"%/object/public/{bucket}/%")
+            )
+            page = (
+                keyset_after(query, watermark, column="captured_at")
+                .order("captured_at")
+                .order("id")
+                .limit(self.PAGE_SIZE)
+                .execute()
+            ).data or []
+            yield page
+
+            if len(page) < self.PAGE_SIZE:
+                return
+            # Archived rows no longer match the filter; failed ones are skipped by the cursor.
+            # Keyed on (captured_at, id) so cycles sharing a timestamp across a page boundary aren't skipped.
+            watermark = {"captured_at": page[-1]["captured_at"], "id": page[-1]["id"]}
+
+    def _archive_images(self, month: datetime.date, report: RetentionReport) -> None:
+        hot = self._client.storage.from_(self.settings.supabase_storage_bucket)
+        cold = self._client.storage.from_(self.settings.supabase_cold_storage_bucket)
+
+        for page in self._image_pages(month, self.settings.supabase_storage_bucket):
+            for cycle in page:
+                name = self._object_name(cycle.get("image_url"), self.settings.supabase_storage_bucket)
+                if not name:
+                    continue
+                try:
+                    image_bytes = hot.download(name)
+                    cold.upload(
+                        path=name,
+                        file=image_bytes,
+                        file_options={"content-type": "image/jpeg", "upsert": "true"},
+                    )
+                    hot.remove([name])
+                    self._client.table("plant_cycles").update({"image_url": cold.get_public_url(name)}).eq(
+                        "id", cycle["id"]
+                    ).execute()
+                except Exception as exc:  # pylint: disable=broad-exception-caught
+                    self.log.warning("Retention", f"Could not archive image {name}: {exc}")
+                    continue
+                report.images_moved += 1
+                report.image_bytes_moved += len(image_bytes)
+
+    def _delete_month_images(self, month: datetime.date, report: RetentionReport) -> None:
+        # Images of months that were downsampled earlier already sit in the cold bucket
+        for bucket in (self.settings.supabase_storage_bucket, self.settings.supabase_cold_storage_bucket):
+            for page in self._image_pages(month, bucket):
+                self._delete_images([cycle.get("image_url") for cycle in page], report)
+
+    def _delete_images(self, image_urls: List[Optional[str]], report: RetentionReport) -> None:
+        for bucket in (self.settings.supabase_storage_bucket, self.settings.supabase_cold_storage_bucket):
+            names = [name for name in (self._object_name(url, bucket) for url in image_urls) if name]
+            storage = self._client.storage.from_(bucket)
+            for start in range(0, len(names), self.PAGE_SIZE):
+                chunk = names[start : start + self.PAGE_SIZE]
+                try:
+                    removed = storage.remove(chunk) or []
+                except Exception as exc:  # pylint: disable=broad-exception-caught
+                    self.log.warning("Retention", f"Could not delete {len(chunk)} images from '{bucket}': {exc}")
+                    continue
+                # Storage answers with the deleted objects and their metadata
+                report.images_deleted += len(removed)
+                report.image_bytes_deleted += sum(
+                    int((obj.get("metadata") or {}).get("size") or 0) for obj in removed if isinstance(obj, dict)
+                )
+
+def run_retention(args, settings: Settings, logger) -> Optional[RetentionReport]:
+    if settings.mock or not settings.supabase_url or not settings.supabase_service_role_key:
+        logger.warning("Retention", "Retention requires real Supabase credentials. Skipping.")
+        return None
+
+    from supabase import create_client  # pylint: disable=import-error
+
+    client = create_client(settings.supabase_url, settings.supabase_service_role_key)
+    job = RetentionJob(
+        client,
+        settings,
+        logger,
+        full_detail_months=args.retention_full_months,
+        keep_months=args.retention_keep_months,
+    )
+
+    logger.section("Smart Plant System - Retention")
+    report = job.run()
+    logger.success(
+        "Retention",
+        (
+            f"Created {report.partitions_created} partitions, "
+            f"downsampled {len(report.downsampled_months)} months, dropped {len(report.dropped_months)} months, "
+            f"moved {report.images_moved} images to '{settings.supabase_cold_storage_bucket}' "
+            f"({_format_bytes(report.image_bytes_moved)}), deleted {report.images_deleted} images"
+        ),
+    )
+    logger.success(
+        "Retention",
+        (
+            f"Reclaimed {_format_bytes(report.bytes_reclaimed)} "
+            f"(tables={_format_bytes(report.table_bytes_reclaimed)}, images={_format_bytes(report.image_bytes_deleted)})"
+        ),
+    )
+    return report
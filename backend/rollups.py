@@ -0,0 +1,195 @@
+"""Hourly/daily per-device cycle rollups maintained incrementally alongside raw cycle rows."""
+
+import datetime
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+from backend.config import DEFAULT_DEVICE_ID
+
+ROLLUP_GRANULARITIES = ("hour", "day")
+
+NO_ACTION_LABEL = "No Action needed"
+AIRFLOW_LABEL = "Increase Airflow"
+WATER_LABEL = "Water the plant"
+
+_COUNT_FIELDS = ("light_counts", "soil_counts", "action_counts", "disease_counts")
+
+
+def _parse_timestamp(value: Any) -> datetime.datetime:
+    if isinstance(value, datetime.datetime):
+        ts = value
+    elif value:
+        ts = datetime.datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    else:
+        ts = datetime.datetime.now(datetime.timezone.utc)
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=datetime.timezone.utc)
+    return ts.astimezone(datetime.timezone.utc)
+
+
+def bucket_start(timestamp: Any, granularity: str) -> str:
+    ts = _parse_timestamp(timestamp)
+    if granularity == "hour":
+        ts = ts.replace(minute=0, second=0, microsecond=0)
+    elif granularity == "day":
+        ts = ts.replace(hour=0, minute=0, second=0, microsecond=0)
+    else:
+        raise ValueError(f"Unknown rollup granularity: {granularity}")
+    return ts.isoformat()
+
+
+def _normalize_action_token(token: str) -> str:
+    # Mirrors normalizeActionToken() in frontend/src/hooks/useSupabaseData.ts.
+    normalized = token.strip().lower()
+    if not normalized or normalized in {"none", "no action"}:
+        return NO_ACTION_LABEL
+    if "fan on" in normalized or "airflow" in normalized:
+        return AIRFLOW_LABEL
+    if "water" in normalized:
+        return WATER_LABEL
+    return token.strip()
+
+
+def action_labels(actions: Optional[str]) -> List[str]:
+    raw = (actions or "").strip()
+    if not raw:
+        return [NO_ACTION_LABEL]
+
+    labels: List[str] = []
+    for token in raw.split(","):
+        label = _normalize_action_token(token)
+        if label not in labels:
+            labels.append(label)
+
+    if len(labels) > 1:
+        labels = [label for label in labels if label != NO_ACTION_LABEL]
+    return labels
+
+
+def _to_float(value: Any) -> Optional[float]:
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _normalize_state(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    normalized = str(value).strip().upper()
+    return normalized or None
+
+
+def _disease_name(ai_result: Any) -> Optional[str]:
+    if not isinstance(ai_result, Mapping):
+        return None
+    disease = ai_result.get("disease")
+    if isinstance(disease, Mapping):
+        disease = disease.get("name")
+    return str(disease) if disease else None
+
+
+def empty_delta() -> Dict[str, Any]:
+    return {
+        "cycle_count": 0,
+        "temp_count": 0,
+        "temp_sum": 0.0,
+        "temp_min": None,
+        "temp_max": None,
+        "hum_count": 0,
+        "hum_sum": 0.0,
+        "hum_min": None,
+        "hum_max": None,
+        "wetness_count": 0,
+        "wetness_sum": 0.0,
+        "light_counts": {},
+        "soil_counts": {},
+        "action_counts": {},
+        "disease_counts": {},
+    }
+
+
+def cycle_delta(payload: Mapping[str, Any]) -> Dict[str, Any]:
+    """Build the additive rollup contribution of a single `log_cycle` payload."""
+    delta = empty_delta()
+    delta["cycle_count"] = 1
+
+    for prefix, key in (("temp", "temp"), ("hum", "hum")):
+        value = _to_float(payload.get(key))
+        if value is not None:
+            delta[f"{prefix}_count"] = 1
+            delta[f"{prefix}_sum"] = value
+            delta[f"{prefix}_min"] = value
+            delta[f"{prefix}_max"] = value
+
+    wetness = _to_float(payload.get("soil_wetness_pct"))
+    if wetness is not None:
+        delta["wetness_count"] = 1
+        delta["wetness_sum"] = wetness
+
+    light = _normalize_state(payload.get("light"))
+    if light:
+        delta["light_counts"] = {light: 1}
+
+    soil = _normalize_state(payload.get("soil_majority") or payload.get("soil_summary"))
+    if soil:
+        delta["soil_counts"] = {soil: 1}
+
+    delta["action_counts"] = {label: 1 for label in action_labels(payload.get("actions"))}
+
+    disease = _disease_name(payload.get("ai_result"))
+    if disease:
+        delta["disease_counts"] = {disease: 1}
+
+    return delta
+
+
+def _merge_extreme(current: Optional[float], value: Optional[float], pick) -> Optional[float]:
+    if current is None:
+        return value
+    if value is None:
+        return current
+    return pick(current, value)
+
+
+def merge_deltas(base: Dict[str, Any], delta: Mapping[str, Any]) -> Dict[str, Any]:
+    """Add `delta` into `base` in place, using the same rules as `apply_cycle_rollups`."""
+    for key in ("cycle_count", "temp_count", "temp_sum", "hum_count", "hum_sum", "wetness_count", "wetness_sum"):
+        base[key] += delta.get(key) or 0
+    for prefix in ("temp", "hum"):
+        base[f"{prefix}_min"] = _merge_extreme(base[f"{prefix}_min"], delta.get(f"{prefix}_min"), min)
+        base[f"{prefix}_max"] = _merge_extreme(base[f"{prefix}_max"], delta.get(f"{prefix}_max"), max)
+    for key in _COUNT_FIELDS:
+        counts = base[key]
+        for label, count in (delta.get(key) or {}).items():
+            counts[label] = counts.get(label, 0) + count
+    return base
+
+
+def rollup_rows(payload: Mapping[str, Any]) -> List[Dict[str, Any]]:
+    """Return one rollup row per granularity for a single cycle payload."""
+    delta = cycle_delta(payload)
+    device_id = payload.get("device_id") or DEFAULT_DEVICE_ID
+    return [
+        {
+            "device_id": device_id,
+            "granularity": granularity,
+            "bucket_start": bucket_start(payload.get("timestamp"), granularity),
+            "delta": delta,
+        }
+        for granularity in ROLLUP_GRANULARITIES
+    ]
+
+
+def aggregate_rollup_rows(payloads: Iterable[Mapping[str, Any]]) -> List[Dict[str, Any]]:
+    """Pre-aggregate many cycle payloads into one row per (device, granularity, bucket)."""
+    buckets: Dict[tuple, Dict[str, Any]] = {}
+    for payload in payloads:
+        for row in rollup_rows(payload):
+            key = (row["device_id"], row["granularity"], row["bucket_start"])
+            merge_deltas(buckets.setdefault(key, empty_delta()), row["delta"])
+    return [
+        {"device_id": device_id, "granularity": granularity, "bucket_start": start, "delta": delta}
+        for (device_id, granularity, start), delta in sorted(buckets.items())
+    ]
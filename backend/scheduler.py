@@ -0,0 +1,100 @@
+import argparse
+import asyncio
+import datetime
+import random
+import re
+import time
+from typing import Any, Awaitable, Callable, Optional, Tuple
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)([hms])")
+_DURATION_UNITS = {"h": 3600, "m": 60, "s": 1}
+
+
+def parse_duration(value: str) -> float:
+    """Parse '15m', '90s', '1h30m' or a plain number of seconds."""
+    text = value.strip().lower()
+    try:
+        seconds = float(text)
+    except ValueError:
+        parts = _DURATION_PART.findall(text)
+        if not parts or "".join(number + unit for number, unit in parts) != text:
+            raise argparse.ArgumentTypeError(f"Invalid duration: {value!r} (use e.g. 90s, 15m, 1h30m)") from None
+        seconds = sum(float(number) * _DURATION_UNITS[unit] for number, unit in parts)
+    if seconds < 0:
+        raise argparse.ArgumentTypeError(f"Duration must not be negative: {value!r}")
+    return seconds
+
+
+def parse_quiet_hours(value: str) -> Tuple[datetime.time, datetime.time]:
+    """Parse a local-time window like '22:00-06:00' (may wrap past midnight)."""
+    try:
+        start_text, end_text = value.split("-", 1)
+        start = datetime.time.fromisoformat(start_text.strip())
+        end = datetime.time.fromisoformat(end_text.strip())
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid quiet hours: {value!r} (use HH:MM-HH:MM)") from None
+    return start, end
+
+
+def in_quiet_hours(now: datetime.time, quiet_hours: Optional[Tuple[datetime.time, datetime.time]]) -> bool:
+    if quiet_hours is None:
+        return False
+    start, end = quiet_hours
+    if start <= end:
+        return start <= now < end
+    return now >= start or now < end
+
+
+class CycleScheduler:
+    """Trigger cycles every `interval` seconds inside one long-lived process.
+
+    Ticks are anchored to the monotonic clock at start-up, so cycle runtime
+    and sleep overshoot never accumulate into drift. Jitter delays each tick
+    by up to `jitter` seconds without moving the anchor. Ticks that fall in
+    quiet hours are skipped, and ticks missed while a cycle overran are
+    dropped rather than run back to back.
+    """
+
+    def __init__(
+        self,
+        logger,
+        interval: float,
+        jitter: float = 0.0,
+        quiet_hours: Optional[Tuple[datetime.time, datetime.time]] = None,
+    ):
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        if jitter >= interval:
+            raise ValueError("jitter must be smaller than the interval")
+
+        self.log = logger
+        self.interval = interval
+        self.jitter = jitter
+        self.quiet_hours = quiet_hours
+        self.ticks = 0
+        self.skipped_ticks = 0
+
+    async def run(self, trigger: Callable[[], Awaitable[Any]]) -> None:
+        next_due = time.monotonic()
+        while True:
+            delay = next_due + random.uniform(0, self.jitter) - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            self.ticks += 1
+            if in_quiet_hours(datetime.datetime.now().time(), self.quiet_hours):
+                self.log.info("Scheduler", "Quiet hours, skipping scheduled cycle")
+            else:
+                try:
+                    await trigger()
+                except Exception as exc:  # pylint: disable=broad-exception-caught
+                    self.log.error("Scheduler", f"Scheduled cycle failed: {exc}")
+
+            next_due += self.interval
+            now = time.monotonic()
+            if now >= next_due:
+                missed = int((now - next_due) // self.interval) + 1
+                next_due += missed * self.interval
+                self.skipped_ticks += missed
+                self.log.warning("Scheduler", f"Cycle overran the interval, skipped {missed} tick(s)")
+            self.log.info("Scheduler", f"Next cycle in {next_due - now:.0f}s")
@@ -0,0 +1,59 @@
+"""Compact encodings for multi-pin sensor arrays stored in `sensor_readings`.
+
+Soil readings become a bitmask (bit i set = pin i reads DRY) plus a pin count;
+DHT temperature/humidity become int16 values scaled by `DHT_SCALE`. The SQL
+counterparts live in schema.sql (`decode_soil_mask`, `decode_x10`).
+"""
+
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+DHT_SCALE = 10
+INT16_MIN = -32768
+INT16_MAX = 32767
+MAX_SOIL_PINS = 63
+
+
+def encode_soil(readings: Sequence[str]) -> Tuple[int, int]:
+    if len(readings) > MAX_SOIL_PINS:
+        raise ValueError(f"At most {MAX_SOIL_PINS} soil pins fit in a bitmask, got {len(readings)}")
+    mask = 0
+    for index, reading in enumerate(readings):
+        if str(reading).upper() == "DRY":
+            mask |= 1 << index
+    return mask, len(readings)
+
+
+def decode_soil(mask: Optional[int], pin_count: Optional[int]) -> Optional[List[str]]:
+    if mask is None or pin_count is None:
+        return None
+    return ["DRY" if (mask >> index) & 1 else "WET" for index in range(pin_count)]
+
+
+def encode_dht(values: Optional[Sequence[Optional[float]]]) -> List[Optional[int]]:
+    encoded: List[Optional[int]] = []
+    for value in values or []:
+        if value is None:
+            encoded.append(None)
+            continue
+        scaled = int(round(float(value) * DHT_SCALE))
+        if not INT16_MIN <= scaled <= INT16_MAX:
+            raise ValueError(f"DHT value {value} does not fit in int16 at scale {DHT_SCALE}")
+        encoded.append(scaled)
+    return encoded
+
+
+def decode_dht(values: Optional[Sequence[Optional[int]]]) -> Optional[List[Optional[float]]]:
+    if values is None:
+        return None
+    return [None if value is None else value / DHT_SCALE for value in values]
+
+
+def encode_sensor_arrays(payload: Mapping[str, Any]) -> Dict[str, Any]:
+    """Map a cycle payload's reading lists to the compact `sensor_readings` columns."""
+    soil_mask, soil_pin_count = encode_soil(payload.get("soil_readings") or [])
+    return {
+        "temp_x10": encode_dht(payload.get("temp_readings")),
+        "hum_x10": encode_dht(payload.get("hum_readings")),
+        "soil_mask": soil_mask,
+        "soil_pin_count": soil_pin_count,
+    }
@@ -1,13 +1,39 @@
+import asyncio
 import json
 import time
 
+from typing import Optional
+
 from backend.services.gpio_service import BaseGPIOManager
 
 
+class ActuatorSafetyError(ValueError):
+    """A manual actuator command was refused by a safety limit."""
+
+
 class ActuatorController:
-    def __init__(self, gpio: BaseGPIOManager, pump_duration: int = 5):
+    # Manual commands may not run the pump longer than this, nor more often than
+    # once per cooldown; a manual fan_on always turns itself off again.
+    MAX_MANUAL_PUMP_SECONDS = 30.0
+    MANUAL_PUMP_COOLDOWN_SECONDS = 10.0
+    MAX_MANUAL_FAN_SECONDS = 3600.0
+    # A cycle that wants to water waits this long for a manual run to finish,
+    # then skips watering instead of eating its stage deadline
+    CYCLE_PUMP_WAIT_SECONDS = 1.0
+
+    def __init__(self, gpio: BaseGPIOManager, pump_duration: int = 5, max_manual_pump: Optional[float] = None):
         self.gpio = gpio
         self.pump_duration = pump_duration
+        self.max_manual_pump = max_manual_pump if max_manual_pump is not None else self.MAX_MANUAL_PUMP_SECONDS
+        # Cycle and manual watering never overlap
+        self._pump_lock = asyncio.Lock()
+        # End of the last pump run, cycle or manual; the manual cooldown counts from it
+        self._last_pump_end: Optional[float] = None
+        self._fan_timer: Optional[asyncio.Task] = None
+
+    @property
+    def pump_busy(self) -> bool:
+        return self._pump_lock.locked()
 
     @staticmethod
     def _to_bool(value):
@@ -42,8 +68,8 @@ class ActuatorController:
 
         return {}
 
-    def apply(self, ai_result, temp, soil_majority):
-        actions = []
+    def plan(self, ai_result, temp, soil_majority):
+        """Return (fan_on, water) for an analysis result without touching the hardware."""
         rec = self._as_recommendation(ai_result)
 
         try:
@@ -51,16 +77,111 @@ class ActuatorController:
         except (TypeError, ValueError):
             temp_value = 0.0
 
-        if self._to_bool(rec.get("increase_airflow", False)) or temp_value > 30:
+        fan_on = self._to_bool(rec.get("increase_airflow", False)) or temp_value > 30
+        water = self._to_bool(rec.get("water_plant", False)) and str(soil_majority).upper() == "DRY"
+        return fan_on, water
+
+    def apply(self, ai_result, temp, soil_majority):
+        actions = []
+        fan_on, water = self.plan(ai_result, temp, soil_majority)
+
+        if fan_on:
             self.gpio.fan_on()
             actions.append("Fan ON")
         else:
             self.gpio.fan_off()
 
-        if self._to_bool(rec.get("water_plant", False)) and str(soil_majority).upper() == "DRY":
+        if water:
             self.gpio.pump_on()
             time.sleep(self.pump_duration)
             self.gpio.pump_off()
             actions.append(f"Watered ({self.pump_duration}s)")
 
         return ", ".join(actions) if actions else "None"
+
+    async def apply_async(self, ai_result, temp, soil_majority, executor=None):
+        """Like `apply`, with GPIO calls on `executor`; the pump is switched off even if cancelled."""
+        loop = asyncio.get_running_loop()
+        actions = []
+        fan_on, water = self.plan(ai_result, temp, soil_majority)
+
+        # The cycle's decision replaces any manual fan timer
+        self._cancel_fan_timer()
+        if fan_on:
+            await loop.run_in_executor(executor, self.gpio.fan_on)
+            actions.append("Fan ON")
+        else:
+            await loop.run_in_executor(executor, self.gpio.fan_off)
+
+        if water:
+            try:
+                await asyncio.wait_for(self._pump_lock.acquire(), self.CYCLE_PUMP_WAIT_SECONDS)
+            except asyncio.TimeoutError:
+                # A manual pump_for is running; the plant is being watered already
+                actions.append("Pump busy")
+            else:
+                try:
+                    await self._run_pump(self.pump_duration, executor)
+                finally:
+                    self._pump_lock.release()
+                actions.append(f"Watered ({self.pump_duration}s)")
+
+        return ", ".join(actions) if actions else "None"
+
+    async def _run_pump(self, seconds: float, executor) -> None:
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(executor, self.gpio.pump_on)
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            await asyncio.shield(loop.run_in_executor(executor, self.gpio.pump_off))
+            self._last_pump_end = time.monotonic()
+
+    async def pump_for(self, seconds, executor=None) -> str:
+        """Run the pump for a manual command, enforcing the duration limit and cooldown."""
+        try:
+            seconds = float(seconds)
+        except (TypeError, ValueError):
+            raise ActuatorSafetyError(f"Invalid pump duration: {seconds!r}") from None
+        if not 0 < seconds <= self.max_manual_pump:
+            raise ActuatorSafetyError(f"Pump duration must be between 0 and {self.max_manual_pump:g}s")
+        if self.pump_busy:
+            raise ActuatorSafetyError("Pump is already running")
+        if self._last_pump_end is not None:
+            wait = self._last_pump_end + self.MANUAL_PUMP_COOLDOWN_SECONDS - time.monotonic()
+            if wait > 0:
+                raise ActuatorSafetyError(f"Pump cooling down, retry in {wait:.0f}s")
+
+        async with self._pump_lock:
+            await self._run_pump(seconds, executor)
+        return f"Watered ({seconds:g}s)"
+
+    async def set_fan(self, on: bool, seconds=None, executor=None) -> str:
+        """Switch the fan for a manual command; fan_on turns itself off after `seconds` (capped)."""
+        loop = asyncio.get_running_loop()
+        if not on:
+            self._cancel_fan_timer()
+            await loop.run_in_executor(executor, self.gpio.fan_off)
+            return "Fan OFF"
+
+        try:
+            seconds = float(seconds) if seconds is not None else self.MAX_MANUAL_FAN_SECONDS
+        except (TypeError, ValueError):
+            raise ActuatorSafetyError(f"Invalid fan duration: {seconds!r}") from None
+        if not 0 < seconds <= self.MAX_MANUAL_FAN_SECONDS:
+            raise ActuatorSafetyError(f"Fan duration must be between 0 and {self.MAX_MANUAL_FAN_SECONDS:g}s")
+
+        # Only a valid request replaces the running auto-off timer
+        self._cancel_fan_timer()
+        await loop.run_in_executor(executor, self.gpio.fan_on)
+        self._fan_timer = asyncio.create_task(self._fan_off_after(seconds, executor))
+        return f"Fan ON ({seconds:g}s)"
+
+    async def _fan_off_after(self, seconds: float, executor) -> None:
+        await asyncio.sleep(seconds)
+        await asyncio.get_running_loop().run_in_executor(executor, self.gpio.fan_off)
+
+    def _cancel_fan_timer(self) -> None:
+        if self._fan_timer is not None and not self._fan_timer.done():
+            self._fan_timer.cancel()
+        self._fan_timer = None
@@ -1,8 +1,16 @@
 import json
-from typing import Any, Dict, List
+import time
+from typing import Any, Dict, List, Optional
+
+try:
+    import orjson  # pylint: disable=import-error
+except ImportError:  # optional; only speeds up parsing
+    orjson = None
 
 from backend.config import Settings
 from backend.contracts import BasePlantAI
+from backend.metrics import GEMINI_ERRORS, GEMINI_REQUESTS, GEMINI_SECONDS
+from backend.prompt_store import prompt_params, render_prompt
 
 
 DEFAULT_AI_RESULT: Dict[str, Any] = {
@@ -91,6 +99,13 @@ def _default_ai_result() -> Dict[str, Any]:
     }
 
 
+_PRIORITIES = frozenset({"HIGH", "MEDIUM", "LOW"})
+_TRUE_STRINGS = frozenset({"1", "true", "yes", "on"})
+_FALSE_STRINGS = frozenset({"0", "false", "no", "off", ""})
+_NOT_A_DISEASE = frozenset({"", "no disease found", "unknown"})
+_DISEASE_TOKENS = ("disease", "infection", "fung", "rot", "pest")
+
+
 def _to_bool(value: Any) -> bool:
     if isinstance(value, bool):
         return value
@@ -98,9 +113,9 @@ def _to_bool(value: Any) -> bool:
         return value != 0
     if isinstance(value, str):
         normalized = value.strip().lower()
-        if normalized in {"1", "true", "yes", "on"}:
+        if normalized in _TRUE_STRINGS:
             return True
-        if normalized in {"0", "false", "no", "off", ""}:
+        if normalized in _FALSE_STRINGS:
             return False
     return bool(value)
 
@@ -132,7 +147,7 @@ def _to_optional_float(value: Any) -> Any:
 
 def _normalize_priority(value: Any) -> str:
     normalized = str(value).strip().upper()
-    return normalized if normalized in {"HIGH", "MEDIUM", "LOW"} else "LOW"
+    return normalized if normalized in _PRIORITIES else "LOW"
 
 
 def _soil_is_majority_dry(soil_summary: Any) -> bool:
@@ -185,7 +200,7 @@ def _derive_recommendation(
     todos: List[Dict[str, str]],
 ) -> Dict[str, bool]:
     temp_value = _to_float(temperature, 0.0)
-    disease_detected = disease_name.strip().lower() not in {"", "no disease found", "unknown"}
+    disease_detected = disease_name.strip().lower() not in _NOT_A_DISEASE
     todos_text = " ".join(
         f"{item.get('action', '')} {item.get('reason', '')}" for item in todos
     ).lower()
@@ -223,26 +238,162 @@ def _strip_code_fence(value: str) -> str:
     return value.replace("```json", "").replace("```", "").strip()
 
 
+# orjson reads integers wider than 64 bits as floats ("1e+30" once stringified)
+# where json keeps every digit. Such a number needs at least 19 digits in a row;
+# mapping every digit to "0" turns the search for one into a substring test.
+_DIGITS_TO_ZERO = bytes.maketrans(b"123456789", b"000000000")
+_LONG_DIGIT_RUN = b"0" * 19
+
+
+def _loads(text: str) -> Any:
+    if orjson is not None and _LONG_DIGIT_RUN not in text.encode("utf-8", "surrogatepass").translate(_DIGITS_TO_ZERO):
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
+            pass  # NaN/Infinity, lone surrogates: let json decide, as before
+    return json.loads(text)
+
+
 def _as_dict(value: Any) -> Dict[str, Any]:
     if isinstance(value, dict):
         return value
     if not isinstance(value, str):
         return {}
 
-    candidate = _strip_code_fence(value)
+    candidate = _strip_code_fence(value) if "```" in value else value.strip()
     try:
-        parsed = json.loads(candidate)
+        parsed = _loads(candidate)
     except json.JSONDecodeError:
         return {}
     return parsed if isinstance(parsed, dict) else {}
 
 
-def _normalize_ai_result(raw_result: Any) -> Dict[str, Any]:
-    raw_dict = _as_dict(raw_result)
-    result = _default_ai_result()
+def _closed_keys(schema: Dict[str, Any]) -> frozenset:
+    """Exact key set of an object schema that allows no extra keys and requires all of its own."""
+    keys = frozenset(schema["properties"])
+    if schema.get("additionalProperties", True) is not False or frozenset(schema.get("required", ())) != keys:
+        raise ValueError("AI_RESULT_SCHEMA objects must be closed with every property required")
+    return keys
+
+
+# AI_RESULT_SCHEMA precompiled into the checks the fast path makes inline
+_RESULT_PROPERTIES = AI_RESULT_SCHEMA["properties"]
+_TODO_SCHEMA = _RESULT_PROPERTIES["todos"]["items"]
+_RESULT_KEYS = _closed_keys(AI_RESULT_SCHEMA)
+_PLANT_KEYS = _closed_keys(_RESULT_PROPERTIES["plant"])
+_DISEASE_KEYS = _closed_keys(_RESULT_PROPERTIES["disease"])
+_ENVIRONMENT_KEYS = _closed_keys(_RESULT_PROPERTIES["environment"])
+_TODO_KEYS = _closed_keys(_TODO_SCHEMA)
+_TODO_PRIORITIES = frozenset(_TODO_SCHEMA["properties"]["priority"]["enum"])
+_CONFIDENCE_MIN = _RESULT_PROPERTIES["plant"]["properties"]["confidence"]["minimum"]
+_CONFIDENCE_MAX = _RESULT_PROPERTIES["plant"]["properties"]["confidence"]["maximum"]
+# Exact types as produced by json/orjson; bool is deliberately not a number
+_NUMBER_TYPES = (int, float)
 
-    if not raw_dict:
-        return result
+
+def _is_confidence(value: Any) -> bool:
+    # NaN fails the range check and goes to the general path
+    return type(value) in _NUMBER_TYPES and _CONFIDENCE_MIN <= value <= _CONFIDENCE_MAX
+
+
+def _demote_disease_todos(disease_name: str, todos: List[Dict[str, str]]) -> None:
+    if disease_name.lower() != "no disease found":
+        return
+    for todo in todos:
+        if todo["priority"] != "HIGH":
+            continue
+        todo_text = f"{todo['action']} {todo['reason']}".lower()
+        if any(token in todo_text for token in _DISEASE_TOKENS):
+            todo["priority"] = "MEDIUM"
+
+
+def _normalize_schema_result(raw_dict: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Fast path for output matching AI_RESULT_SCHEMA, i.e. Gemini with a response schema.
+
+    Validates and builds in one pass. Returns None as soon as anything falls
+    outside the schema, leaving the response to `_normalize_loose_result`;
+    otherwise the result is identical to what that would have returned.
+    """
+    # pylint: disable=unidiomatic-typecheck
+    if raw_dict.keys() != _RESULT_KEYS:
+        return None
+    plant, disease, environment, raw_todos = (
+        raw_dict["plant"],
+        raw_dict["disease"],
+        raw_dict["environment"],
+        raw_dict["todos"],
+    )
+    if (
+        type(plant) is not dict
+        or type(disease) is not dict
+        or type(environment) is not dict
+        or type(raw_todos) is not list
+        or plant.keys() != _PLANT_KEYS
+        or disease.keys() != _DISEASE_KEYS
+        or environment.keys() != _ENVIRONMENT_KEYS
+    ):
+        return None
+
+    plant_name, disease_name, disease_reason = plant["name"], disease["name"], disease["reason"]
+    temperature, humidity = environment["temperature"], environment["humidity"]
+    light, soil = environment["light"], environment["soil"]
+    if (
+        type(plant_name) is not str
+        or type(disease_name) is not str
+        or type(disease_reason) is not str
+        or type(light) is not str
+        or type(soil) is not str
+        or type(temperature) not in _NUMBER_TYPES
+        or type(humidity) not in _NUMBER_TYPES
+        or not _is_confidence(plant["confidence"])
+        or not _is_confidence(disease["confidence"])
+    ):
+        return None
+
+    todos: List[Dict[str, str]] = []
+    for item in raw_todos:
+        if type(item) is not dict or item.keys() != _TODO_KEYS:
+            return None
+        action, priority, reason = item["action"], item["priority"], item["reason"]
+        if (
+            type(action) is not str
+            or type(reason) is not str
+            or type(priority) is not str
+            or priority not in _TODO_PRIORITIES
+        ):
+            return None
+        action = action.strip()
+        if action:
+            todos.append({"action": action, "priority": priority, "reason": reason.strip() or "No reason provided."})
+
+    plant_name = plant_name.strip() or DEFAULT_AI_RESULT["plant"]["name"]
+    disease_name = disease_name.strip() or DEFAULT_AI_RESULT["disease"]["name"]
+    if plant_name.lower() == "no plant detected":
+        disease_name = "Unknown"
+        disease_reason = "Plant not detected, disease classification is unknown."
+
+    temperature = float(temperature)
+    if not todos:
+        todos = _default_todos(temperature, soil)
+    _demote_disease_todos(disease_name, todos)
+
+    return {
+        "plant": {"name": plant_name, "confidence": float(plant["confidence"])},
+        "disease": {"name": disease_name, "confidence": float(disease["confidence"]), "reason": disease_reason},
+        "environment": {"temperature": temperature, "humidity": float(humidity), "light": light, "soil": soil},
+        "todos": todos,
+        "recommendation": _derive_recommendation(
+            disease_name=disease_name,
+            temperature=temperature,
+            soil_summary=soil,
+            todos=todos,
+        ),
+    }
+
+
+def _normalize_loose_result(raw_dict: Dict[str, Any]) -> Dict[str, Any]:
+    """Coerce anything dict-shaped: flat legacy keys, wrong types, stringified sub-objects."""
+    result = _default_ai_result()
 
     plant_raw = raw_dict.get("plant", {})
     if isinstance(plant_raw, dict):
@@ -276,13 +427,7 @@ def _normalize_ai_result(raw_result: Any) -> Dict[str, Any]:
     if not todos:
         todos = _default_todos(env_temperature, env_soil)
 
-    if disease_name.lower() == "no disease found":
-        for todo in todos:
-            todo_text = f"{todo['action']} {todo['reason']}".lower()
-            if todo["priority"] == "HIGH" and any(
-                token in todo_text for token in {"disease", "infection", "fung", "rot", "pest"}
-            ):
-                todo["priority"] = "MEDIUM"
+    _demote_disease_todos(disease_name, todos)
 
     rec_raw = _as_dict(raw_dict.get("recommendation", {}))
     if rec_raw:
@@ -319,6 +464,14 @@ def _normalize_ai_result(raw_result: Any) -> Dict[str, Any]:
     return result
 
 
+def _normalize_ai_result(raw_result: Any) -> Dict[str, Any]:
+    raw_dict = _as_dict(raw_result)
+    if not raw_dict:
+        return _default_ai_result()
+    result = _normalize_schema_result(raw_dict)
+    return result if result is not None else _normalize_loose_result(raw_dict)
+
+
 class BaseAIService(BasePlantAI):
     PROMPT = """
 You are an agricultural AI in an IoT system.
@@ -394,120 +547,172 @@ Behavior Constraints:
         raise NotImplementedError
 
 
+def create_genai_client(settings: Settings):
+    """Gemini client for `settings`; GEMINI_BASE_URL points it at another endpoint, e.g. the local stand-in."""
+    from google import genai  # pylint: disable=import-error
+    from google.genai import types  # pylint: disable=import-error
+
+    http_options = types.HttpOptions(base_url=settings.gemini_base_url) if settings.gemini_base_url else None
+    return genai.Client(api_key=settings.gemini_api_key, http_options=http_options)
+
+
 class RealAIService(BaseAIService):
-    def __init__(self, settings: Settings, image_path: str, logger):
+    def __init__(self, settings: Settings, image_path: str, logger, client=None):
         super().__init__(settings, image_path, logger)
 
-        from google import genai  # pylint: disable=import-error
         from google.genai import types  # pylint: disable=import-error
 
         if not self.settings.gemini_api_key:
             raise ValueError("GEMINI_API_KEY is required in non-mock mode")
 
         self._types = types
-        self._client = genai.Client(api_key=self.settings.gemini_api_key)
+        # Stations in one process can pass a shared client to reuse its connection pool.
+        self._client = client or create_genai_client(self.settings)
         self._model = "gemini-2.5-flash-lite"
 
-    def analyze(self, temp: Any, humidity: Any, light: str, soil_summary: str):
+    def _request(self, temp: Any, humidity: Any, light: str, soil_summary: str):
         with open(self.image_path, "rb") as image_file:
             image = image_file.read()
 
-        prompt_text = self.PROMPT.format(temp=temp, humidity=humidity, light=light, soil=soil_summary)
+        prompt_text = render_prompt(self.PROMPT, prompt_params(temp, humidity, light, soil_summary))
         content = [
             prompt_text,
             self._types.Part.from_bytes(data=image, mime_type="image/jpeg"),
         ]
+        config = self._types.GenerateContentConfig(
+            response_mime_type="application/json",
+            response_json_schema=AI_RESULT_SCHEMA,
+        )
+        return prompt_text, content, config
+
+    def _parse_response(self, response, prompt_text: str):
+        response_text = (response.text or "").strip()
+        if not response_text:
+            return self._error_result(ValueError("Gemini returned an empty response"), prompt_text, "empty")
+        self.log.debug("Gemini", response_text)
+        response_md = f"```json\n{response_text}\n```"
+        raw_dict = _as_dict(response_text)
+        if not raw_dict:
+            # Truncated, malformed or not an object: the cycle gets the default analysis
+            GEMINI_ERRORS.inc(device=self.settings.device_id, reason="invalid_json")
+            self.log.warning("Gemini", "Response is not a JSON object, using the default analysis")
+            return _default_ai_result(), prompt_text, response_md
+        return _normalize_ai_result(raw_dict), prompt_text, response_md
+
+    def _observe(self, started: float) -> None:
+        GEMINI_REQUESTS.inc(device=self.settings.device_id)
+        GEMINI_SECONDS.observe(time.monotonic() - started, device=self.settings.device_id)
+
+    def _error_result(self, exc: Exception, prompt_text: str, reason: str = "request"):
+        GEMINI_ERRORS.inc(device=self.settings.device_id, reason=reason)
+        self.log.error("Gemini", f"API error: {exc}")
+        return _default_ai_result(), prompt_text, f"```\nError: {exc}\n```"
 
+    def analyze(self, temp: Any, humidity: Any, light: str, soil_summary: str):
+        prompt_text, content, config = self._request(temp, humidity, light, soil_summary)
+        started = time.monotonic()
         try:
-            response = self._client.models.generate_content(
-                model=self._model,
-                contents=content,
-                config=self._types.GenerateContentConfig(
-                    response_mime_type="application/json",
-                    response_json_schema=AI_RESULT_SCHEMA,
-                ),
-            )
-            response_text = (response.text or "").strip()
-            if not response_text:
-                raise ValueError("Gemini returned an empty response")
-            self.log.debug("Gemini", response_text)
-            response_md = f"```json\n{response_text}\n```"
-            parsed = _normalize_ai_result(_strip_code_fence(response_text))
-            return parsed, prompt_text, response_md
+            try:
+                response = self._client.models.generate_content(model=self._model, contents=content, config=config)
+            finally:
+                self._observe(started)
+            return self._parse_response(response, prompt_text)
         except Exception as exc:  # pylint: disable=broad-exception-caught
-            self.log.error("Gemini", f"API error: {exc}")
-            return _default_ai_result(), prompt_text, f"```\nError: {exc}\n```"
+            return self._error_result(exc, prompt_text)
+
+    async def analyze_async(self, temp: Any, humidity: Any, light: str, soil_summary: str):
+        prompt_text, content, config = self._request(temp, humidity, light, soil_summary)
+        started = time.monotonic()
+        try:
+            try:
+                response = await self._client.aio.models.generate_content(
+                    model=self._model,
+                    contents=content,
+                    config=config,
+                )
+            finally:
+                self._observe(started)
+            return self._parse_response(response, prompt_text)
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            return self._error_result(exc, prompt_text)
+
+
+def mock_analysis(temp: Any, humidity: Any, light: Any, soil_summary: Any) -> Dict[str, Any]:
+    """Deterministic schema-shaped analysis for the sensor values, as Gemini would return it."""
+    soil_is_dry = "DRY" in str(soil_summary).upper()
+    try:
+        high_temp = float(temp) > 30
+    except (TypeError, ValueError):
+        high_temp = False
+
+    todos: List[Dict[str, str]] = []
+    if soil_is_dry:
+        todos.append(
+            {
+                "action": "Irrigate the plant",
+                "priority": "HIGH",
+                "reason": "Majority soil reading is DRY.",
+            }
+        )
+    if high_temp:
+        todos.append(
+            {
+                "action": "Reduce ambient temperature",
+                "priority": "HIGH",
+                "reason": "Temperature is above 30C.",
+            }
+        )
+        todos.append(
+            {
+                "action": "Increase airflow around the plant",
+                "priority": "MEDIUM",
+                "reason": "Higher temperature can stress the plant.",
+            }
+        )
+    if not todos:
+        todos.append(
+            {
+                "action": "Continue routine monitoring",
+                "priority": "LOW",
+                "reason": "No immediate intervention is required.",
+            }
+        )
+
+    return {
+        "plant": {
+            "name": "Healthy plant",
+            "confidence": 95.0,
+        },
+        "disease": {
+            "name": "No disease found",
+            "confidence": 96.0,
+            "reason": "No visible lesions, spotting, or rot detected.",
+        },
+        "environment": {
+            "temperature": _to_optional_float(temp),
+            "humidity": _to_optional_float(humidity),
+            "light": str(light),
+            "soil": str(soil_summary),
+        },
+        "todos": todos,
+    }
 
 
 class MockAIService(BaseAIService):
     def analyze(self, temp: Any, humidity: Any, light: str, soil_summary: str):
-        prompt_text = self.PROMPT.format(temp=temp, humidity=humidity, light=light, soil=soil_summary)
-
-        soil_is_dry = "DRY" in str(soil_summary).upper()
-        try:
-            high_temp = float(temp) > 30
-        except (TypeError, ValueError):
-            high_temp = False
-
-        todos: List[Dict[str, str]] = []
-        if soil_is_dry:
-            todos.append(
-                {
-                    "action": "Irrigate the plant",
-                    "priority": "HIGH",
-                    "reason": "Majority soil reading is DRY.",
-                }
-            )
-        if high_temp:
-            todos.append(
-                {
-                    "action": "Reduce ambient temperature",
-                    "priority": "HIGH",
-                    "reason": "Temperature is above 30C.",
-                }
-            )
-            todos.append(
-                {
-                    "action": "Increase airflow around the plant",
-                    "priority": "MEDIUM",
-                    "reason": "Higher temperature can stress the plant.",
-                }
-            )
-        if not todos:
-            todos.append(
-                {
-                    "action": "Continue routine monitoring",
-                    "priority": "LOW",
-                    "reason": "No immediate intervention is required.",
-                }
-            )
-
-        result = {
-            "plant": {
-                "name": "Healthy plant",
-                "confidence": 95.0,
-            },
-            "disease": {
-                "name": "No disease found",
-                "confidence": 96.0,
-                "reason": "No visible lesions, spotting, or rot detected.",
-            },
-            "environment": {
-                "temperature": _to_optional_float(temp),
-                "humidity": _to_optional_float(humidity),
-                "light": str(light),
-                "soil": str(soil_summary),
-            },
-            "todos": todos,
-        }
+        prompt_text = render_prompt(self.PROMPT, prompt_params(temp, humidity, light, soil_summary))
+        result = mock_analysis(temp, humidity, light, soil_summary)
         response_md = "```json\n" + json.dumps(result, indent=2) + "\n```"
         self.log.info("MockGemini", "Returned deterministic mock analysis")
         return _normalize_ai_result(result), prompt_text, response_md
 
+    async def analyze_async(self, temp: Any, humidity: Any, light: str, soil_summary: str):
+        return self.analyze(temp, humidity, light, soil_summary)
+
 
-def create_ai_service(is_mock: bool, settings: Settings, image_path: str, logger) -> BaseAIService:
+def create_ai_service(is_mock: bool, settings: Settings, image_path: str, logger, client=None) -> BaseAIService:
     if not is_mock and settings.gemini_api_key:
-        return RealAIService(settings=settings, image_path=image_path, logger=logger)
+        return RealAIService(settings=settings, image_path=image_path, logger=logger, client=client)
     if not is_mock:
         logger.warning("AI", "GEMINI_API_KEY not set, falling back to mock AI")
     return MockAIService(settings=settings, image_path=image_path, logger=logger)
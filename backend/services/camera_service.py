@@ -1,6 +1,7 @@
 import glob
 import platform
 import time
+from typing import Optional
 
 from backend.contracts import BaseCamera
 
@@ -22,6 +23,11 @@ class RealWebCamera(BaseCameraService):
     WARMUP_FRAMES = 8
     READ_RETRY_DELAY_SECONDS = 0.05
 
+    def __init__(self, image_path: str, logger, device_index: Optional[int] = None):
+        super().__init__(image_path, logger)
+        # A fixed index skips the scan, so stations sharing a host never grab each other's camera.
+        self.device_index = device_index
+
     @staticmethod
     def _is_black_frame(cv2_module, frame, mean_thresh: int = 10, std_thresh: int = 5) -> bool:
         if frame is None:
@@ -76,7 +82,10 @@ class RealWebCamera(BaseCameraService):
     def capture(self) -> bool:
         import cv2  # pylint: disable=import-error
 
-        device_index, backend = self._find_camera(cv2)
+        if self.device_index is not None:
+            device_index, backend = self.device_index, self._backends(cv2)[0]
+        else:
+            device_index, backend = self._find_camera(cv2)
         if device_index is None:
             self.log.error("WebCamera", "Capture aborted because no camera was detected")
             return False
@@ -152,8 +161,10 @@ class MockCameraService(BaseCameraService):
         return True
 
 
-def create_camera_service(is_mock: bool, image_path: str, logger) -> BaseCameraService:
+def create_camera_service(
+    is_mock: bool, image_path: str, logger, device_index: Optional[int] = None
+) -> BaseCameraService:
     if is_mock:
         return MockCameraService(image_path=image_path, logger=logger)
     logger.info("Camera", "Using real webcam (OpenCV)")
-    return RealWebCamera(image_path=image_path, logger=logger)
+    return RealWebCamera(image_path=image_path, logger=logger, device_index=device_index)
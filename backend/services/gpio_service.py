@@ -67,7 +67,8 @@ class RealGPIOManager(BaseGPIOManager):
     def cleanup(self) -> None:
         self._gpio.output(self.fan_pin, self._gpio.HIGH)
         self._gpio.output(self.pump_pin, self._gpio.HIGH)
-        self._gpio.cleanup()
+        # Only release our own pins; other stations in the same process may still be using theirs.
+        self._gpio.cleanup([self.ldr_pin, *self.soil_pins, self.fan_pin, self.pump_pin])
 
     def read_pin(self, pin: int) -> int:
         return int(self._gpio.input(pin))
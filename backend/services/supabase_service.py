@@ -1,9 +1,15 @@
+import asyncio
+import os
 import time
 import uuid
-from typing import Any, Dict, Mapping
+from typing import Any, Dict, Mapping, Optional
 
-from backend.config import Settings
+from backend.config import DEFAULT_DEVICE_ID, Settings
 from backend.contracts import BaseStorageService
+from backend.metrics import CACHE_REQUESTS, SUPABASE_WRITE_SECONDS
+from backend.prompt_store import compress_response, template_id
+from backend.rollups import empty_delta, merge_deltas, rollup_rows
+from backend.sensor_codec import encode_sensor_arrays
 
 
 class BaseSupabaseService(BaseStorageService):
@@ -14,7 +20,7 @@ class BaseSupabaseService(BaseStorageService):
     def upload_image(self, path: str) -> str:
         raise NotImplementedError
 
-    def log_cycle(self, payload: Mapping[str, Any]) -> None:
+    def log_cycle(self, payload: Mapping[str, Any]) -> Optional[str]:
         raise NotImplementedError
 
 
@@ -30,9 +36,16 @@ class RealSupabaseService(BaseSupabaseService):
             raise ValueError("SUPABASE_SERVICE_ROLE_KEY is required in non-mock mode")
 
         self._client = create_client(self.settings.supabase_url, self.settings.supabase_service_role_key)
+        self._async_client = None
+        self._async_client_loop = None
+        self._known_templates = set()
+
+    @staticmethod
+    def _image_file_name() -> str:
+        return f"plant_{int(time.time())}_{uuid.uuid4().hex[:8]}.jpg"
 
     def upload_image(self, path: str) -> str:
-        file_name = f"plant_{int(time.time())}_{uuid.uuid4().hex[:8]}.jpg"
+        file_name = self._image_file_name()
         with open(path, "rb") as image_file:
             image_bytes = image_file.read()
 
@@ -44,7 +57,65 @@ class RealSupabaseService(BaseSupabaseService):
         )
         return bucket.get_public_url(file_name)
 
-    def log_cycle(self, payload: Mapping[str, Any]) -> None:
+    def upload_profile(self, path: str) -> Optional[str]:
+        file_name = f"profiles/{os.path.basename(path)}"
+        with open(path, "rb") as profile_file:
+            profile_bytes = profile_file.read()
+
+        bucket = self._client.storage.from_(self.settings.supabase_storage_bucket)
+        bucket.upload(
+            path=file_name,
+            file=profile_bytes,
+            file_options={"content-type": "text/plain", "upsert": "false"},
+        )
+        return bucket.get_public_url(file_name)
+
+    def _device(self, payload: Mapping[str, Any]) -> str:
+        # Fleet stations share this service; each cycle carries its station's device id
+        return payload.get("device_id") or self.settings.device_id
+
+    def _template_cached(self, key: str, device: str) -> bool:
+        hit = key in self._known_templates
+        CACHE_REQUESTS.inc(device=device, cache="prompt_templates", result="hit" if hit else "miss")
+        return hit
+
+    def _ensure_prompt_template(self, template: str, device: str) -> str:
+        key = template_id(template)
+        if not self._template_cached(key, device):
+            self._client.table("prompt_templates").upsert(
+                {"id": key, "template": template},
+                on_conflict="id",
+                ignore_duplicates=True,
+            ).execute()
+            self._known_templates.add(key)
+        return key
+
+    def _prompt_columns(self, payload: Mapping[str, Any]) -> Dict[str, Any]:
+        template = payload.get("prompt_template")
+        if not template:
+            return {"prompt_markdown": payload.get("prompt_md")}
+        return {
+            "prompt_template_id": self._ensure_prompt_template(template, self._device(payload)),
+            "prompt_params": payload.get("prompt_params"),
+        }
+
+    @staticmethod
+    def _cycle_row(payload: Mapping[str, Any]) -> Dict[str, Any]:
+        return {
+            "captured_at": payload.get("timestamp"),
+            "device_id": payload.get("device_id") or DEFAULT_DEVICE_ID,
+            "trace_id": payload.get("trace_id"),
+            "image_url": payload.get("image_url"),
+        }
+
+    @staticmethod
+    def _child_rows(
+        payload: Mapping[str, Any],
+        cycle_id: Optional[str],
+        captured_at: Optional[str],
+        prompt_columns: Mapping[str, Any],
+    ) -> Dict[str, Dict[str, Any]]:
+        """Rows for the child tables, keyed by table name; see `_attach_cycle` for rows built ahead."""
         ai_result = payload.get("ai_result", {}) or {}
         recommendation = ai_result.get("recommendation", {}) or {}
         todos = ai_result.get("todos", []) or []
@@ -59,56 +130,161 @@ class RealSupabaseService(BaseSupabaseService):
             else ai_result.get("confidence")
         )
 
-        cycle_payload = {
-            "captured_at": payload.get("timestamp"),
-            "image_url": payload.get("image_url"),
-        }
-        cycle_insert = self._client.table("plant_cycles").insert(cycle_payload).execute()
-        if not cycle_insert.data:
-            raise RuntimeError("Supabase insert failed for plant_cycles")
-
-        cycle_id = cycle_insert.data[0]["id"]
-
-        self._client.table("sensor_readings").insert(
-            {
+        # Child tables are partitioned on their cycle's captured_at.
+        return {
+            "sensor_readings": {
                 "cycle_id": cycle_id,
+                "captured_at": captured_at,
                 "temp_c": payload.get("temp"),
                 "humidity_pct": payload.get("hum"),
                 "light_state": payload.get("light"),
                 "soil_summary": payload.get("soil_summary"),
                 "soil_majority": payload.get("soil_majority"),
-                "temp_readings": payload.get("temp_readings") or [],
-                "hum_readings": payload.get("hum_readings") or [],
-                "soil_readings": payload.get("soil_readings") or [],
+                **encode_sensor_arrays(payload),
                 "soil_wetness_pct": payload.get("soil_wetness_pct"),
-            }
-        ).execute()
-
-        self._client.table("ai_analyses").insert(
-            {
+            },
+            "ai_analyses": {
                 "cycle_id": cycle_id,
+                "captured_at": captured_at,
                 "disease": disease_name,
                 "plant": plant_name,
                 "confidence": confidence,
                 "todos": todos,
                 "recommendation": recommendation,
-                "prompt_markdown": payload.get("prompt_md"),
-                "response_markdown": payload.get("response_md"),
-            }
-        ).execute()
-
-        self._client.table("actuator_actions").insert(
-            {
+                **prompt_columns,
+                "response_zlib": compress_response(payload.get("response_md")),
+            },
+            "actuator_actions": {
                 "cycle_id": cycle_id,
+                "captured_at": captured_at,
                 "actions": payload.get("actions"),
-            }
-        ).execute()
+            },
+        }
+
+    @staticmethod
+    def _attach_cycle(child_rows: Dict[str, Dict[str, Any]], cycle: Mapping[str, Any]) -> Dict[str, Dict[str, Any]]:
+        for row in child_rows.values():
+            row["cycle_id"] = cycle["id"]
+            row["captured_at"] = cycle["captured_at"]
+        return child_rows
+
+    def log_cycle(self, payload: Mapping[str, Any]) -> Optional[str]:
+        started = time.monotonic()
+        # Child rows are built before anything is written: encoding can reject the
+        # payload (sensor_codec raises ValueError) and must not leave an orphan cycle.
+        child_rows = self._child_rows(payload, None, None, self._prompt_columns(payload))
+        cycle_insert = self._client.table("plant_cycles").insert(self._cycle_row(payload)).execute()
+        if not cycle_insert.data:
+            raise RuntimeError("Supabase insert failed for plant_cycles")
+
+        cycle = cycle_insert.data[0]
+        for table, row in self._attach_cycle(child_rows, cycle).items():
+            self._client.table(table).insert(row).execute()
+        SUPABASE_WRITE_SECONDS.observe(time.monotonic() - started, device=self._device(payload))
+
+        # Raw rows are already committed; a failed rollup update is repaired by
+        # `python db_mock.py backfill-rollups`, so it must not fail the cycle.
+        try:
+            self._client.rpc("apply_cycle_rollups", {"p_rows": rollup_rows(payload)}).execute()
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            self.log.warning("Supabase", f"Rollup update failed: {exc}")
+        return cycle["id"]
+
+    def log_timings(self, record: Mapping[str, Any]) -> None:
+        self._client.table("cycle_timings").insert(dict(record)).execute()
+
+    async def _get_async_client(self):
+        # The async client's HTTP pool is bound to the loop that created it.
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_client_loop is not loop:
+            from supabase import acreate_client  # pylint: disable=import-error
+
+            self._async_client = await acreate_client(
+                self.settings.supabase_url,
+                self.settings.supabase_service_role_key,
+            )
+            self._async_client_loop = loop
+        return self._async_client
+
+    async def upload_image_async(self, path: str) -> str:
+        client = await self._get_async_client()
+        file_name = self._image_file_name()
+        with open(path, "rb") as image_file:
+            image_bytes = image_file.read()
+
+        bucket = client.storage.from_(self.settings.supabase_storage_bucket)
+        await bucket.upload(
+            path=file_name,
+            file=image_bytes,
+            file_options={"content-type": "image/jpeg", "upsert": "false"},
+        )
+        return await bucket.get_public_url(file_name)
+
+    async def upload_profile_async(self, path: str) -> Optional[str]:
+        client = await self._get_async_client()
+        file_name = f"profiles/{os.path.basename(path)}"
+        with open(path, "rb") as profile_file:
+            profile_bytes = profile_file.read()
+
+        bucket = client.storage.from_(self.settings.supabase_storage_bucket)
+        await bucket.upload(
+            path=file_name,
+            file=profile_bytes,
+            file_options={"content-type": "text/plain", "upsert": "false"},
+        )
+        return await bucket.get_public_url(file_name)
+
+    async def _prompt_columns_async(self, client, payload: Mapping[str, Any]) -> Dict[str, Any]:
+        template = payload.get("prompt_template")
+        if not template:
+            return {"prompt_markdown": payload.get("prompt_md")}
+        key = template_id(template)
+        if not self._template_cached(key, self._device(payload)):
+            await client.table("prompt_templates").upsert(
+                {"id": key, "template": template},
+                on_conflict="id",
+                ignore_duplicates=True,
+            ).execute()
+            self._known_templates.add(key)
+        return {"prompt_template_id": key, "prompt_params": payload.get("prompt_params")}
+
+    async def log_cycle_async(self, payload: Mapping[str, Any]) -> Optional[str]:
+        client = await self._get_async_client()
+        started = time.monotonic()
+        # Built (and validated) before the cycle insert, as in log_cycle
+        child_rows = self._child_rows(payload, None, None, {})
+        prompt_columns, cycle_insert = await asyncio.gather(
+            self._prompt_columns_async(client, payload),
+            client.table("plant_cycles").insert(self._cycle_row(payload)).execute(),
+        )
+        if not cycle_insert.data:
+            raise RuntimeError("Supabase insert failed for plant_cycles")
+
+        # Child rows only depend on the cycle, so they are written concurrently.
+        cycle = cycle_insert.data[0]
+        child_rows["ai_analyses"].update(prompt_columns)
+        await asyncio.gather(
+            *(client.table(table).insert(row).execute() for table, row in self._attach_cycle(child_rows, cycle).items())
+        )
+        SUPABASE_WRITE_SECONDS.observe(time.monotonic() - started, device=self._device(payload))
+
+        try:
+            await client.rpc("apply_cycle_rollups", {"p_rows": rollup_rows(payload)}).execute()
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            self.log.warning("Supabase", f"Rollup update failed: {exc}")
+        return cycle["id"]
+
+    async def log_timings_async(self, record: Mapping[str, Any]) -> None:
+        client = await self._get_async_client()
+        await client.table("cycle_timings").insert(dict(record)).execute()
 
 
 class MockSupabaseService(BaseSupabaseService):
     def __init__(self, settings: Settings, logger):
         super().__init__(settings, logger)
         self.cycles = []
+        self.timings = []
+        self.rollups: Dict[tuple, Dict[str, Any]] = {}
 
     def upload_image(self, path: str) -> str:
         _ = path
@@ -116,9 +292,35 @@ class MockSupabaseService(BaseSupabaseService):
         self.log.info("MockStorage", f"Returning mock image URL: {mock_url}")
         return mock_url
 
-    def log_cycle(self, payload: Mapping[str, Any]) -> None:
-        self.cycles.append(dict(payload))
+    def upload_profile(self, path: str) -> Optional[str]:
+        mock_url = f"https://mock.local/supabase/profiles/{os.path.basename(path)}"
+        self.log.info("MockStorage", f"Returning mock profile URL: {mock_url}")
+        return mock_url
+
+    def log_cycle(self, payload: Mapping[str, Any]) -> Optional[str]:
+        encode_sensor_arrays(payload)  # rejects what the real service would
+        cycle_id = str(uuid.uuid4())
+        self.cycles.append({**payload, "id": cycle_id})
+        for row in rollup_rows(payload):
+            key = (row["device_id"], row["granularity"], row["bucket_start"])
+            merge_deltas(self.rollups.setdefault(key, empty_delta()), row["delta"])
         self.log.info("MockSupabase", f"Captured cycle in memory ({len(self.cycles)} total)")
+        return cycle_id
+
+    def log_timings(self, record: Mapping[str, Any]) -> None:
+        self.timings.append(dict(record))
+
+    async def upload_image_async(self, path: str) -> str:
+        return self.upload_image(path)
+
+    async def upload_profile_async(self, path: str) -> Optional[str]:
+        return self.upload_profile(path)
+
+    async def log_cycle_async(self, payload: Mapping[str, Any]) -> Optional[str]:
+        return self.log_cycle(payload)
+
+    async def log_timings_async(self, record: Mapping[str, Any]) -> None:
+        self.log_timings(record)
 
 
 def create_supabase_service(is_mock: bool, settings: Settings, logger) -> BaseSupabaseService:
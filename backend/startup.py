@@ -0,0 +1,120 @@
+"""Startup cost accounting for `--startup-report`.
+
+    python3 run.py --mock --startup-report
+
+Station services are built lazily (see `factories.LazyServices`); each build
+is timed here, split into time spent importing modules and time spent in
+constructors. Milestones (main entered, system ready, first sensor reading,
+first cycle done) are measured from the moment the backend package is
+imported, so the report shows what a one-shot or cron run waits for before
+its first reading. `python -X importtime run.py --help` gives the module
+level detail.
+"""
+
+import builtins
+import dataclasses
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Imported first by backend/__init__.py, so this is the backend's time zero
+BACKEND_IMPORTED = time.perf_counter()
+
+
+@dataclasses.dataclass
+class BuildTiming:
+    name: str
+    import_s: Optional[float]
+    init_s: float
+    thread: str
+    started_s: float
+
+
+_lock = threading.Lock()
+_marks: Dict[str, float] = {}
+_builds: List[BuildTiming] = []
+
+_import_state = threading.local()
+_original_import = builtins.__import__
+_import_hook_installed = False
+
+
+def mark(name: str) -> None:
+    """Record the first time a milestone is reached; later calls are ignored."""
+    now = time.perf_counter()
+    with _lock:
+        _marks.setdefault(name, now - BACKEND_IMPORTED)
+
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):  # pylint: disable=redefined-builtin
+    depth = getattr(_import_state, "depth", None)
+    if depth is None or depth > 0:
+        # Not timing this thread, or a nested import already counted by the outer one
+        return _original_import(name, globals, locals, fromlist, level)
+    _import_state.depth = 1
+    started = time.perf_counter()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        _import_state.seconds += time.perf_counter() - started
+        _import_state.depth = 0
+
+
+def enable_import_timing() -> None:
+    """Route `import` statements through a timer; only threads inside `timed_build` pay for it."""
+    global _import_hook_installed  # pylint: disable=global-statement
+    with _lock:
+        if not _import_hook_installed:
+            builtins.__import__ = _timed_import
+            _import_hook_installed = True
+
+
+def timed_build(name: str, build: Callable[[], Any]) -> Any:
+    measure_imports = _import_hook_installed
+    if measure_imports:
+        _import_state.depth = 0
+        _import_state.seconds = 0.0
+    started = time.perf_counter()
+    try:
+        return build()
+    finally:
+        total = time.perf_counter() - started
+        import_s = None
+        if measure_imports:
+            import_s = _import_state.seconds
+            _import_state.depth = None
+        with _lock:
+            _builds.append(
+                BuildTiming(
+                    name=name,
+                    import_s=import_s,
+                    init_s=total - (import_s or 0.0),
+                    thread=threading.current_thread().name,
+                    started_s=started - BACKEND_IMPORTED,
+                )
+            )
+
+
+def snapshot() -> Tuple[Dict[str, float], List[BuildTiming]]:
+    with _lock:
+        return dict(_marks), list(_builds)
+
+
+def format_report(marks: Dict[str, float], builds: List[BuildTiming]) -> List[str]:
+    lines = ["Milestones (ms after backend import):"]
+    for name, seconds in sorted(marks.items(), key=lambda item: item[1]):
+        lines.append(f"  {name:<16} {seconds * 1000:>9.1f}")
+    lines.append(f"{'Service':<10} {'start ms':>9} {'import ms':>10} {'init ms':>9}  thread")
+    for build in sorted(builds, key=lambda item: item.started_s):
+        import_ms = f"{build.import_s * 1000:.1f}" if build.import_s is not None else "-"
+        lines.append(
+            f"{build.name:<10} {build.started_s * 1000:>9.1f} {import_ms:>10} {build.init_s * 1000:>9.1f}  {build.thread}"
+        )
+    return lines
+
+
+def log_report(logger) -> None:
+    marks, builds = snapshot()
+    logger.section("Smart Plant System - Startup")
+    for line in format_report(marks, builds):
+        logger.info("Startup", line)
@@ -1,15 +1,60 @@
 create extension if not exists pgcrypto;
 
+-- Migration: move pre-partitioning history tables (and their indexes/sequences)
+-- aside so the partitioned tables below can take their names. Rows are copied
+-- back further down; the *_legacy tables can be dropped once verified.
+do $$
+declare
+  t text;
+  rel record;
+begin
+  foreach t in array array['actuator_actions', 'ai_analyses', 'sensor_readings', 'plant_cycles'] loop
+    if exists (
+      select 1 from pg_class c
+      where c.relnamespace = 'public'::regnamespace and c.relname = t and c.relkind = 'r'
+    ) then
+      for rel in select indexname from pg_indexes where schemaname = 'public' and tablename = t loop
+        execute format('alter index public.%I rename to %I', rel.indexname, rel.indexname || '_legacy');
+      end loop;
+      for rel in
+        select s.relname
+        from pg_class s
+        join pg_depend d on d.objid = s.oid and d.deptype in ('a', 'i')
+        join pg_class tbl on tbl.oid = d.refobjid
+        where s.relkind = 'S' and tbl.relnamespace = 'public'::regnamespace and tbl.relname = t
+      loop
+        execute format('alter sequence public.%I rename to %I', rel.relname, rel.relname || '_legacy');
+      end loop;
+      execute format('alter table public.%I rename to %I', t, t || '_legacy');
+    end if;
+  end loop;
+end $$;
+
+-- Prompt templates are stored once, keyed by the SHA-256 of the template text.
+-- ai_analyses rows reference one plus the parameters substituted into it.
+create table if not exists public.prompt_templates (
+  id text primary key,
+  template text not null,
+  created_at timestamptz not null default timezone('utc', now())
+);
+
+-- History tables are range-partitioned by month on captured_at. Child tables
+-- carry their cycle's captured_at so every row of a cycle lands in the same
+-- month and a whole month can be detached/dropped in one step.
 create table if not exists public.plant_cycles (
-  id uuid primary key default gen_random_uuid(),
+  id uuid not null default gen_random_uuid(),
   captured_at timestamptz not null default timezone('utc', now()),
+  device_id text not null default 'default',
+  trace_id text,
   image_url text,
-  created_at timestamptz not null default timezone('utc', now())
-);
+  created_at timestamptz not null default timezone('utc', now()),
+  primary key (id, captured_at)
+) partition by range (captured_at);
 
 create table if not exists public.sensor_readings (
-  id bigserial primary key,
-  cycle_id uuid not null unique references public.plant_cycles(id) on delete cascade,
+  id bigserial,
+  cycle_id uuid not null,
+  captured_at timestamptz not null,
   temp_c double precision,
   humidity_pct double precision,
   light_state text,
@@ -18,46 +63,599 @@ create table if not exists public.sensor_readings (
   temp_readings double precision[],
   hum_readings double precision[],
   soil_readings text[],
+  temp_x10 smallint[],
+  hum_x10 smallint[],
+  soil_mask bigint,
+  soil_pin_count smallint,
   soil_wetness_pct double precision,
-  created_at timestamptz not null default timezone('utc', now())
-);
+  created_at timestamptz not null default timezone('utc', now()),
+  primary key (id, captured_at),
+  unique (cycle_id, captured_at),
+  foreign key (cycle_id, captured_at) references public.plant_cycles (id, captured_at) on delete cascade
+) partition by range (captured_at);
 
 create table if not exists public.ai_analyses (
-  id bigserial primary key,
-  cycle_id uuid not null unique references public.plant_cycles(id) on delete cascade,
+  id bigserial,
+  cycle_id uuid not null,
+  captured_at timestamptz not null,
   disease text,
   plant text,
   confidence double precision,
   todos jsonb,
   recommendation jsonb,
+  prompt_template_id text references public.prompt_templates(id),
+  prompt_params jsonb,
+  response_zlib bytea,
   prompt_markdown text,
   response_markdown text,
-  created_at timestamptz not null default timezone('utc', now())
-);
+  created_at timestamptz not null default timezone('utc', now()),
+  primary key (id, captured_at),
+  unique (cycle_id, captured_at),
+  foreign key (cycle_id, captured_at) references public.plant_cycles (id, captured_at) on delete cascade
+) partition by range (captured_at);
 
 create table if not exists public.actuator_actions (
-  id bigserial primary key,
-  cycle_id uuid not null unique references public.plant_cycles(id) on delete cascade,
+  id bigserial,
+  cycle_id uuid not null,
+  captured_at timestamptz not null,
   actions text,
-  created_at timestamptz not null default timezone('utc', now())
+  created_at timestamptz not null default timezone('utc', now()),
+  primary key (id, captured_at),
+  unique (cycle_id, captured_at),
+  foreign key (cycle_id, captured_at) references public.plant_cycles (id, captured_at) on delete cascade
+) partition by range (captured_at);
+
+create table if not exists public.plant_cycles_default partition of public.plant_cycles default;
+create table if not exists public.sensor_readings_default partition of public.sensor_readings default;
+create table if not exists public.ai_analyses_default partition of public.ai_analyses default;
+create table if not exists public.actuator_actions_default partition of public.actuator_actions default;
+
+-- Create monthly partitions (<table>_pYYYYMM) for every history table, starting
+-- at p_from's month and covering p_months further months. Rows of that month
+-- already sitting in a table's _default partition are moved into the new
+-- partition before it is attached. Partitions get RLS enabled with no policies
+-- so they are only readable through the parents.
+create or replace function public.ensure_history_partitions(p_from date, p_months integer default 3)
+returns integer
+language plpgsql
+as $$
+declare
+  t text;
+  month_start timestamptz;
+  month_end timestamptz;
+  partition_name text;
+  pending text[];
+  created integer := 0;
+begin
+  for i in 0..greatest(p_months, 0) loop
+    month_start := (date_trunc('month', p_from) + make_interval(months => i))::timestamp at time zone 'utc';
+    month_end := month_start + interval '1 month';
+
+    pending := array[]::text[];
+    foreach t in array array['plant_cycles', 'sensor_readings', 'ai_analyses', 'actuator_actions'] loop
+      partition_name := format('%s_p%s', t, to_char(month_start at time zone 'utc', 'YYYYMM'));
+      if to_regclass('public.' || partition_name) is null then
+        pending := pending || t;
+      end if;
+    end loop;
+    continue when cardinality(pending) = 0;
+
+    -- Deleting the month's cycles from plant_cycles_default would cascade into
+    -- child partitions that already exist; leave such a half-built month alone.
+    if 'plant_cycles' = any(pending) and cardinality(pending) < 4 then
+      raise notice 'Skipping %: plant_cycles partition is missing but some child partitions exist',
+        to_char(month_start at time zone 'utc', 'YYYY-MM');
+      continue;
+    end if;
+
+    -- Build each partition as a plain table and copy the month's rows into it
+    foreach t in array pending loop
+      partition_name := format('%s_p%s', t, to_char(month_start at time zone 'utc', 'YYYYMM'));
+      execute format(
+        'create table public.%I (like public.%I including defaults including constraints)',
+        partition_name, t
+      );
+      execute format(
+        'insert into public.%I select * from public.%I where captured_at >= %L and captured_at < %L',
+        partition_name, t || '_default', month_start, month_end
+      );
+    end loop;
+
+    -- Children first, so removing the cycles cascades to nothing. Attaching
+    -- fails while the default partition still holds rows of the month.
+    foreach t in array array['actuator_actions', 'ai_analyses', 'sensor_readings', 'plant_cycles'] loop
+      continue when not t = any(pending);
+      execute format(
+        'delete from public.%I where captured_at >= %L and captured_at < %L',
+        t || '_default', month_start, month_end
+      );
+    end loop;
+
+    -- plant_cycles first, so the children's foreign keys find their cycles
+    foreach t in array pending loop
+      partition_name := format('%s_p%s', t, to_char(month_start at time zone 'utc', 'YYYYMM'));
+      execute format(
+        'alter table public.%I attach partition public.%I for values from (%L) to (%L)',
+        t, partition_name, month_start, month_end
+      );
+      execute format('alter table public.%I enable row level security', partition_name);
+      created := created + 1;
+    end loop;
+  end loop;
+  return created;
+end;
+$$;
+
+select public.ensure_history_partitions(
+  (date_trunc('month', timezone('utc', now())) - interval '1 month')::date,
+  4
 );
 
 -- Migration: add multi-sensor reading columns to existing tables
+alter table public.plant_cycles add column if not exists device_id text not null default 'default';
+alter table public.plant_cycles add column if not exists trace_id text;
 alter table public.sensor_readings add column if not exists temp_readings double precision[];
 alter table public.sensor_readings add column if not exists hum_readings double precision[];
 alter table public.sensor_readings add column if not exists soil_readings text[];
 alter table public.sensor_readings add column if not exists soil_wetness_pct double precision;
+alter table public.sensor_readings add column if not exists temp_x10 smallint[];
+alter table public.sensor_readings add column if not exists hum_x10 smallint[];
+alter table public.sensor_readings add column if not exists soil_mask bigint;
+alter table public.sensor_readings add column if not exists soil_pin_count smallint;
 alter table public.ai_analyses add column if not exists todos jsonb;
+alter table public.ai_analyses add column if not exists prompt_template_id text references public.prompt_templates(id);
+alter table public.ai_analyses add column if not exists prompt_params jsonb;
+alter table public.ai_analyses add column if not exists response_zlib bytea;
 
 create index if not exists idx_plant_cycles_captured_at on public.plant_cycles (captured_at desc);
+-- Per-device dashboards read "latest N cycles of one device"; this serves them
+-- without touching other devices' rows however large the fleet's history gets.
+create index if not exists idx_plant_cycles_device_captured_at on public.plant_cycles (device_id, captured_at desc);
+-- Trace lookups (`--trace`) fetch one cycle by the id logged with its command
+create index if not exists idx_plant_cycles_trace_id on public.plant_cycles (trace_id) where trace_id is not null;
 create index if not exists idx_sensor_readings_cycle_id on public.sensor_readings (cycle_id);
 create index if not exists idx_ai_analyses_cycle_id on public.ai_analyses (cycle_id);
 create index if not exists idx_actuator_actions_cycle_id on public.actuator_actions (cycle_id);
 
+-- BRIN indexes: rows arrive in time order, so a few KB of block ranges per
+-- partition serve time-range scans that would otherwise need full btrees.
+create index if not exists brin_plant_cycles_captured_at on public.plant_cycles using brin (captured_at);
+create index if not exists brin_plant_cycles_created_at on public.plant_cycles using brin (created_at);
+create index if not exists brin_sensor_readings_captured_at on public.sensor_readings using brin (captured_at);
+create index if not exists brin_ai_analyses_captured_at on public.ai_analyses using brin (captured_at);
+create index if not exists brin_actuator_actions_captured_at on public.actuator_actions using brin (captured_at);
+
+-- Migration: copy rows from the pre-partitioning tables renamed above
+do $$
+declare
+  first_month date;
+begin
+  if to_regclass('public.plant_cycles_legacy') is null then
+    return;
+  end if;
+  if exists (select 1 from public.plant_cycles limit 1) then
+    return;
+  end if;
+
+  select date_trunc('month', min(captured_at) at time zone 'utc')::date into first_month
+  from public.plant_cycles_legacy;
+  if first_month is not null then
+    perform public.ensure_history_partitions(
+      first_month,
+      (extract(year from age(date_trunc('month', timezone('utc', now())), first_month)) * 12
+        + extract(month from age(date_trunc('month', timezone('utc', now())), first_month)))::integer + 3
+    );
+  end if;
+
+  insert into public.plant_cycles (id, captured_at, image_url, created_at)
+  select id, captured_at, image_url, created_at from public.plant_cycles_legacy;
+
+  insert into public.sensor_readings (
+    id, cycle_id, captured_at, temp_c, humidity_pct, light_state, soil_summary, soil_majority,
+    temp_readings, hum_readings, soil_readings, soil_wetness_pct, created_at
+  )
+  select s.id, s.cycle_id, c.captured_at, s.temp_c, s.humidity_pct, s.light_state, s.soil_summary, s.soil_majority,
+    s.temp_readings, s.hum_readings, s.soil_readings, s.soil_wetness_pct, s.created_at
+  from public.sensor_readings_legacy s
+  join public.plant_cycles_legacy c on c.id = s.cycle_id;
+
+  insert into public.ai_analyses (
+    id, cycle_id, captured_at, disease, plant, confidence, todos, recommendation,
+    prompt_markdown, response_markdown, created_at
+  )
+  select a.id, a.cycle_id, c.captured_at, a.disease, a.plant, a.confidence, a.todos, a.recommendation,
+    a.prompt_markdown, a.response_markdown, a.created_at
+  from public.ai_analyses_legacy a
+  join public.plant_cycles_legacy c on c.id = a.cycle_id;
+
+  insert into public.actuator_actions (id, cycle_id, captured_at, actions, created_at)
+  select a.id, a.cycle_id, c.captured_at, a.actions, a.created_at
+  from public.actuator_actions_legacy a
+  join public.plant_cycles_legacy c on c.id = a.cycle_id;
+
+  perform setval(pg_get_serial_sequence('public.sensor_readings', 'id'), coalesce(max(id), 0) + 1, false)
+  from public.sensor_readings;
+  perform setval(pg_get_serial_sequence('public.ai_analyses', 'id'), coalesce(max(id), 0) + 1, false)
+  from public.ai_analyses;
+  perform setval(pg_get_serial_sequence('public.actuator_actions', 'id'), coalesce(max(id), 0) + 1, false)
+  from public.actuator_actions;
+end $$;
+
+-- Rollups: per-device, per-hour and per-day aggregates maintained incrementally by the backend
+create table if not exists public.cycle_rollups (
+  device_id text not null default 'default',
+  granularity text not null check (granularity in ('hour', 'day')),
+  bucket_start timestamptz not null,
+  cycle_count integer not null default 0,
+  temp_count integer not null default 0,
+  temp_sum double precision not null default 0,
+  temp_min double precision,
+  temp_max double precision,
+  temp_mean double precision generated always as (case when temp_count > 0 then temp_sum / temp_count end) stored,
+  hum_count integer not null default 0,
+  hum_sum double precision not null default 0,
+  hum_min double precision,
+  hum_max double precision,
+  hum_mean double precision generated always as (case when hum_count > 0 then hum_sum / hum_count end) stored,
+  wetness_count integer not null default 0,
+  wetness_sum double precision not null default 0,
+  wetness_mean double precision generated always as (case when wetness_count > 0 then wetness_sum / wetness_count end) stored,
+  light_counts jsonb not null default '{}'::jsonb,
+  soil_counts jsonb not null default '{}'::jsonb,
+  action_counts jsonb not null default '{}'::jsonb,
+  disease_counts jsonb not null default '{}'::jsonb,
+  updated_at timestamptz not null default timezone('utc', now()),
+  primary key (device_id, granularity, bucket_start)
+);
+
+-- Migration: rollups used to be fleet-wide, keyed by (granularity, bucket_start).
+-- Existing rows become the default device's; `python db_mock.py backfill-rollups`
+-- splits them by device.
+alter table public.cycle_rollups add column if not exists device_id text not null default 'default';
+do $$
+begin
+  if not exists (
+    select 1
+    from pg_constraint c
+    join pg_attribute a on a.attrelid = c.conrelid and a.attnum = any(c.conkey)
+    where c.conrelid = 'public.cycle_rollups'::regclass and c.contype = 'p' and a.attname = 'device_id'
+  ) then
+    alter table public.cycle_rollups drop constraint if exists cycle_rollups_pkey;
+    alter table public.cycle_rollups add primary key (device_id, granularity, bucket_start);
+  end if;
+end $$;
+
+-- Fleet-wide dashboards read all devices' buckets by time; the primary key serves one device
+create index if not exists idx_cycle_rollups_bucket on public.cycle_rollups (granularity, bucket_start desc);
+
+-- Per-stage cycle timings (see backend/timing.py). Kept apart from plant_cycles
+-- so aborted cycles, which write no plant_cycles row, are recorded too.
+-- stages: [{"name": "camera", "start_ms": 0, "duration_ms": 812, "outcome": "ok"}, ...]
+create table if not exists public.cycle_timings (
+  id bigserial primary key,
+  device_id text not null default 'default',
+  cycle_id uuid,
+  trace_id text,
+  started_at timestamptz not null,
+  outcome text not null,
+  total_ms integer not null,
+  stages jsonb not null default '[]'::jsonb,
+  created_at timestamptz not null default timezone('utc', now())
+);
+
+alter table public.cycle_timings add column if not exists trace_id text;
+
+create index if not exists idx_cycle_timings_device_started on public.cycle_timings (device_id, started_at desc);
+create index if not exists idx_cycle_timings_trace_id on public.cycle_timings (trace_id) where trace_id is not null;
+
+create or replace function public.jsonb_add_counts(base jsonb, delta jsonb)
+returns jsonb
+language sql
+immutable
+as $$
+  select coalesce(jsonb_object_agg(key, total), '{}'::jsonb)
+  from (
+    select key, sum(value::bigint) as total
+    from (
+      select key, value from jsonb_each_text(coalesce(base, '{}'::jsonb))
+      union all
+      select key, value from jsonb_each_text(coalesce(delta, '{}'::jsonb))
+    ) entries
+    group by key
+  ) totals;
+$$;
+
+-- Upsert-add rollup deltas built by backend/rollups.py.
+-- p_rows: [{"device_id": "bench-a", "granularity": "hour", "bucket_start": "...", "delta": {...}}, ...]
+create or replace function public.apply_cycle_rollups(p_rows jsonb)
+returns void
+language sql
+as $$
+  insert into public.cycle_rollups as r (
+    device_id, granularity, bucket_start, cycle_count,
+    temp_count, temp_sum, temp_min, temp_max,
+    hum_count, hum_sum, hum_min, hum_max,
+    wetness_count, wetness_sum,
+    light_counts, soil_counts, action_counts, disease_counts
+  )
+  select
+    coalesce(row_data->>'device_id', 'default'),
+    row_data->>'granularity',
+    (row_data->>'bucket_start')::timestamptz,
+    coalesce((row_data->'delta'->>'cycle_count')::integer, 0),
+    coalesce((row_data->'delta'->>'temp_count')::integer, 0),
+    coalesce((row_data->'delta'->>'temp_sum')::double precision, 0),
+    (row_data->'delta'->>'temp_min')::double precision,
+    (row_data->'delta'->>'temp_max')::double precision,
+    coalesce((row_data->'delta'->>'hum_count')::integer, 0),
+    coalesce((row_data->'delta'->>'hum_sum')::double precision, 0),
+    (row_data->'delta'->>'hum_min')::double precision,
+    (row_data->'delta'->>'hum_max')::double precision,
+    coalesce((row_data->'delta'->>'wetness_count')::integer, 0),
+    coalesce((row_data->'delta'->>'wetness_sum')::double precision, 0),
+    coalesce(row_data->'delta'->'light_counts', '{}'::jsonb),
+    coalesce(row_data->'delta'->'soil_counts', '{}'::jsonb),
+    coalesce(row_data->'delta'->'action_counts', '{}'::jsonb),
+    coalesce(row_data->'delta'->'disease_counts', '{}'::jsonb)
+  from jsonb_array_elements(p_rows) as row_data
+  on conflict (device_id, granularity, bucket_start) do update set
+    cycle_count = r.cycle_count + excluded.cycle_count,
+    temp_count = r.temp_count + excluded.temp_count,
+    temp_sum = r.temp_sum + excluded.temp_sum,
+    temp_min = least(r.temp_min, excluded.temp_min),
+    temp_max = greatest(r.temp_max, excluded.temp_max),
+    hum_count = r.hum_count + excluded.hum_count,
+    hum_sum = r.hum_sum + excluded.hum_sum,
+    hum_min = least(r.hum_min, excluded.hum_min),
+    hum_max = greatest(r.hum_max, excluded.hum_max),
+    wetness_count = r.wetness_count + excluded.wetness_count,
+    wetness_sum = r.wetness_sum + excluded.wetness_sum,
+    light_counts = public.jsonb_add_counts(r.light_counts, excluded.light_counts),
+    soil_counts = public.jsonb_add_counts(r.soil_counts, excluded.soil_counts),
+    action_counts = public.jsonb_add_counts(r.action_counts, excluded.action_counts),
+    disease_counts = public.jsonb_add_counts(r.disease_counts, excluded.disease_counts),
+    updated_at = timezone('utc', now());
+$$;
+
+-- Compact sensor arrays (see backend/sensor_codec.py): soil as a DRY bitmask
+-- plus pin count, DHT values as smallint scaled by 10.
+create or replace function public.encode_soil_readings(p_readings text[])
+returns bigint
+language sql
+immutable
+as $$
+  select coalesce(sum(1::bigint << (ord - 1)::integer) filter (where upper(r) = 'DRY'), 0)::bigint
+  from unnest(p_readings) with ordinality as u(r, ord);
+$$;
+
+create or replace function public.decode_soil_mask(p_mask bigint, p_count smallint)
+returns text[]
+language sql
+immutable
+as $$
+  select case
+    when p_mask is null or p_count is null then null
+    else coalesce(array_agg(case when (p_mask >> i) & 1 = 1 then 'DRY' else 'WET' end order by i), '{}')
+  end
+  from generate_series(0, coalesce(p_count, 0) - 1) as i;
+$$;
+
+create or replace function public.encode_x10(p_values double precision[])
+returns smallint[]
+language sql
+immutable
+as $$
+  select case
+    when p_values is null then null
+    else array(select round(v * 10)::smallint from unnest(p_values) with ordinality as u(v, ord) order by ord)
+  end;
+$$;
+
+create or replace function public.decode_x10(p_values smallint[])
+returns double precision[]
+language sql
+immutable
+as $$
+  select case
+    when p_values is null then null
+    else array(select (v / 10.0)::double precision from unnest(p_values) with ordinality as u(v, ord) order by ord)
+  end;
+$$;
+
+-- Migration: re-encode rows written with the text[]/double precision[] arrays
+update public.sensor_readings
+set
+  temp_x10 = public.encode_x10(temp_readings),
+  hum_x10 = public.encode_x10(hum_readings),
+  soil_mask = public.encode_soil_readings(soil_readings),
+  soil_pin_count = cardinality(soil_readings),
+  temp_readings = null,
+  hum_readings = null,
+  soil_readings = null
+where soil_mask is null
+  and (temp_readings is not null or hum_readings is not null or soil_readings is not null);
+
+-- Dashboard-compatible shape of sensor_readings with the arrays decoded.
+-- Embeddable from plant_cycles: select=sensor_readings:sensor_readings_compat(...)
+create or replace view public.sensor_readings_compat
+with (security_invoker = true)
+as
+select
+  id,
+  cycle_id,
+  captured_at,
+  temp_c,
+  humidity_pct,
+  light_state,
+  soil_summary,
+  soil_majority,
+  coalesce(public.decode_x10(temp_x10), temp_readings) as temp_readings,
+  coalesce(public.decode_x10(hum_x10), hum_readings) as hum_readings,
+  coalesce(public.decode_soil_mask(soil_mask, soil_pin_count), soil_readings) as soil_readings,
+  soil_wetness_pct,
+  created_at
+from public.sensor_readings;
+
+-- Rebuild a prompt exactly as Python's str.format() rendered it
+-- (see backend/prompt_store.py): {name} takes p_params->>name, {{ and }} unescape.
+create or replace function public.render_prompt_template(p_template text, p_params jsonb)
+returns text
+language sql
+immutable
+as $$
+  select string_agg(
+    case
+      when tok = '{{' then '{'
+      when tok = '}}' then '}'
+      when tok ~ '^\{[A-Za-z_]\w*\}$' then coalesce(p_params->>substr(tok, 2, length(tok) - 2), tok)
+      else tok
+    end,
+    '' order by ord
+  )
+  from regexp_matches(p_template, '\{\{|\}\}|\{[A-Za-z_]\w*\}|[^{}]+|[{}]', 'g') with ordinality as m(parts, ord),
+  lateral (select parts[1] as tok) token;
+$$;
+
+-- PostgREST computed field: select=ai_analyses(prompt_markdown:rendered_prompt)
+create or replace function public.rendered_prompt(a public.ai_analyses)
+returns text
+language sql
+stable
+as $$
+  select coalesce(
+    a.prompt_markdown,
+    (select public.render_prompt_template(t.template, a.prompt_params)
+     from public.prompt_templates t
+     where t.id = a.prompt_template_id)
+  );
+$$;
+
+-- Retention: used by backend/retention.py through PostgREST RPC.
+create or replace function public.list_history_partitions()
+returns table (month_start date, total_bytes bigint)
+language sql
+stable
+as $$
+  select
+    to_date(substring(c.relname from '_p(\d{6})$'), 'YYYYMM') as month_start,
+    sum(pg_total_relation_size(c.oid))::bigint as total_bytes
+  from pg_inherits i
+  join pg_class c on c.oid = i.inhrelid
+  join pg_class p on p.oid = i.inhparent
+  where p.relnamespace = 'public'::regnamespace
+    and p.relname in ('plant_cycles', 'sensor_readings', 'ai_analyses', 'actuator_actions')
+    and c.relname ~ '_p\d{6}$'
+  group by 1
+  order by 1;
+$$;
+
+-- Detach and drop one month of history (children first). Rollups are kept.
+-- Returns the on-disk bytes of the dropped partitions.
+create or replace function public.drop_history_partition(p_month date)
+returns bigint
+language plpgsql
+as $$
+declare
+  t text;
+  partition_name text;
+  reclaimed bigint := 0;
+begin
+  foreach t in array array['actuator_actions', 'ai_analyses', 'sensor_readings', 'plant_cycles'] loop
+    partition_name := format('%s_p%s', t, to_char(p_month, 'YYYYMM'));
+    continue when to_regclass('public.' || partition_name) is null;
+    reclaimed := reclaimed + pg_total_relation_size(('public.' || partition_name)::regclass);
+    execute format('alter table public.%I detach partition public.%I', t, partition_name);
+    execute format('drop table public.%I', partition_name);
+  end loop;
+  return reclaimed;
+end;
+$$;
+
+-- Keep the first cycle of every hour per device in the month, delete the rest and strip
+-- the prompt/response text of the survivors. Returns the logical bytes freed
+-- (space is returned to the partition on the next vacuum) and the image URLs of
+-- the deleted cycles, whose objects the caller removes from storage.
+-- Migration: the function used to return only the bytes (bigint)
+drop function if exists public.downsample_history_partition(date);
+create or replace function public.downsample_history_partition(p_month date)
+returns jsonb
+language plpgsql
+as $$
+declare
+  month_start timestamptz := date_trunc('month', p_month)::timestamp at time zone 'utc';
+  month_end timestamptz := month_start + interval '1 month';
+  doomed uuid[];
+  doomed_images text[];
+  freed bigint;
+  reclaimed bigint := 0;
+begin
+  select coalesce(array_agg(id), '{}'), coalesce(array_agg(image_url) filter (where image_url is not null), '{}')
+  into doomed, doomed_images
+  from (
+    select id, image_url,
+      row_number() over (partition by device_id, date_trunc('hour', captured_at) order by captured_at, id) as rn
+    from public.plant_cycles
+    where captured_at >= month_start and captured_at < month_end
+  ) ranked
+  where rn > 1;
+
+  with gone as (
+    delete from public.actuator_actions t
+    where t.captured_at >= month_start and t.captured_at < month_end and t.cycle_id = any(doomed)
+    returning pg_column_size(t.*) as bytes
+  ) select coalesce(sum(bytes), 0) into freed from gone;
+  reclaimed := reclaimed + freed;
+
+  with gone as (
+    delete from public.ai_analyses t
+    where t.captured_at >= month_start and t.captured_at < month_end and t.cycle_id = any(doomed)
+    returning pg_column_size(t.*) as bytes
+  ) select coalesce(sum(bytes), 0) into freed from gone;
+  reclaimed := reclaimed + freed;
+
+  with gone as (
+    delete from public.sensor_readings t
+    where t.captured_at >= month_start and t.captured_at < month_end and t.cycle_id = any(doomed)
+    returning pg_column_size(t.*) as bytes
+  ) select coalesce(sum(bytes), 0) into freed from gone;
+  reclaimed := reclaimed + freed;
+
+  with gone as (
+    delete from public.plant_cycles t
+    where t.captured_at >= month_start and t.captured_at < month_end and t.id = any(doomed)
+    returning pg_column_size(t.*) as bytes
+  ) select coalesce(sum(bytes), 0) into freed from gone;
+  reclaimed := reclaimed + freed;
+
+  with old as (
+    select id, captured_at,
+      coalesce(pg_column_size(prompt_markdown), 0)
+        + coalesce(pg_column_size(response_markdown), 0)
+        + coalesce(pg_column_size(response_zlib), 0) as bytes
+    from public.ai_analyses
+    where captured_at >= month_start and captured_at < month_end
+      and (prompt_markdown is not null or response_markdown is not null or response_zlib is not null)
+  ), stripped as (
+    update public.ai_analyses t
+    set prompt_markdown = null, response_markdown = null, response_zlib = null
+    from old
+    where t.id = old.id and t.captured_at = old.captured_at
+    returning old.bytes
+  ) select coalesce(sum(bytes), 0) into freed from stripped;
+  reclaimed := reclaimed + freed;
+
+  return jsonb_build_object('bytes', reclaimed, 'image_urls', to_jsonb(doomed_images));
+end;
+$$;
+
 alter table public.plant_cycles enable row level security;
 alter table public.sensor_readings enable row level security;
 alter table public.ai_analyses enable row level security;
 alter table public.actuator_actions enable row level security;
+alter table public.cycle_rollups enable row level security;
+alter table public.prompt_templates enable row level security;
+-- Service role only: no read policy
+alter table public.cycle_timings enable row level security;
 
 drop policy if exists plant_cycles_read on public.plant_cycles;
 create policy plant_cycles_read
@@ -83,13 +681,30 @@ on public.actuator_actions
 for select
 using (true);
 
+drop policy if exists prompt_templates_read on public.prompt_templates;
+create policy prompt_templates_read
+on public.prompt_templates
+for select
+using (true);
+
+drop policy if exists cycle_rollups_read on public.cycle_rollups;
+create policy cycle_rollups_read
+on public.cycle_rollups
+for select
+using (true);
+
 insert into storage.buckets (id, name, public)
 values ('plant-images', 'plant-images', true)
 on conflict (id) do nothing;
 
+-- Cold bucket for images moved out of plant-images by the retention job
+insert into storage.buckets (id, name, public)
+values ('plant-images-cold', 'plant-images-cold', true)
+on conflict (id) do nothing;
+
 drop policy if exists storage_public_read on storage.objects;
 create policy storage_public_read
 on storage.objects
 for select
 to public
-using (bucket_id = 'plant-images');
+using (bucket_id in ('plant-images', 'plant-images-cold'));
@@ -1,60 +1,313 @@
+import asyncio
 import datetime
 
+from backend import startup
 from backend.config import Settings
-from backend.factories import build_services
+from backend.factories import LazyServices
+from backend.metrics import DHT_FAILURES, DHT_READS, observe_cycle
+from backend.profiling import StackSampler
+from backend.prompt_store import prompt_params
 from backend.services.actuator_service import ActuatorController
+from backend.telemetry import CycleStats
+from backend.timing import current_spans, span, timed_cycle
+from backend.tracing import ContextThreadPoolExecutor, current_trace_id, trace
+
+
+_FLAG_VALUES = {"true": True, "1": True, "false": False, "0": False}
+
+
+def _parse_flag(value) -> bool:
+    """A command payload flag: a JSON bool, 0/1, or "true"/"false"/"1"/"0"."""
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int) and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str) and value.strip().lower() in _FLAG_VALUES:
+        return _FLAG_VALUES[value.strip().lower()]
+    raise ValueError(f"Invalid flag value: {value!r}")
+
+
+class StageDeadlineExceeded(Exception):
+    def __init__(self, stage: str, seconds: float):
+        super().__init__(f"Stage '{stage}' exceeded its {seconds:.0f}s deadline")
+        self.stage = stage
+        self.seconds = seconds
 
 
 class SmartPlantSystem:
-    def __init__(self, args, settings: Settings, logger):
+    # Seconds each cycle stage may take before the cycle is aborted. The
+    # actuator stage also gets the configured pump duration on top.
+    STAGE_DEADLINES = {
+        "camera": 30.0,
+        "sensors": 60.0,
+        "upload": 30.0,
+        "ai": 60.0,
+        "actuators": 10.0,
+        "log": 30.0,
+    }
+    # Services built in background threads at construction unless --no-warm, so
+    # the slow imports and client setup (supabase, google.genai, DHT/GPIO)
+    # overlap each other and the first camera capture.
+    WARM_ORDER = ("storage", "ai", "sensors")
+
+    def __init__(self, args, settings: Settings, logger, shared=None):
         self.args = args
         self.settings = settings
         self.log = logger
 
-        services = build_services(args=args, settings=settings, logger=logger)
-        self.gpio = services["gpio"]
-        self.sensors = services["sensors"]
-        self.camera = services["camera"]
-        self.storage = services["storage"]
-        self.ai = services["ai"]
+        # Nothing is imported or opened until first use; warming starts the
+        # builds in the background so the first cycle rarely waits for them.
+        self.services = LazyServices(args=args, settings=settings, logger=logger, shared=shared)
+        if not args.no_warm:
+            self.services.warm(self.WARM_ORDER)
+        self._actuators = None
+        self._startup_reported = False
+        # Camera, sensor and GPIO drivers block; one worker keeps hardware access serialized.
+        self._hardware = ContextThreadPoolExecutor(max_workers=1, thread_name_prefix="hardware")
+        # Relay writes get their own worker so manual fan/pump commands never wait behind a capture.
+        self._relays = ContextThreadPoolExecutor(max_workers=1, thread_name_prefix="relays")
+        self.stage_deadlines = dict(self.STAGE_DEADLINES)
+        self.stage_deadlines["actuators"] += args.pump_duration
+        self.max_runtime = args.max_runtime
+        self.stats = CycleStats()
+        self.sensor_health = None
+        # Trace id of the running cycle, None while idle
+        self.trace_id = None
+        # {"upload": bool} while the next cycle is to be profiled
+        self._profile_request = {"upload": args.profile_upload} if args.profile else None
+
+        startup.mark("system_ready")
+
+    @property
+    def gpio(self):
+        return self.services.get("gpio")
+
+    @property
+    def sensors(self):
+        return self.services.get("sensors")
+
+    @property
+    def camera(self):
+        return self.services.get("camera")
+
+    @property
+    def storage(self):
+        return self.services.get("storage")
+
+    @property
+    def ai(self):
+        return self.services.get("ai")
 
-        self.actuators = ActuatorController(self.gpio, pump_duration=args.pump_duration)
+    @property
+    def actuators(self) -> ActuatorController:
+        if self._actuators is None:
+            self._actuators = ActuatorController(
+                self.gpio, pump_duration=self.args.pump_duration, max_manual_pump=self.args.max_manual_pump
+            )
+        return self._actuators
 
     def run(self) -> None:
+        asyncio.run(self.run_async())
+
+    async def _service_call(self, executor, name: str, method: str, *args):
+        """Call a service method on `executor`; a first use builds the service there, off the event loop."""
+        return await asyncio.get_running_loop().run_in_executor(
+            executor, lambda: getattr(self.services.get(name), method)(*args)
+        )
+
+    async def _stage(self, name: str, awaitable):
+        seconds = self.stage_deadlines[name]
+        try:
+            with span(name):
+                return await asyncio.wait_for(awaitable, seconds)
+        except asyncio.TimeoutError as exc:
+            raise StageDeadlineExceeded(name, seconds) from exc
+
+    async def _read_sensors(self):
+        with span("dht"):
+            temp_readings, hum_readings = await self._service_call(self._hardware, "sensors", "read_dht")
+        dht_ok = sum(1 for t, h in zip(temp_readings, hum_readings) if t is not None and h is not None)
+        DHT_READS.inc(len(temp_readings), device=self.settings.device_id)
+        DHT_FAILURES.inc(len(temp_readings) - dht_ok, device=self.settings.device_id)
+        with span("soil_light"):
+            light = await self._service_call(self._hardware, "sensors", "read_light")
+            soil_summary, soil_majority, soil_readings = await self._service_call(self._hardware, "sensors", "read_soil")
+        self.sensor_health = {
+            "checked_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "dht_ok": dht_ok,
+            "dht_total": len(temp_readings),
+            "soil_pins": len(soil_readings),
+            "light": light,
+        }
+        startup.mark("first_reading")
+        return temp_readings, hum_readings, light, soil_summary, soil_majority, soil_readings
+
+    @staticmethod
+    def _average(readings):
+        valid = [value for value in readings if value is not None]
+        return round(sum(valid) / len(valid), 1) if valid else None
+
+    async def read_sensors_only(self):
+        """Read every sensor once, without the camera, AI, actuators or storage."""
+        (
+            temp_readings,
+            hum_readings,
+            light,
+            soil_summary,
+            soil_majority,
+            soil_readings,
+        ) = await self._stage("sensors", self._read_sensors())
+        return {
+            "temp": self._average(temp_readings),
+            "hum": self._average(hum_readings),
+            "temp_readings": temp_readings,
+            "hum_readings": hum_readings,
+            "light": light,
+            "soil_summary": soil_summary,
+            "soil_majority": soil_majority,
+            "soil_readings": soil_readings,
+        }
+
+    async def pump_for(self, seconds) -> str:
+        return await self.actuators.pump_for(seconds, executor=self._relays)
+
+    async def set_fan(self, on: bool, seconds=None) -> str:
+        return await self.actuators.set_fan(on, seconds, executor=self._relays)
+
+    async def profile_next_cycle(self, upload=None) -> str:
+        """Arm the profiler for the next cycle, whichever way it is started."""
+        self._profile_request = {"upload": self.args.profile_upload if upload is None else _parse_flag(upload)}
+        return "Next cycle will be profiled"
+
+    async def run_async(self) -> None:
+        # Commands arrive with a trace id; scheduled and standalone cycles get a new one.
+        try:
+            with trace(current_trace_id()) as trace_id:
+                self.trace_id = trace_id
+                try:
+                    await self._run_profiled()
+                finally:
+                    self.trace_id = None
+        finally:
+            self._report_startup()
+
+    def _report_startup(self) -> None:
+        startup.mark("first_cycle_done")
+        if self.args.startup_report and not self._startup_reported:
+            self._startup_reported = True
+            startup.log_report(self.log)
+
+    async def _run_profiled(self) -> None:
+        request, self._profile_request = self._profile_request, None
+        if request is None:
+            await self._run_timed()
+            return
+
+        sampler = StackSampler()
+        try:
+            with sampler:
+                await self._run_timed()
+        finally:
+            await self._save_profile(sampler, request["upload"])
+
+    async def _save_profile(self, sampler: StackSampler, upload: bool) -> None:
+        try:
+            path = sampler.write(self.args.profile_dir, self.settings.device_id)
+            self.log.success(
+                "Profile", f"{sampler.sample_count} samples over {sampler.duration:.1f}s written to {path}"
+            )
+            if upload:
+                url = await asyncio.wait_for(self.storage.upload_profile_async(path), self.stage_deadlines["upload"])
+                if url:
+                    self.log.success("Profile", f"Uploaded profile URL: {url}")
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            self.log.warning("Profile", f"Failed to save cycle profile: {exc}")
+
+    async def _run_timed(self) -> None:
+        """Run one cycle; cancelling the task aborts it at the next await.
+
+        A stage that times out is abandoned, but a hardware call already running
+        on the hardware executor finishes in the background before the next one.
+        Every cycle, including aborted ones, leaves a timing record.
+        """
+        outcome = "error"
+        cycle_id = None
+        with timed_cycle() as timer:
+            try:
+                cycle_id = await asyncio.wait_for(self._run_cycle(), self.max_runtime)
+                outcome = "ok"
+            except StageDeadlineExceeded as exc:
+                outcome = f"deadline:{exc.stage}"
+                self.log.error("Cycle", f"{exc}. Aborting cycle.")
+            except asyncio.TimeoutError:
+                outcome = "timeout"
+                self.log.error("Cycle", f"Cycle exceeded the {self.max_runtime:.0f}s max runtime. Aborting cycle.")
+            except asyncio.CancelledError:
+                outcome = "cancelled"
+                raise
+            finally:
+                self.stats.record(timer.elapsed, outcome, timer.stage_seconds(), self.trace_id)
+                observe_cycle(self.settings.device_id, outcome, timer.elapsed, timer.spans)
+                if outcome != "cancelled":
+                    await self._log_timings(timer.record(outcome, self.settings.device_id, cycle_id, self.trace_id))
+
+    async def _log_timings(self, record) -> None:
+        try:
+            await asyncio.wait_for(self.storage.log_timings_async(record), self.stage_deadlines["log"])
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            self.log.warning("Timings", f"Failed to store cycle timings: {exc}")
+
+    async def _run_cycle(self):
         self.log.section("Smart Plant System - Cycle Start")
 
-        self.gpio.fan_off()
-        self.gpio.pump_off()
+        await self._service_call(self._relays, "gpio", "fan_off")
+        if not self.actuators.pump_busy:
+            await self._service_call(self._relays, "gpio", "pump_off")
 
         self.log.info("Camera", "Capturing image")
-        if not self.camera.capture():
+        if not await self._stage("camera", self._service_call(self._hardware, "camera", "capture")):
             self.log.error("Camera", "Failed to capture valid image. Aborting cycle.")
-            return
+            return None
         self.log.success("Camera", f"Image saved to {self.settings.image_path}")
 
+        # The upload only needs the captured image, so it overlaps the sensor reads.
+        self.log.info("Storage", "Uploading image")
+        upload = asyncio.ensure_future(self._stage("upload", self.storage.upload_image_async(self.settings.image_path)))
+
         self.log.info("Sensors", "Reading sensors")
-        temp_readings, hum_readings = self.sensors.read_dht()
-        valid_temps = [t for t in temp_readings if t is not None]
-        valid_hums = [h for h in hum_readings if h is not None]
-        temp = round(sum(valid_temps) / len(valid_temps), 1) if valid_temps else None
-        hum = round(sum(valid_hums) / len(valid_hums), 1) if valid_hums else None
+        try:
+            (
+                temp_readings,
+                hum_readings,
+                light,
+                soil_summary,
+                soil_majority,
+                soil_readings,
+            ) = await self._stage("sensors", self._read_sensors())
+        except BaseException:
+            upload.cancel()
+            raise
+
+        temp = self._average(temp_readings)
+        hum = self._average(hum_readings)
         if temp is None or hum is None:
             self.log.warning("Sensors", "DHT read failed, using default values")
             temp = 25.0
             hum = 50.0
 
-        light = self.sensors.read_light()
-        soil_summary, soil_majority, soil_readings = self.sensors.read_soil()
         soil_wetness_pct = round(soil_readings.count("WET") / len(soil_readings) * 100, 1) if soil_readings else None
 
         self.log.info("Sensors", f"Temp={temp}C Hum={hum}% Light={light} Soil={soil_summary} Wetness={soil_wetness_pct}%")
 
-        self.log.info("Storage", "Uploading image")
-        image_url = self.storage.upload_image(self.settings.image_path)
-        self.log.success("Storage", f"Uploaded image URL: {image_url}")
-
         self.log.info("AI", "Sending data for analysis")
-        ai_result, prompt_md, response_md = self.ai.analyze(temp, hum, light, soil_summary)
+        analysis = asyncio.ensure_future(self._stage("ai", self.ai.analyze_async(temp, hum, light, soil_summary)))
+        try:
+            image_url, (ai_result, prompt_md, response_md) = await asyncio.gather(upload, analysis)
+        except BaseException:
+            upload.cancel()
+            analysis.cancel()
+            raise
+        self.log.success("Storage", f"Uploaded image URL: {image_url}")
 
         plant_data = ai_result.get("plant", {}) if isinstance(ai_result, dict) else {}
         disease_data = ai_result.get("disease", {}) if isinstance(ai_result, dict) else {}
@@ -69,12 +322,17 @@ class SmartPlantSystem:
             f"Plant={plant_name} Disease={disease_name} Confidence={disease_confidence}",
         )
 
-        actions = self.actuators.apply(ai_result, temp, soil_majority)
+        actions = await self._stage(
+            "actuators",
+            self.actuators.apply_async(ai_result, temp, soil_majority, executor=self._relays),
+        )
         self.log.info("Actuators", f"Actions applied: {actions}")
 
         timestamp = datetime.datetime.now(datetime.timezone.utc).isoformat()
         payload = {
             "timestamp": timestamp,
+            "device_id": self.settings.device_id,
+            "trace_id": self.trace_id,
             "temp": temp,
             "hum": hum,
             "temp_readings": temp_readings,
@@ -88,10 +346,14 @@ class SmartPlantSystem:
             "ai_result": ai_result,
             "actions": actions,
             "prompt_md": prompt_md,
+            "prompt_template": self.ai.PROMPT,
+            "prompt_params": prompt_params(temp, hum, light, soil_summary),
             "response_md": response_md,
+            # Stages up to here; the full record, with the DB write, goes to cycle_timings
+            "timings": current_spans(),
         }
 
         self.log.info("Supabase", "Writing cycle to relational tables")
-        self.storage.log_cycle(payload)
-        self.log.success("Supabase", "Cycle logged successfully")
-        self.log.debug("Supabase", str(payload))
+        cycle_id = await self._stage("log", self.storage.log_cycle_async(payload))
+        self.log.success("Supabase", f"Cycle logged successfully (id={cycle_id})")
+        return cycle_id
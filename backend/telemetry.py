@@ -0,0 +1,191 @@
+"""Operational telemetry carried by the `device_heartbeat` broadcast.
+
+`CycleStats` keeps a rolling window of finished cycles (duration, outcome and
+per-stage breakdown); `HeartbeatPublisher` combines it with queue depth,
+sensor health and process CPU/memory into heartbeats. Heartbeats go out more
+often while a cycle runs, and after the first full snapshot only the fields
+that changed are sent (`full: false`), with a full snapshot every
+`FULL_HEARTBEAT_EVERY` beats so late subscribers catch up.
+"""
+
+import asyncio
+import datetime
+import math
+import os
+import sys
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+HEARTBEAT_RUNNING_SECONDS = 5.0
+# The dashboard marks the device offline after 35s without a heartbeat
+HEARTBEAT_IDLE_SECONDS = 30.0
+FULL_HEARTBEAT_EVERY = 10
+CYCLE_HISTORY = 100
+
+
+def _now_iso() -> str:
+    return datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile (q in 0..100) of an unsorted list."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class CycleStats:
+    """Rolling window of finished cycles."""
+
+    def __init__(self, size: int = CYCLE_HISTORY):
+        self._durations: Deque[float] = deque(maxlen=size)
+        self.last_cycle: Optional[Dict[str, Any]] = None
+        self.cycles = 0
+        self.failures = 0
+
+    def record(self, duration: float, outcome: str, stages: Dict[str, float], trace_id: Optional[str] = None) -> None:
+        self.cycles += 1
+        if outcome != "ok":
+            self.failures += 1
+        self._durations.append(duration)
+        self.last_cycle = {
+            "finished_at": _now_iso(),
+            "trace_id": trace_id,
+            "outcome": outcome,
+            "duration_ms": int(round(duration * 1000)),
+            "stages_ms": {name: int(round(seconds * 1000)) for name, seconds in stages.items()},
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        durations = list(self._durations)
+        p50 = percentile(durations, 50)
+        p95 = percentile(durations, 95)
+        return {
+            "cycles": self.cycles,
+            "cycle_failures": self.failures,
+            "cycle_p50_ms": None if p50 is None else int(round(p50 * 1000)),
+            "cycle_p95_ms": None if p95 is None else int(round(p95 * 1000)),
+            "last_cycle": self.last_cycle,
+        }
+
+
+def _rss_mb() -> Optional[float]:
+    try:
+        with open("/proc/self/statm", "r", encoding="ascii") as statm:
+            pages = int(statm.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    if resource is None:
+        return None
+    # Peak rather than current RSS off Linux; bytes on macOS, KB elsewhere
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class ProcessSampler:
+    """CPU% since the previous sample, resident memory and uptime of this process."""
+
+    def __init__(self):
+        self.started_at = _now_iso()
+        self._started = time.monotonic()
+        self._last_wall = self._started
+        self._last_cpu = time.process_time()
+
+    def sample(self) -> Dict[str, Any]:
+        wall = time.monotonic()
+        cpu = time.process_time()
+        elapsed = wall - self._last_wall
+        cpu_pct = (cpu - self._last_cpu) / elapsed * 100 if elapsed > 0 else 0.0
+        self._last_wall, self._last_cpu = wall, cpu
+        rss = _rss_mb()
+        return {
+            "cpu_pct": round(cpu_pct),
+            "rss_mb": None if rss is None else round(rss),
+            "started_at": self.started_at,
+            "uptime_s": int(wall - self._started),
+        }
+
+
+class HeartbeatPublisher:
+    """Build `device_heartbeat` payloads and send them as deltas."""
+
+    # Sent only in full snapshots; they change every beat and are derivable
+    # (`uptime_s` from `started_at`).
+    FULL_ONLY = {"uptime_s"}
+
+    def __init__(self, system, queue, send: Callable[[str, Dict[str, Any]], Awaitable[None]]):
+        self.system = system
+        self.queue = queue
+        self._send = send
+        self._process = ProcessSampler()
+        self._last_sent: Dict[str, Any] = {}
+        self._beats = 0
+        self._wake = asyncio.Event()
+
+    @property
+    def interval(self) -> float:
+        return HEARTBEAT_RUNNING_SECONDS if self.queue.is_running else HEARTBEAT_IDLE_SECONDS
+
+    def reset(self) -> None:
+        """Make the next heartbeat a full snapshot (e.g. after reconnecting)."""
+        self._last_sent = {}
+        self._beats = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            **self.system.stats.snapshot(),
+            "queue_depth": self.queue.depth,
+            "trace_id": self.system.trace_id,
+            "sensor_health": self.system.sensor_health,
+            **self._process.sample(),
+        }
+
+    async def publish(self, status: str, is_running: bool) -> None:
+        metrics = self.snapshot()
+        full = not self._last_sent or self._beats % FULL_HEARTBEAT_EVERY == 0
+        if full:
+            changed = metrics
+        else:
+            changed = {
+                key: value
+                for key, value in metrics.items()
+                if key not in self.FULL_ONLY and self._last_sent.get(key) != value
+            }
+        self._beats += 1
+        self._last_sent.update(changed)
+        await self._send(
+            "device_heartbeat",
+            {
+                "timestamp": _now_iso(),
+                "status": status,
+                "is_running": is_running,
+                "full": full,
+                **changed,
+            },
+        )
+
+    async def state_changed(self, status: str, is_running: bool) -> None:
+        """Publish at once and restart the timer, so the interval follows the new state."""
+        await self.publish(status, is_running)
+        self._wake.set()
+
+    async def run(self) -> None:
+        """Publish on the adaptive interval until cancelled."""
+        while True:
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.interval)
+                continue
+            except asyncio.TimeoutError:
+                pass
+            running = self.queue.is_running
+            await self.publish("running" if running else "live", running)
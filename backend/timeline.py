@@ -0,0 +1,117 @@
+"""Rebuild one cycle's timeline from its trace id.
+
+    python3 run.py --trace 3f9c1a2b4d5e6f70 --log-json logs/plant.jsonl
+
+Merges the JSON-lines log (current file and rotations) with the cycle's
+`cycle_timings` stages and its `plant_cycles` row, sorted by time and shown
+as offsets from the first event. Either source may be missing: without
+`--log-json` only the database is read, without credentials only the logs.
+"""
+
+import datetime
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.config import Settings
+
+# (when, source, text)
+Event = Tuple[datetime.datetime, str, str]
+
+
+def _parse_ts(value: Optional[str]) -> Optional[datetime.datetime]:
+    if not value:
+        return None
+    parsed = datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=datetime.timezone.utc)
+
+
+def log_events(path: str, backups: int, trace_id: str) -> List[Event]:
+    """Log lines tagged with `trace_id`, from the log file and its rotations."""
+    events: List[Event] = []
+    for candidate in [f"{path}.{index}" for index in range(backups, 0, -1)] + [path]:
+        if not os.path.exists(candidate):
+            continue
+        with open(candidate, "r", encoding="utf-8") as log_file:
+            for line in log_file:
+                if trace_id not in line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if entry.get("trace_id") != trace_id:
+                    continue
+                events.append((_parse_ts(entry["ts"]), "log", f"{entry['level']:<7} [{entry['module']}] {entry['msg']}"))
+    return events
+
+
+def timing_events(record: Dict[str, Any]) -> List[Event]:
+    started = _parse_ts(record["started_at"])
+    events: List[Event] = [(started, "timing", f"cycle started on {record.get('device_id')}")]
+    for item in record.get("stages") or []:
+        at = started + datetime.timedelta(milliseconds=item.get("start_ms") or 0)
+        events.append((at, "timing", f"stage {item['name']}: {item['duration_ms']}ms {item['outcome']}"))
+    finished = started + datetime.timedelta(milliseconds=record.get("total_ms") or 0)
+    events.append((finished, "timing", f"cycle finished: {record['outcome']} in {record['total_ms']}ms"))
+    return events
+
+
+def db_events(settings: Settings, trace_id: str) -> List[Event]:
+    from supabase import create_client  # pylint: disable=import-error
+
+    client = create_client(settings.supabase_url, settings.supabase_service_role_key)
+    events: List[Event] = []
+    cycles = (
+        client.table("plant_cycles")
+        .select("id,device_id,captured_at,created_at")
+        .eq("trace_id", trace_id)
+        .execute()
+        .data
+        or []
+    )
+    for cycle in cycles:
+        events.append((_parse_ts(cycle["captured_at"]), "db", f"plant_cycles {cycle['id']} captured_at"))
+        events.append((_parse_ts(cycle["created_at"]), "db", f"plant_cycles {cycle['id']} inserted"))
+    timings = (
+        client.table("cycle_timings")
+        .select("device_id,started_at,outcome,total_ms,stages")
+        .eq("trace_id", trace_id)
+        .execute()
+        .data
+        or []
+    )
+    for record in timings:
+        events.extend(timing_events(record))
+    return events
+
+
+def format_timeline(events: List[Event]) -> List[str]:
+    events = sorted(events, key=lambda event: event[0])
+    origin = events[0][0]
+    lines = [f"t0 = {origin.isoformat()}"]
+    for when, source, text in events:
+        offset = int(round((when - origin).total_seconds() * 1000))
+        lines.append(f"+{offset:>8}ms  {source:<6}  {text}")
+    return lines
+
+
+def run_trace_timeline(args, settings: Settings, logger) -> None:
+    trace_id = args.trace
+    events: List[Event] = []
+    if args.log_json:
+        events += log_events(args.log_json, args.log_backups, trace_id)
+    else:
+        logger.warning("Trace", "No --log-json file given; the timeline will only contain database events")
+
+    if settings.mock or not settings.supabase_url or not settings.supabase_service_role_key:
+        logger.warning("Trace", "Supabase credentials missing; skipping database events")
+    else:
+        events += db_events(settings, trace_id)
+
+    logger.section(f"Smart Plant System - Trace {trace_id}")
+    if not events:
+        logger.warning("Trace", f"No events found for trace {trace_id}")
+        return
+    for line in format_timeline(events):
+        logger.info("Trace", line)
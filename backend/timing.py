@@ -0,0 +1,182 @@
+"""Per-stage timing spans for cycles.
+
+`SmartPlantSystem.run_async` installs a `CycleTimer` for the running cycle;
+code anywhere below it records a stage with `with span("camera"): ...`.
+Spans measure monotonic time and their outcome (ok, error, timeout,
+cancelled), may overlap (the upload runs alongside the sensor reads) and are
+no-ops outside a cycle. Each cycle's record, including aborted cycles, is
+stored in `cycle_timings`; `--timing-report N` prints percentiles over the
+last N records.
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import datetime
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Mapping, Optional
+
+from backend.config import Settings
+from backend.telemetry import percentile
+
+_current_timer: contextvars.ContextVar[Optional["CycleTimer"]] = contextvars.ContextVar("cycle_timer", default=None)
+
+REPORT_PERCENTILES = (50, 95, 99)
+
+
+def _ms(seconds: float) -> int:
+    return int(round(seconds * 1000))
+
+
+def _outcome(exc: BaseException) -> str:
+    if isinstance(exc, asyncio.CancelledError):
+        return "cancelled"
+    if isinstance(exc, asyncio.TimeoutError):
+        return "timeout"
+    return "error"
+
+
+@dataclass
+class Span:
+    name: str
+    start: float
+    duration: float = 0.0
+    outcome: str = "ok"
+
+
+class CycleTimer:
+    def __init__(self):
+        self.started_at = datetime.datetime.now(datetime.timezone.utc)
+        self._start = time.monotonic()
+        self.spans: List[Span] = []
+
+    @contextlib.contextmanager
+    def span(self, name: str) -> Iterator[Span]:
+        item = Span(name=name, start=time.monotonic() - self._start)
+        self.spans.append(item)
+        try:
+            yield item
+        except BaseException as exc:
+            item.outcome = _outcome(exc)
+            raise
+        finally:
+            item.duration = time.monotonic() - self._start - item.start
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self._start
+
+    def stage_seconds(self) -> Dict[str, float]:
+        return {item.name: item.duration for item in self.spans}
+
+    def spans_json(self) -> List[Dict[str, Any]]:
+        return [
+            {"name": item.name, "start_ms": _ms(item.start), "duration_ms": _ms(item.duration), "outcome": item.outcome}
+            for item in self.spans
+        ]
+
+    def record(
+        self, outcome: str, device_id: str, cycle_id: Optional[str] = None, trace_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """The `cycle_timings` row for this cycle."""
+        return {
+            "device_id": device_id,
+            "cycle_id": cycle_id,
+            "trace_id": trace_id,
+            "started_at": self.started_at.isoformat(),
+            "outcome": outcome,
+            "total_ms": _ms(self.elapsed),
+            "stages": self.spans_json(),
+        }
+
+
+@contextlib.contextmanager
+def timed_cycle() -> Iterator[CycleTimer]:
+    """Install a fresh timer for the current task (and tasks it creates)."""
+    timer = CycleTimer()
+    token = _current_timer.set(timer)
+    try:
+        yield timer
+    finally:
+        _current_timer.reset(token)
+
+
+@contextlib.contextmanager
+def span(name: str) -> Iterator[Optional[Span]]:
+    timer = _current_timer.get()
+    if timer is None:
+        yield None
+        return
+    with timer.span(name) as item:
+        yield item
+
+
+def current_spans() -> List[Dict[str, Any]]:
+    """Spans recorded so far in the running cycle."""
+    timer = _current_timer.get()
+    return timer.spans_json() if timer is not None else []
+
+
+def summarize(records: List[Mapping[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Per-stage (and `total`) count, percentiles and max in ms, plus error counts."""
+    durations: Dict[str, List[float]] = {"total": []}
+    failures: Dict[str, int] = {"total": 0}
+    for record in records:
+        durations["total"].append(record.get("total_ms") or 0)
+        if record.get("outcome") != "ok":
+            failures["total"] += 1
+        for item in record.get("stages") or []:
+            name = item.get("name")
+            durations.setdefault(name, []).append(item.get("duration_ms") or 0)
+            if item.get("outcome") != "ok":
+                failures[name] = failures.get(name, 0) + 1
+
+    summary = {}
+    for name, values in durations.items():
+        summary[name] = {
+            "count": len(values),
+            **{f"p{q}": percentile(values, q) for q in REPORT_PERCENTILES},
+            "max": max(values) if values else None,
+            "failed": failures.get(name, 0),
+        }
+    return summary
+
+
+def format_summary(summary: Dict[str, Dict[str, Any]]) -> List[str]:
+    headers = ["stage", "count", *(f"p{q}" for q in REPORT_PERCENTILES), "max", "failed"]
+    rows = [
+        [name, *(str(stats[key]) if stats[key] is not None else "-" for key in headers[1:])]
+        for name, stats in sorted(summary.items(), key=lambda item: (item[0] == "total", item[0]))
+    ]
+    widths = [max(len(row[i]) for row in [headers, *rows]) for i in range(len(headers))]
+    lines = []
+    for row in [headers, *rows]:
+        cells = [row[0].ljust(widths[0])] + [cell.rjust(width) for cell, width in zip(row[1:], widths[1:])]
+        lines.append("  ".join(cells))
+    return lines
+
+
+def run_timing_report(args, settings: Settings, logger) -> Optional[Dict[str, Dict[str, Any]]]:
+    if settings.mock or not settings.supabase_url or not settings.supabase_service_role_key:
+        logger.warning("Timings", "The timing report requires real Supabase credentials. Skipping.")
+        return None
+
+    from supabase import create_client  # pylint: disable=import-error
+
+    client = create_client(settings.supabase_url, settings.supabase_service_role_key)
+    query = client.table("cycle_timings").select("outcome,total_ms,stages")
+    if args.device_id:
+        # Served by idx_cycle_timings_device_started
+        query = query.eq("device_id", args.device_id)
+    records = query.order("started_at", desc=True).limit(args.timing_report).execute().data or []
+
+    logger.section("Smart Plant System - Cycle Timings")
+    if not records:
+        logger.warning("Timings", "No cycle timings recorded yet")
+        return None
+    summary = summarize(records)
+    logger.info("Timings", f"Last {len(records)} cycles (ms)")
+    for line in format_summary(summary):
+        logger.info("Timings", line)
+    return summary
@@ -0,0 +1,43 @@
+"""Trace ids that tie one cycle's logs, broadcasts and rows together.
+
+A trace id is created when a command is received (or when a scheduled or
+standalone cycle starts) and held in a context variable, so every log line,
+heartbeat and insert made on its behalf can carry it without threading it
+through call signatures. asyncio tasks and `asyncio.to_thread` copy the
+context automatically; `ContextThreadPoolExecutor` does the same for the
+hardware and relay workers used with `run_in_executor`.
+"""
+
+import contextlib
+import contextvars
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, Optional
+
+_trace_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("trace_id", default=None)
+
+
+def new_trace_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def current_trace_id() -> Optional[str]:
+    return _trace_id.get()
+
+
+@contextlib.contextmanager
+def trace(trace_id: Optional[str] = None) -> Iterator[str]:
+    """Run the block under `trace_id` (a new one if None)."""
+    trace_id = trace_id or new_trace_id()
+    token = _trace_id.set(trace_id)
+    try:
+        yield trace_id
+    finally:
+        _trace_id.reset(token)
+
+
+class ContextThreadPoolExecutor(ThreadPoolExecutor):
+    """Run submitted calls in a copy of the submitter's context (and so its trace id)."""
+
+    def submit(self, fn, /, *args, **kwargs):
+        return super().submit(contextvars.copy_context().run, fn, *args, **kwargs)
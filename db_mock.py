@@ -3,23 +3,59 @@
 Database mock data utility.
 
 Usage:
-    python db_mock.py backup      # Save current data to backup.json
+    python db_mock.py backup      # Stream current data to backups/<timestamp>/ (gzip NDJSON + manifest)
+    python db_mock.py backup --incremental --compression zstd
     python db_mock.py populate    # Delete all data and insert 200 mock records
-    python db_mock.py restore     # Restore data from backup.json
+    python db_mock.py populate --count 1000000 --seed 42 --batch-size 1000 --workers 8
+    python db_mock.py populate --count 1000000 --ndjson mock_data/   # Offline, no database
+    python db_mock.py populate --devices bench-a bench-b   # Spread cycles over several devices
+    python db_mock.py restore     # Restore data from the newest backup (or backup.json)
+    python db_mock.py backfill-rollups  # Rebuild hourly/daily rollups from raw history
+    python db_mock.py export history/ --source backups/20260101T120000Z   # Parquet, offline
+    python db_mock.py export history/ --device bench-a   # One device only
+    python db_mock.py replay --source backup.json   # Re-run recorded cycles offline, report decision diffs
+    python db_mock.py replay --source mock_data/ --pace recorded --speed 600
 """
 
+import argparse
+import gzip
+import io
+import itertools
 import sys
 import json
 import os
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 import random
 from dotenv import load_dotenv
 
+from backend.config import DEFAULT_DEVICE_ID
+from backend.history_export import (
+    DEFAULT_ROWS_PER_FILE,
+    EXPORT_FORMATS,
+    JoinStats,
+    export_history,
+    format_join_stats,
+    join_cycle_rows,
+    split_embedded_cycle,
+)
+from backend.keyset import keyset_after
+from backend.prompt_store import compress_response, prompt_params, template_id
+from backend.replay import PACES, SINKS, format_report, replay_cycles
+from backend.rollups import aggregate_rollup_rows
+from backend.sensor_codec import encode_sensor_arrays
+from backend.services.actuator_service import ActuatorController
+from backend.services.ai_service import BaseAIService, _normalize_ai_result
+
 # Load environment
 load_dotenv()
 
 try:
+    from postgrest import ReturnMethod
     from supabase import create_client
 except ImportError:
     print("❌ Error: supabase not installed. Run: pip install supabase")
@@ -38,39 +74,175 @@ def get_supabase_client():
     return create_client(url, key)
 
 
-def backup_data():
-    """Backup all current data to backup.json"""
-    print("💾 Backing up current data...")
+BACKUP_ROOT = Path("backups")
+WATERMARK_FILE = BACKUP_ROOT / "watermarks.json"
+LEGACY_BACKUP_FILE = Path("backup.json")
+# FK order: parents before children
+BACKUP_TABLES = ["prompt_templates", "plant_cycles", "sensor_readings", "ai_analyses", "actuator_actions"]
+BACKUP_PAGE_SIZE = 1000
+NDJSON_SUFFIXES = {"gzip": ".ndjson.gz", "zstd": ".ndjson.zst", "none": ".ndjson"}
+
+
+def _open_ndjson_writer(path, compression):
+    if compression == "gzip":
+        return gzip.open(path, "wt", encoding="utf-8")
+    if compression == "zstd":
+        import zstandard  # pylint: disable=import-error
+
+        raw = open(path, "wb")
+        return io.TextIOWrapper(zstandard.ZstdCompressor().stream_writer(raw, closefd=True), encoding="utf-8")
+    return open(path, "w", encoding="utf-8")
+
+
+def open_ndjson_reader(path):
+    """Open a plain, gzip or zstd NDJSON file for text reading based on its suffix."""
+    path = Path(path)
+    if path.suffix == ".gz":
+        return gzip.open(path, "rt", encoding="utf-8")
+    if path.suffix == ".zst":
+        import zstandard  # pylint: disable=import-error
+
+        raw = open(path, "rb")
+        return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(raw, closefd=True), encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+
+def _load_watermarks():
+    if not WATERMARK_FILE.exists():
+        return None
+    with open(WATERMARK_FILE, "r") as f:
+        return json.load(f)
+
+
+def _backup_table(table, out_dir, compression, since):
+    """Stream one table to NDJSON page by page; memory holds at most one page."""
+    client = _thread_client()
+    path = out_dir / f"{table}{NDJSON_SUFFIXES[compression]}"
+    rows = 0
+    watermark = since
+
+    with _open_ndjson_writer(path, compression) as f:
+        while True:
+            query = client.table(table).select("*")
+            page = (
+                keyset_after(query, watermark)
+                .order("created_at")
+                .order("id")
+                .limit(BACKUP_PAGE_SIZE)
+                .execute()
+            ).data or []
+            for row in page:
+                f.write(json.dumps(row, default=str) + "\n")
+            rows += len(page)
+            if page:
+                watermark = {"created_at": page[-1]["created_at"], "id": page[-1]["id"]}
+            if len(page) < BACKUP_PAGE_SIZE:
+                break
+
+    return {"file": path.name, "rows": rows, "bytes": path.stat().st_size, "watermark": watermark}
+
+
+def backup_data(compression="gzip", incremental=False):
+    """Stream every table to compressed NDJSON files plus a manifest under backups/."""
+    watermarks = _load_watermarks() if incremental else None
+    if incremental and not watermarks:
+        print("ℹ️  No stored watermark yet, taking a full backup")
+    mode = "incremental" if watermarks else "full"
+    print(f"💾 Backing up current data ({mode}, {compression})...")
     
-    supabase = get_supabase_client()
-    backup = {}
+    started = time.perf_counter()
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    out_dir = BACKUP_ROOT / stamp
     
     try:
-        # Fetch all records from each table
-        cycles_resp = supabase.table("plant_cycles").select("*").execute()
-        backup["plant_cycles"] = cycles_resp.data or []
-        
-        sensor_resp = supabase.table("sensor_readings").select("*").execute()
-        backup["sensor_readings"] = sensor_resp.data or []
-        
-        ai_resp = supabase.table("ai_analyses").select("*").execute()
-        backup["ai_analyses"] = ai_resp.data or []
-        
-        actuator_resp = supabase.table("actuator_actions").select("*").execute()
-        backup["actuator_actions"] = actuator_resp.data or []
-        
-        # Save to file
-        with open("backup.json", "w") as f:
-            json.dump(backup, f, indent=2, default=str)
+        out_dir.mkdir(parents=True, exist_ok=False)
+        since = (watermarks or {}).get("tables", {})
+
+        with ThreadPoolExecutor(max_workers=len(BACKUP_TABLES)) as pool:
+            futures = {
+                table: pool.submit(_backup_table, table, out_dir, compression, since.get(table))
+                for table in BACKUP_TABLES
+            }
+            tables = {table: future.result() for table, future in futures.items()}
+
+        manifest = {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "mode": mode,
+            "parent": watermarks.get("backup") if watermarks else None,
+            "compression": compression,
+            "tables": tables,
+        }
+        with open(out_dir / "manifest.json", "w") as f:
+            json.dump(manifest, f, indent=2)
+
+        # Only advance the watermark once every table has been written
+        with open(WATERMARK_FILE, "w") as f:
+            json.dump(
+                {"backup": stamp, "tables": {table: info["watermark"] for table, info in tables.items()}},
+                f,
+                indent=2,
+            )
         
-        total = sum(len(v) for v in backup.values())
-        print(f"✅ Backed up {total} records to backup.json")
+        total = sum(info["rows"] for info in tables.values())
+        size = sum(info["bytes"] for info in tables.values())
+        _print_throughput("Backed up", total, started)
+        print(f"✅ Backed up {total} records ({size / 1024:.1f} KB) to {out_dir}")
         
     except Exception as e:
         print(f"❌ Backup failed: {e}")
         sys.exit(1)
 
 
+def _find_table_file(directory, table):
+    for suffix in NDJSON_SUFFIXES.values():
+        path = Path(directory) / f"{table}{suffix}"
+        if path.exists():
+            return path
+    return None
+
+
+def backup_chain(path):
+    """Return the backup directories to apply, oldest first (full backup, then incrementals)."""
+    chain = []
+    directory = Path(path)
+    while directory is not None:
+        chain.insert(0, directory)
+        manifest_path = directory / "manifest.json"
+        parent = None
+        if manifest_path.exists():
+            with open(manifest_path, "r") as f:
+                parent = json.load(f).get("parent")
+        directory = directory.parent / parent if parent else None
+    return chain
+
+
+def latest_backup():
+    """Newest backup directory under backups/, falling back to the legacy backup.json."""
+    if BACKUP_ROOT.exists():
+        candidates = sorted(p for p in BACKUP_ROOT.iterdir() if (p / "manifest.json").exists())
+        if candidates:
+            return candidates[-1]
+    return LEGACY_BACKUP_FILE
+
+
+def iter_backup_rows(path, table):
+    """Yield a table's rows from backup.json, a backup directory chain, or an NDJSON directory."""
+    path = Path(path)
+    if path.is_file():
+        with open(path, "r") as f:
+            yield from json.load(f).get(table, [])
+        return
+
+    for directory in backup_chain(path):
+        table_file = _find_table_file(directory, table)
+        if table_file is None:
+            continue
+        with open_ndjson_reader(table_file) as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
 def clear_data():
     """Delete all data from tables (careful!)"""
     print("⚠️  Clearing all data from database...")
@@ -79,6 +251,7 @@ def clear_data():
     
     try:
         # Order matters: delete dependent tables first
+        supabase.table("cycle_rollups").delete().gte("cycle_count", 0).execute()
         supabase.table("actuator_actions").delete().gt("created_at", "1900-01-01").execute()
         supabase.table("ai_analyses").delete().gt("created_at", "1900-01-01").execute()
         supabase.table("sensor_readings").delete().gt("created_at", "1900-01-01").execute()
@@ -91,263 +264,806 @@ def clear_data():
         sys.exit(1)
 
 
-def populate_mock_data():
-    """Generate and insert 200 mock records"""
-    print("🌿 Generating 200 mock records...")
-    
-    supabase = get_supabase_client()
-    
-    # Diseases and plants for variety
-    diseases = ["No disease found", "Leaf spot", "Powdery mildew", "Root rot", "Blight", "Leaf curl"]
-    plants = ["Tomato", "Lettuce", "Basil", "Spinach", "Pepper", "Cucumber"]
-    light_states = ["BRIGHT", "DARK"]
-    
-    try:
-        for i in range(200):
-            # Create a time spread over the last 200 hours
-            hours_ago = 200 - i
-            captured_at = (datetime.now(timezone.utc) - timedelta(hours=hours_ago)).isoformat()
-            
-            # Insert plant cycle
-            cycle_payload = {
-                "captured_at": captured_at,
-                "image_url": f"https://mock.local/supabase/plant_{i:03d}.jpg",
-            }
-            cycle_resp = supabase.table("plant_cycles").insert(cycle_payload).execute()
-            cycle_id = cycle_resp.data[0]["id"]
-            
-            # Sensor readings - realistic ranges
-            temp = round(20 + random.gauss(5, 2), 1)  # 15-30°C
-            hum = round(50 + random.gauss(10, 5), 1)  # 40-70%
-            soil_readings = ["WET" if random.random() > 0.4 else "DRY" for _ in range(6)]
-            wet_count = soil_readings.count("WET")
-            soil_wetness_pct = round(wet_count / len(soil_readings) * 100, 1)
-            
-            sensor_payload = {
-                "cycle_id": cycle_id,
-                "temp_c": temp,
-                "humidity_pct": hum,
-                "light_state": random.choice(light_states),
-                "soil_summary": f"{6-wet_count}/6 DRY",
-                "soil_majority": "DRY" if wet_count <= 3 else "WET",
-                "temp_readings": [round(temp + random.gauss(0, 0.5), 1)],
-                "hum_readings": [round(hum + random.gauss(0, 1), 1)],
+MOCK_DISEASES = ["No disease found", "Leaf spot", "Powdery mildew", "Root rot", "Blight", "Leaf curl"]
+MOCK_PLANTS = ["Tomato", "Lettuce", "Basil", "Spinach", "Pepper", "Cucumber"]
+MOCK_LIGHT_STATES = ["BRIGHT", "DARK"]
+MOCK_TABLES = ["plant_cycles", "sensor_readings", "ai_analyses", "actuator_actions"]
+MOCK_PUMP_SECONDS = 5
+# Only its plan() is used, to decide the recorded actions; no GPIO is touched
+_MOCK_PLANNER = ActuatorController(gpio=None, pump_duration=MOCK_PUMP_SECONDS)
+
+DEFAULT_MOCK_COUNT = 200
+# Generated history covers this many days ending now, whatever the count; at most
+# MAX_MOCK_SPAN_DAYS, so a large --count doesn't need hundreds of monthly partitions
+DEFAULT_MOCK_SPAN_DAYS = 30
+MAX_MOCK_SPAN_DAYS = 366
+# With --seed, history ends here instead of now so reruns give identical rows
+SEEDED_MOCK_END_TIME = datetime(2026, 1, 1, tzinfo=timezone.utc)
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_WORKERS = 4
+PROGRESS_INTERVAL_SECONDS = 2.0
+
+
+def generate_mock_cycle(rng, index, captured_at, prompt_template_id, device_id=DEFAULT_DEVICE_ID):
+    """Build one cycle's rows for every history table, keyed by table name."""
+    cycle_id = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+    # Sensor readings - realistic ranges
+    temp = round(20 + rng.gauss(5, 2), 1)  # 15-30°C
+    hum = round(50 + rng.gauss(10, 5), 1)  # 40-70%
+    soil_readings = ["WET" if rng.random() > 0.4 else "DRY" for _ in range(6)]
+    wet_count = soil_readings.count("WET")
+    soil_wetness_pct = round(wet_count / len(soil_readings) * 100, 1)
+    light_state = rng.choice(MOCK_LIGHT_STATES)
+    # Same majority rule and summary format as the soil sensor service
+    soil_majority = "DRY" if wet_count <= 3 else "WET"
+    soil_summary = f"{6 - wet_count if soil_majority == 'DRY' else wet_count}/6 {soil_majority}"
+
+    sensor_row = {
+        "cycle_id": cycle_id,
+        "captured_at": captured_at,
+        "temp_c": temp,
+        "humidity_pct": hum,
+        "light_state": light_state,
+        "soil_summary": soil_summary,
+        "soil_majority": soil_majority,
+        **encode_sensor_arrays(
+            {
+                "temp_readings": [round(temp + rng.gauss(0, 0.5), 1)],
+                "hum_readings": [round(hum + rng.gauss(0, 1), 1)],
                 "soil_readings": soil_readings,
-                "soil_wetness_pct": soil_wetness_pct,
             }
-            supabase.table("sensor_readings").insert(sensor_payload).execute()
-            
-            # AI Analysis
-            disease = random.choice(diseases)
-            plant = random.choice(plants)
-            confidence = round(random.uniform(0.7, 0.99), 2)
-            
-            todos = []
-            if wet_count <= 2:
-                todos.append(
-                    {
-                        "action": "Irrigate the plant",
-                        "priority": "HIGH",
-                        "reason": "Majority soil reading is DRY.",
-                    }
-                )
-            if temp > 30:
-                todos.append(
-                    {
-                        "action": "Reduce ambient temperature",
-                        "priority": "HIGH",
-                        "reason": "Temperature is above 30C.",
-                    }
-                )
-                todos.append(
-                    {
-                        "action": "Increase airflow around the plant",
-                        "priority": "MEDIUM",
-                        "reason": "High temperature can stress plants.",
-                    }
-                )
-            if disease != "No disease found":
-                todos.append(
-                    {
-                        "action": "Inspect infected leaves and isolate affected area",
-                        "priority": "HIGH",
-                        "reason": "Visible disease symptoms require immediate containment.",
-                    }
-                )
-            if not todos:
-                todos.append(
-                    {
-                        "action": "Continue routine monitoring",
-                        "priority": "LOW",
-                        "reason": "No immediate intervention is required.",
-                    }
-                )
-
-            disease_confidence = round(random.uniform(0.7, 0.99), 2)
-            disease_reason = (
-                "No visible lesions, spotting, or discoloration detected."
-                if disease == "No disease found"
-                else f"Visible symptoms consistent with {disease} observed on leaves."
-            )
+        ),
+        "soil_wetness_pct": soil_wetness_pct,
+    }
 
-            light_state_for_record = sensor_payload["light_state"]
-            soil_summary_for_record = sensor_payload["soil_summary"]
-
-            prompt_markdown = (
-                "You are an agricultural AI in an IoT system.\n\n"
-                "Sensor Data:\n"
-                f"- Temperature: {temp} C\n"
-                f"- Humidity: {hum} %\n"
-                f"- Light: {light_state_for_record}\n"
-                f"- Soil Moisture: {soil_summary_for_record}\n\n"
-                "Image Analysis Rules:\n"
-                "- First detect plant. If unsure, return \"No plant detected\"\n"
-                "- Only detect diseases relevant to the identified plant\n"
-                "- If no disease is visible, return \"No disease found\"\n"
-                "- Always provide a confidence score (0-100) for plant and disease separately\n\n"
-                "Soil Rules:\n"
-                "- Soil moisture is reported as \"X/Total DRY\" or \"X/Total WET\"\n"
-                "- Recommend watering ONLY if the majority soil reading is DRY\n\n"
-                "Environment Rules:\n"
-                "- Recommend airflow if disease detected OR temperature > 30\n"
-                "- Recommend temperature reduction ONLY if temperature > 30\n\n"
-                "Response Rules:\n"
-                "- All actions must be structured as TODO items with priority\n"
-                "- Priority levels: HIGH, MEDIUM, LOW\n"
-                "- HIGH -> immediate risk (disease, extreme heat, fully dry soil)\n"
-                "- MEDIUM -> preventive care\n"
-                "- LOW -> general optimization\n\n"
-                "Output Format (STRICT JSON ONLY):\n\n"
-                "{\n"
-                "    \"plant\": {\"name\": \"<plant_name | No plant detected>\", \"confidence\": <0-100>},\n"
-                "    \"disease\": {\"name\": \"<disease_name | No disease found>\", \"confidence\": <0-100>, \"reason\": \"<short visual justification>\"},\n"
-                "    \"environment\": {\"temperature\": <temp>, \"humidity\": <humidity>, \"light\": \"<light>\", \"soil\": \"<soil>\"},\n"
-                "    \"todos\": [{\"action\": \"<what to do>\", \"priority\": \"HIGH | MEDIUM | LOW\", \"reason\": \"<why>\"}]\n"
-                "}\n\n"
-                "Behavior Constraints:\n"
-                "- Do NOT hallucinate diseases unrelated to the plant\n"
-                "- If plant is unknown -> disease must be \"Unknown\"\n"
-                "- If no disease -> no HIGH priority disease actions\n"
-                "- Keep reasons short and technical (no storytelling)\n"
-                "- Do NOT return anything except JSON"
-            )
+    # AI Analysis
+    disease = rng.choice(MOCK_DISEASES)
+    plant = rng.choice(MOCK_PLANTS)
+    confidence = round(rng.uniform(0.7, 0.99), 2)
 
-            ai_response_obj = {
-                "plant": {
-                    "name": plant,
-                    "confidence": round(confidence * 100, 1),
-                },
-                "disease": {
-                    "name": disease,
-                    "confidence": round(disease_confidence * 100, 1),
-                    "reason": disease_reason,
-                },
-                "environment": {
-                    "temperature": temp,
-                    "humidity": hum,
-                    "light": light_state_for_record,
-                    "soil": soil_summary_for_record,
-                },
-                "todos": todos,
+    todos = []
+    if soil_majority == "DRY":
+        todos.append(
+            {
+                "action": "Irrigate the plant",
+                "priority": "HIGH",
+                "reason": "Majority soil reading is DRY.",
             }
-            response_markdown = f"```json\n{json.dumps(ai_response_obj, indent=2)}\n```"
-
-            ai_payload = {
-                "cycle_id": cycle_id,
-                "disease": disease,
-                "plant": plant,
-                "confidence": confidence,
-                "todos": todos,
-                "recommendation": {
-                    "reduce_temperature": temp > 28,
-                    "water_plant": wet_count <= 2,
-                    "increase_airflow": disease != "No disease found" or temp > 30,
-                },
-                "prompt_markdown": prompt_markdown,
-                "response_markdown": response_markdown,
+        )
+    if temp > 30:
+        todos.append(
+            {
+                "action": "Reduce ambient temperature",
+                "priority": "HIGH",
+                "reason": "Temperature is above 30C.",
             }
-            supabase.table("ai_analyses").insert(ai_payload).execute()
-            
-            # Actuator Actions
-            actions = "None"
-            if wet_count <= 2:
-                actions = "Watered (5s)"
-            elif temp > 28:
-                actions = "Fan ON"
-            
-            actuator_payload = {
-                "cycle_id": cycle_id,
-                "actions": actions,
+        )
+        todos.append(
+            {
+                "action": "Increase airflow around the plant",
+                "priority": "MEDIUM",
+                "reason": "High temperature can stress plants.",
             }
-            supabase.table("actuator_actions").insert(actuator_payload).execute()
-            
-            if (i + 1) % 50 == 0:
-                print(f"  ✓ Inserted {i + 1}/200 records")
-        
-        print("✅ Successfully inserted 200 mock records")
+        )
+    if disease != "No disease found":
+        todos.append(
+            {
+                "action": "Inspect infected leaves and isolate affected area",
+                "priority": "HIGH",
+                "reason": "Visible disease symptoms require immediate containment.",
+            }
+        )
+    if not todos:
+        todos.append(
+            {
+                "action": "Continue routine monitoring",
+                "priority": "LOW",
+                "reason": "No immediate intervention is required.",
+            }
+        )
+
+    disease_confidence = round(rng.uniform(0.7, 0.99), 2)
+    disease_reason = (
+        "No visible lesions, spotting, or discoloration detected."
+        if disease == "No disease found"
+        else f"Visible symptoms consistent with {disease} observed on leaves."
+    )
+
+    ai_response_obj = {
+        "plant": {
+            "name": plant,
+            "confidence": round(confidence * 100, 1),
+        },
+        "disease": {
+            "name": disease,
+            "confidence": round(disease_confidence * 100, 1),
+            "reason": disease_reason,
+        },
+        "environment": {
+            "temperature": temp,
+            "humidity": hum,
+            "light": light_state,
+            "soil": soil_summary,
+        },
+        "todos": todos,
+    }
+    response_markdown = f"```json\n{json.dumps(ai_response_obj, indent=2)}\n```"
+    # Record what the pipeline decides for this response, so replaying it shows no diffs
+    ai_result = _normalize_ai_result(ai_response_obj)
+    fan_on, water = _MOCK_PLANNER.plan(ai_result, temp, soil_majority)
+
+    ai_row = {
+        "cycle_id": cycle_id,
+        "captured_at": captured_at,
+        "disease": ai_result["disease"]["name"],
+        "plant": ai_result["plant"]["name"],
+        "confidence": confidence,
+        "todos": ai_result["todos"],
+        "recommendation": ai_result["recommendation"],
+        "prompt_template_id": prompt_template_id,
+        "prompt_params": prompt_params(temp, hum, light_state, soil_summary),
+        "response_zlib": compress_response(response_markdown),
+    }
+
+    # Actuator Actions, formatted like ActuatorController.apply
+    actions = ", ".join(
+        action for action, applied in (("Fan ON", fan_on), (f"Watered ({MOCK_PUMP_SECONDS}s)", water)) if applied
+    ) or "None"
+
+    return {
+        "plant_cycles": {
+            "id": cycle_id,
+            "captured_at": captured_at,
+            "device_id": device_id,
+            "image_url": f"https://mock.local/supabase/plant_{index:03d}.jpg",
+        },
+        "sensor_readings": sensor_row,
+        "ai_analyses": ai_row,
+        "actuator_actions": {
+            "cycle_id": cycle_id,
+            "captured_at": captured_at,
+            "actions": actions,
+        },
+    }
+
+
+def mock_time_range(count, seed=None, span_days=DEFAULT_MOCK_SPAN_DAYS, interval_seconds=None):
+    """(end_time, interval_seconds) for `count` generated cycles.
+
+    The interval defaults to spreading the cycles over `span_days`. Seeded runs
+    end at SEEDED_MOCK_END_TIME rather than now, so their timestamps repeat too.
+    """
+    if interval_seconds is None:
+        interval_seconds = span_days * 86400 / max(count, 1)
+    end_time = SEEDED_MOCK_END_TIME if seed is not None else datetime.now(timezone.utc)
+    return end_time, interval_seconds
+
+
+def iter_mock_batches(count, seed, batch_size, interval_seconds, end_time, devices=None):
+    """Yield lists of generated cycles, oldest first, ending at `end_time`, round-robin over `devices`."""
+    rng = random.Random(seed)
+    devices = devices or [DEFAULT_DEVICE_ID]
+    prompt_template_id = template_id(BaseAIService.PROMPT)
+    batch = []
+    for i in range(count):
+        captured_at = (end_time - timedelta(seconds=interval_seconds * (count - i))).isoformat()
+        batch.append(generate_mock_cycle(rng, i, captured_at, prompt_template_id, devices[i % len(devices)]))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _cycle_to_rollup_payload(cycle):
+    sensor = cycle["sensor_readings"]
+    return {
+        "device_id": cycle["plant_cycles"]["device_id"],
+        "timestamp": sensor["captured_at"],
+        "temp": sensor["temp_c"],
+        "hum": sensor["humidity_pct"],
+        "light": sensor["light_state"],
+        "soil_majority": sensor["soil_majority"],
+        "soil_wetness_pct": sensor["soil_wetness_pct"],
+        "actions": cycle["actuator_actions"]["actions"],
+        "ai_result": {"disease": {"name": cycle["ai_analyses"]["disease"]}},
+    }
+
+
+_thread_state = threading.local()
+
+
+def _thread_client():
+    # One client per worker thread so concurrent batches don't share a connection pool.
+    if not hasattr(_thread_state, "client"):
+        _thread_state.client = get_supabase_client()
+    return _thread_state.client
+
+
+def _insert_batch(batch):
+    """Insert one batch of cycles with one multi-row request per table, then add its rollups."""
+    client = _thread_client()
+    for table in MOCK_TABLES:
+        client.table(table).insert(
+            [cycle[table] for cycle in batch],
+            returning=ReturnMethod.minimal,
+        ).execute()
+    # apply_cycle_rollups adds to existing buckets, so batches sharing an hour or day
+    # can each flush their part; rows come sorted, so concurrent upserts lock in order
+    rollup_rows = aggregate_rollup_rows(_cycle_to_rollup_payload(cycle) for cycle in batch)
+    for i in range(0, len(rollup_rows), ROLLUP_RPC_BATCH):
+        client.rpc("apply_cycle_rollups", {"p_rows": rollup_rows[i:i + ROLLUP_RPC_BATCH]}).execute()
+    return len(batch) * len(MOCK_TABLES)
+
+
+def _print_throughput(label, rows, started):
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    print(f"  ✓ {label} {rows} rows in {elapsed:.1f}s ({rows / elapsed:,.0f} rows/s)")
+
+
+def write_mock_ndjson(output_dir, count, seed, batch_size, interval_seconds=None, devices=None,
+                      span_days=DEFAULT_MOCK_SPAN_DAYS):
+    """Write generated cycles to one NDJSON file per table without touching the database."""
+    print(f"🌿 Writing {count} mock cycles to {output_dir}...")
+    end_time, interval_seconds = mock_time_range(count, seed, span_days, interval_seconds)
+
+    out = Path(output_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    started = time.perf_counter()
+    rows = 0
+
+    handles = {table: open(out / f"{table}.ndjson", "w", encoding="utf-8") for table in MOCK_TABLES}
+    try:
+        with open(out / "prompt_templates.ndjson", "w", encoding="utf-8") as f:
+            f.write(json.dumps({"id": template_id(BaseAIService.PROMPT), "template": BaseAIService.PROMPT}) + "\n")
+        for batch in iter_mock_batches(count, seed, batch_size, interval_seconds, end_time, devices):
+            for cycle in batch:
+                for table in MOCK_TABLES:
+                    handles[table].write(json.dumps(cycle[table]) + "\n")
+            rows += len(batch) * len(MOCK_TABLES)
+    finally:
+        for handle in handles.values():
+            handle.close()
+
+    _print_throughput("Wrote", rows, started)
+    print(f"✅ Wrote {count} mock cycles to {output_dir}")
+
+
+def populate_mock_data(count=DEFAULT_MOCK_COUNT, seed=None, batch_size=DEFAULT_BATCH_SIZE,
+                       workers=DEFAULT_WORKERS, interval_seconds=None, devices=None,
+                       span_days=DEFAULT_MOCK_SPAN_DAYS):
+    """Generate mock cycles and insert them in concurrent multi-row batches."""
+    print(f"🌿 Generating {count} mock records (batch={batch_size}, workers={workers})...")
+    
+    supabase = get_supabase_client()
+    
+    try:
+        # Every cycle references the backend's prompt template by hash
+        supabase.table("prompt_templates").upsert(
+            {"id": template_id(BaseAIService.PROMPT), "template": BaseAIService.PROMPT},
+            on_conflict="id",
+            ignore_duplicates=True,
+        ).execute()
+
+        # Make sure the generated time span has monthly partitions to land in
+        end_time, interval_seconds = mock_time_range(count, seed, span_days, interval_seconds)
+        first = end_time - timedelta(seconds=interval_seconds * count)
+        months = (end_time.year - first.year) * 12 + end_time.month - first.month
+        supabase.rpc(
+            "ensure_history_partitions",
+            {"p_from": first.date().replace(day=1).isoformat(), "p_months": months + 1},
+        ).execute()
+
+        started = last_report = time.perf_counter()
+        rows = 0
+        pending = set()
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for batch in iter_mock_batches(count, seed, batch_size, interval_seconds, end_time, devices):
+                # Bound in-flight batches so memory stays flat for large counts
+                if len(pending) >= workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    rows += sum(future.result() for future in done)
+                    if time.perf_counter() - last_report >= PROGRESS_INTERVAL_SECONDS:
+                        _print_throughput("Inserted", rows, started)
+                        last_report = time.perf_counter()
+                pending.add(pool.submit(_insert_batch, batch))
+
+            rows += sum(future.result() for future in pending)
+
+        _print_throughput("Inserted", rows, started)
+        print(f"✅ Successfully inserted {count} mock records")
         
     except Exception as e:
         print(f"❌ Populate failed: {e}")
         sys.exit(1)
 
 
-def restore_data():
-    """Restore data from backup.json"""
-    if not os.path.exists("backup.json"):
-        print("❌ Error: backup.json not found")
+ROLLUP_PAGE_SIZE = 1000
+ROLLUP_RPC_BATCH = 500
+
+
+def _pick_one(value):
+    if isinstance(value, list):
+        return value[0] if value else {}
+    return value or {}
+
+
+def _cycle_row_to_payload(row):
+    """Map a joined plant_cycles row to the payload shape used by log_cycle."""
+    sensor = _pick_one(row.get("sensor_readings"))
+    ai = _pick_one(row.get("ai_analyses"))
+    actuator = _pick_one(row.get("actuator_actions"))
+    return {
+        "device_id": row.get("device_id"),
+        "timestamp": row.get("captured_at"),
+        "temp": sensor.get("temp_c"),
+        "hum": sensor.get("humidity_pct"),
+        "light": sensor.get("light_state"),
+        "soil_summary": sensor.get("soil_summary"),
+        "soil_majority": sensor.get("soil_majority"),
+        "soil_wetness_pct": sensor.get("soil_wetness_pct"),
+        "actions": actuator.get("actions"),
+        "ai_result": {"disease": {"name": ai.get("disease")}},
+    }
+
+
+def backfill_rollups():
+    """Rebuild cycle_rollups from the raw cycle tables."""
+    print("📊 Rebuilding hourly/daily rollups...")
+
+    supabase = get_supabase_client()
+
+    try:
+        payloads = []
+        start = 0
+        while True:
+            page = (
+                supabase.table("plant_cycles")
+                .select(
+                    "device_id,captured_at,"
+                    "sensor_readings(temp_c,humidity_pct,light_state,soil_summary,soil_majority,soil_wetness_pct),"
+                    "ai_analyses(disease),"
+                    "actuator_actions(actions)"
+                )
+                .order("captured_at")
+                .range(start, start + ROLLUP_PAGE_SIZE - 1)
+                .execute()
+            ).data or []
+            payloads.extend(_cycle_row_to_payload(row) for row in page)
+            if len(page) < ROLLUP_PAGE_SIZE:
+                break
+            start += ROLLUP_PAGE_SIZE
+
+        rows = aggregate_rollup_rows(payloads)
+
+        supabase.table("cycle_rollups").delete().gte("cycle_count", 0).execute()
+        for i in range(0, len(rows), ROLLUP_RPC_BATCH):
+            supabase.rpc("apply_cycle_rollups", {"p_rows": rows[i:i + ROLLUP_RPC_BATCH]}).execute()
+
+        print(f"✅ Rebuilt {len(rows)} rollup buckets from {len(payloads)} cycles")
+
+    except Exception as e:
+        print(f"❌ Rollup backfill failed: {e}")
+        sys.exit(1)
+
+
+RESTORE_BATCH_SIZE = 1000
+RESTORE_CHECKPOINT_FILE = BACKUP_ROOT / "restore_checkpoint.json"
+# Upserting on the primary key makes re-sent chunks no-ops when a restore resumes
+RESTORE_CONFLICT_KEYS = {
+    "prompt_templates": "id",
+    "plant_cycles": "id,captured_at",
+    "sensor_readings": "id,captured_at",
+    "ai_analyses": "id,captured_at",
+    "actuator_actions": "id,captured_at",
+}
+
+
+def load_restore_checkpoint(source):
+    """Return the saved progress for `source`, or None if there is nothing to resume."""
+    if not RESTORE_CHECKPOINT_FILE.exists():
+        return None
+    with open(RESTORE_CHECKPOINT_FILE, "r") as f:
+        checkpoint = json.load(f)
+    return checkpoint if checkpoint.get("source") == str(source) else None
+
+
+def _save_restore_checkpoint(checkpoint):
+    RESTORE_CHECKPOINT_FILE.parent.mkdir(parents=True, exist_ok=True)
+    tmp = RESTORE_CHECKPOINT_FILE.with_suffix(".tmp")
+    with open(tmp, "w") as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(tmp, RESTORE_CHECKPOINT_FILE)
+
+
+def _iter_chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _upsert_chunk(table, rows):
+    _thread_client().table(table).upsert(
+        rows,
+        on_conflict=RESTORE_CONFLICT_KEYS[table],
+        ignore_duplicates=True,
+        returning=ReturnMethod.minimal,
+    ).execute()
+    return len(rows)
+
+
+def _restore_table(table, rows, checkpoint, batch_size, workers):
+    """Upsert one table's rows in parallel chunks, checkpointing the contiguous prefix that landed."""
+    done_rows = checkpoint["tables"].get(table, 0)
+    # Chunks finish out of order; only rows before the first unfinished chunk are safe to skip on resume
+    finished = {}
+    next_index = 0
+    restored = 0
+    started = last_report = time.perf_counter()
+    pending = {}
+
+    def collect(futures):
+        nonlocal next_index, done_rows, restored
+        for future in futures:
+            finished[pending.pop(future)] = future.result()
+        advanced = False
+        while next_index in finished:
+            count = finished.pop(next_index)
+            done_rows += count
+            restored += count
+            next_index += 1
+            advanced = True
+        if advanced:
+            checkpoint["tables"][table] = done_rows
+            _save_restore_checkpoint(checkpoint)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for index, chunk in enumerate(_iter_chunks(itertools.islice(rows, done_rows, None), batch_size)):
+            if len(pending) >= workers * 2:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+                if time.perf_counter() - last_report >= PROGRESS_INTERVAL_SECONDS:
+                    _print_throughput(f"Restored {table}:", restored, started)
+                    last_report = time.perf_counter()
+            pending[pool.submit(_upsert_chunk, table, chunk)] = index
+        collect(list(pending))
+
+    return restored, started
+
+
+def restore_data(source=None, batch_size=RESTORE_BATCH_SIZE, workers=DEFAULT_WORKERS, resume=True):
+    """Stream a backup back into the database in parallel chunks, resuming from the last checkpoint"""
+    source = Path(source) if source else latest_backup()
+    if not source.exists():
+        print(f"❌ Error: {source} not found")
         sys.exit(1)
     
-    print("📥 Restoring data from backup...")
-    
-    supabase = get_supabase_client()
+    checkpoint = load_restore_checkpoint(source) if resume else None
+    if checkpoint:
+        print(f"📥 Resuming restore from {source}...")
+    else:
+        print(f"📥 Restoring data from {source}...")
+        clear_data()
+        checkpoint = {"source": str(source), "tables": {}, "completed": []}
+        _save_restore_checkpoint(checkpoint)
     
     try:
-        # Load backup
-        with open("backup.json", "r") as f:
-            backup = json.load(f)
-        
-        # Clear current data
-        supabase.table("actuator_actions").delete().gt("created_at", "1900-01-01").execute()
-        supabase.table("ai_analyses").delete().gt("created_at", "1900-01-01").execute()
-        supabase.table("sensor_readings").delete().gt("created_at", "1900-01-01").execute()
-        supabase.table("plant_cycles").delete().gt("created_at", "1900-01-01").execute()
-        
-        # Restore each table
-        if backup.get("plant_cycles"):
-            supabase.table("plant_cycles").insert(backup["plant_cycles"]).execute()
-            print(f"  ✓ Restored {len(backup['plant_cycles'])} plant_cycles")
-        
-        if backup.get("sensor_readings"):
-            supabase.table("sensor_readings").insert(backup["sensor_readings"]).execute()
-            print(f"  ✓ Restored {len(backup['sensor_readings'])} sensor_readings")
-        
-        if backup.get("ai_analyses"):
-            supabase.table("ai_analyses").insert(backup["ai_analyses"]).execute()
-            print(f"  ✓ Restored {len(backup['ai_analyses'])} ai_analyses")
-        
-        if backup.get("actuator_actions"):
-            supabase.table("actuator_actions").insert(backup["actuator_actions"]).execute()
-            print(f"  ✓ Restored {len(backup['actuator_actions'])} actuator_actions")
+        # Backups taken before partitioning are single backup.json files whose child
+        # rows lack captured_at; fill it in from the parent cycle.
+        cycle_times = {}
+        if source.is_file():
+            cycle_times = {row["id"]: row["captured_at"] for row in iter_backup_rows(source, "plant_cycles")}
+
+        total = 0
+        started = time.perf_counter()
+        # Tables run one after another in FK order; chunks within a table run in parallel
+        for table in BACKUP_TABLES:
+            if table in checkpoint["completed"]:
+                print(f"  ↷ Skipping {table} (already restored)")
+                continue
+
+            rows = iter_backup_rows(source, table)
+            if cycle_times and table not in ("prompt_templates", "plant_cycles"):
+                rows = ({"captured_at": cycle_times.get(row["cycle_id"]), **row} for row in rows)
+
+            restored, table_started = _restore_table(table, rows, checkpoint, batch_size, workers)
+            _print_throughput(f"Restored {table}:", restored, table_started)
+            total += restored
+
+            checkpoint["completed"].append(table)
+            _save_restore_checkpoint(checkpoint)
         
-        total = sum(len(v) for v in backup.values())
-        print(f"✅ Restored {total} records from backup.json")
+        RESTORE_CHECKPOINT_FILE.unlink()
+        _print_throughput("Restored", total, started)
+        print(f"✅ Restored {total} records from {source}")
         
     except Exception as e:
         print(f"❌ Restore failed: {e}")
+        print("   Run the same restore command again to resume from the last checkpoint")
         sys.exit(1)
 
 
-def main():
-    if len(sys.argv) < 2:
-        print(__doc__)
+EXPORT_PAGE_SIZE = 1000
+
+
+def _iter_joined_cycles_from_db(device_id=None):
+    """Page plant_cycles with its children embedded, keyset-ordered by (captured_at, id)."""
+    supabase = get_supabase_client()
+    watermark = None
+    while True:
+        query = supabase.table("plant_cycles").select(
+            "id,captured_at,device_id,image_url,"
+            "sensor_readings(*),"
+            "ai_analyses(disease,plant,confidence,todos,recommendation),"
+            "actuator_actions(actions)"
+        )
+        if device_id:
+            # Served by idx_plant_cycles_device_captured_at
+            query = query.eq("device_id", device_id)
+        page = (
+            keyset_after(query, watermark, column="captured_at")
+            .order("captured_at")
+            .order("id")
+            .limit(EXPORT_PAGE_SIZE)
+            .execute()
+        ).data or []
+        for row in page:
+            yield split_embedded_cycle(row)
+        if len(page) < EXPORT_PAGE_SIZE:
+            return
+        watermark = {"captured_at": page[-1]["captured_at"], "id": page[-1]["id"]}
+
+
+def _print_warning(message):
+    print(f"⚠️  {message}")
+
+
+def _cycles_for_device(rows, device_id):
+    for row in rows:
+        if (row.get("device_id") or DEFAULT_DEVICE_ID) == device_id:
+            yield row
+
+
+def export_data(output_dir, source=None, fmt="parquet", rows_per_file=DEFAULT_ROWS_PER_FILE, device_id=None):
+    """Export joined cycle history to month-partitioned Parquet/Arrow files"""
+    try:
+        import pyarrow  # noqa: F401  # pylint: disable=import-error
+    except ImportError:
+        print("❌ Error: pyarrow not installed. Run: pip install pyarrow")
         sys.exit(1)
-    
-    command = sys.argv[1].lower()
+
+    join_stats = None
+    if source:
+        source = Path(source)
+        if not source.exists():
+            print(f"❌ Error: {source} not found")
+            sys.exit(1)
+        print(f"📦 Exporting cycle history from {source} to {output_dir} ({fmt})...")
+        join_stats = JoinStats()
+        streams = [iter_backup_rows(source, table) for table in MOCK_TABLES]
+        if device_id:
+            streams[0] = _cycles_for_device(streams[0], device_id)
+        joined = join_cycle_rows(*streams, stats=join_stats, on_warning=_print_warning)
+    else:
+        print(f"📦 Exporting cycle history from the database to {output_dir} ({fmt})...")
+        joined = _iter_joined_cycles_from_db(device_id)
+
+    started = time.perf_counter()
+    try:
+        report = export_history(joined, Path(output_dir), fmt=fmt, rows_per_file=rows_per_file)
+    except Exception as e:
+        print(f"❌ Export failed: {e}")
+        sys.exit(1)
+
+    _print_throughput("Exported", report.cycles + report.todos, started)
+    print(
+        f"✅ Exported {report.cycles} cycles and {report.todos} todos "
+        f"in {report.files} files ({report.bytes_written / 1024:.1f} KB) to {output_dir}"
+    )
+    if join_stats is not None:
+        # With a device filter the child streams still hold every device's rows
+        for line in format_join_stats(join_stats, orphans=not device_id):
+            print(line)
+
+
+def replay_data(source, sink="rows", pace="fast", speed=1.0, device_id=None, diffs_out=None, show=20,
+                fail_on_diff=False):
+    """Replay recorded cycles through normalization, actuator decisions and a storage sink"""
+    source = Path(source) if source else latest_backup()
+    if not source.exists():
+        print(f"❌ Error: {source} not found")
+        sys.exit(1)
+
+    print(f"🔁 Replaying cycles from {source} (sink={sink}, pace={pace})...")
+    streams = [iter_backup_rows(source, table) for table in MOCK_TABLES]
+    if device_id:
+        streams[0] = _cycles_for_device(streams[0], device_id)
+
+    join_stats = JoinStats()
+    diff_file = open(diffs_out, "w", encoding="utf-8") if diffs_out else None
+    try:
+        on_diff = (lambda diff: diff_file.write(json.dumps(diff.as_dict(), default=str) + "\n")) if diff_file else None
+        report = replay_cycles(
+            join_cycle_rows(*streams, stats=join_stats, on_warning=_print_warning), sink=sink, pace=pace, speed=speed, keep_diffs=show, on_diff=on_diff
+        )
+    finally:
+        if diff_file:
+            diff_file.close()
+
+    for line in format_report(report):
+        print(line)
+    # The report already counts cycles missing child rows
+    for line in format_join_stats(join_stats, unmatched=False, orphans=not device_id):
+        print(line)
+    if diffs_out:
+        print(f"✅ Wrote {sum(report.diff_counts.values())} diffs to {diffs_out}")
+    if fail_on_diff and report.cycles_with_diffs:
+        sys.exit(1)
+
+
+def _positive_float(value):
+    number = float(value)
+    if not number > 0:
+        raise argparse.ArgumentTypeError(f"must be greater than 0, got {value}")
+    return number
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Database mock data utility",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    backup = commands.add_parser(
+        "backup",
+        help="Stream current data to compressed NDJSON under backups/",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    backup.add_argument("--compression", choices=sorted(NDJSON_SUFFIXES), default="gzip", help="File compression")
+    backup.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only back up rows created after the stored watermark (backups/watermarks.json)",
+    )
+
+    populate = commands.add_parser(
+        "populate",
+        help="Delete all data and insert mock records",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    populate.add_argument("--count", type=int, default=DEFAULT_MOCK_COUNT, help="Number of cycles to generate")
+    populate.add_argument("--seed", type=int, default=None, help="Random seed for reproducible data")
+    populate.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Rows per multi-row insert")
+    populate.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Concurrent insert workers")
+    populate.add_argument(
+        "--span-days",
+        type=float,
+        default=DEFAULT_MOCK_SPAN_DAYS,
+        help=f"Days of history the cycles are spread over, ending now (at most {MAX_MOCK_SPAN_DAYS})",
+    )
+    populate.add_argument(
+        "--interval-seconds",
+        type=float,
+        default=None,
+        help="Fixed spacing between cycles instead of --span-days; count x interval is capped the same way",
+    )
+    populate.add_argument(
+        "--devices",
+        nargs="+",
+        metavar="ID",
+        default=[DEFAULT_DEVICE_ID],
+        help="Device ids to spread the generated cycles over (round-robin)",
+    )
+    populate.add_argument(
+        "--ndjson",
+        metavar="DIR",
+        default=None,
+        help="Write one NDJSON file per table to DIR instead of touching the database",
+    )
+
+    restore = commands.add_parser(
+        "restore",
+        help="Restore data from a backup",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    restore.add_argument(
+        "source",
+        nargs="?",
+        default=None,
+        help="Backup directory, NDJSON directory or backup.json (default: newest under backups/)",
+    )
+    restore.add_argument("--batch-size", type=int, default=RESTORE_BATCH_SIZE, help="Rows per upsert request")
+    restore.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Concurrent upserts per table")
+    restore.add_argument(
+        "--restart",
+        action="store_true",
+        help="Ignore an interrupted restore's checkpoint and start over",
+    )
+    commands.add_parser("backfill-rollups", help="Rebuild hourly/daily rollups from raw history")
+
+    export = commands.add_parser(
+        "export",
+        help="Export joined cycle history to month-partitioned Parquet/Arrow files",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    export.add_argument("output", help="Directory to write the cycles/ and todos/ datasets to")
+    export.add_argument(
+        "--source",
+        default=None,
+        help="Read from a backup directory, NDJSON directory or backup.json instead of the database",
+    )
+    export.add_argument("--device", default=None, metavar="ID", help="Only export cycles from this device id")
+    export.add_argument("--format", choices=EXPORT_FORMATS, default="parquet", help="Output file format")
+    export.add_argument(
+        "--rows-per-file",
+        type=int,
+        default=DEFAULT_ROWS_PER_FILE,
+        help="Rows buffered per month before a part file is written",
+    )
+    replay = commands.add_parser(
+        "replay",
+        help="Replay recorded cycles through normalization, actuator decisions and storage, offline",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    replay.add_argument(
+        "--source",
+        default=None,
+        help="Backup directory, NDJSON directory or backup.json (default: newest backup)",
+    )
+    replay.add_argument("--device", default=None, metavar="ID", help="Only replay cycles from this device id")
+    replay.add_argument(
+        "--sink",
+        choices=SINKS,
+        default="rows",
+        help="rows: build the database rows; mock: in-memory mock storage with rollups; none: skip storage",
+    )
+    replay.add_argument("--pace", choices=PACES, default="fast", help="fast: no waiting; recorded: follow captured_at")
+    replay.add_argument("--speed", type=_positive_float, default=1.0, help="Speed-up factor for --pace recorded")
+    replay.add_argument("--diffs-out", default=None, metavar="PATH", help="Write every decision diff as NDJSON")
+    replay.add_argument("--show", type=int, default=20, help="Decision diffs printed in the summary")
+    replay.add_argument("--fail-on-diff", action="store_true", help="Exit with status 1 if any decision differs")
+
+    args = parser.parse_args()
+    if args.command == "populate":
+        if args.count < 1:
+            parser.error("--count must be at least 1")
+        span_days = args.span_days if args.interval_seconds is None else args.count * args.interval_seconds / 86400
+        if not 0 < span_days <= MAX_MOCK_SPAN_DAYS:
+            parser.error(
+                f"generated history would span {span_days:,.1f} days; it must be more than 0 and at most "
+                f"{MAX_MOCK_SPAN_DAYS} (one monthly partition per table per month)"
+            )
+    return args
+
+
+def main():
+    args = parse_args()
+    command = args.command
     
     if command == "backup":
-        backup_data()
+        backup_data(compression=args.compression, incremental=args.incremental)
     elif command == "populate":
-        print("⚠️  This will DELETE all current data and insert 200 mock records")
+        if args.ndjson:
+            write_mock_ndjson(
+                args.ndjson,
+                args.count,
+                args.seed,
+                args.batch_size,
+                args.interval_seconds,
+                devices=args.devices,
+                span_days=args.span_days,
+            )
+            return
+
+        print(f"⚠️  This will DELETE all current data and insert {args.count} mock records")
         confirm = input("Continue? (yes/no): ").strip().lower()
         if confirm != "yes":
             print("Cancelled")
@@ -355,19 +1071,47 @@ def main():
         
         backup_data()  # Auto-backup before populating
         clear_data()
-        populate_mock_data()
+        populate_mock_data(
+            count=args.count,
+            seed=args.seed,
+            batch_size=args.batch_size,
+            workers=args.workers,
+            interval_seconds=args.interval_seconds,
+            devices=args.devices,
+            span_days=args.span_days,
+        )
         print("\n✅ Ready to preview! Run: python db_mock.py restore")
     elif command == "restore":
-        print("⚠️  This will DELETE all current data and restore from backup.json")
-        confirm = input("Continue? (yes/no): ").strip().lower()
-        if confirm != "yes":
-            print("Cancelled")
-            sys.exit(0)
-        restore_data()
-    else:
-        print(f"❌ Unknown command: {command}")
-        print(__doc__)
-        sys.exit(1)
+        source = Path(args.source) if args.source else latest_backup()
+        if args.restart or not load_restore_checkpoint(source):
+            print(f"⚠️  This will DELETE all current data and restore from {source}")
+            confirm = input("Continue? (yes/no): ").strip().lower()
+            if confirm != "yes":
+                print("Cancelled")
+                sys.exit(0)
+        restore_data(source, batch_size=args.batch_size, workers=args.workers, resume=not args.restart)
+        backfill_rollups()
+    elif command == "backfill-rollups":
+        backfill_rollups()
+    elif command == "export":
+        export_data(
+            args.output,
+            source=args.source,
+            fmt=args.format,
+            rows_per_file=args.rows_per_file,
+            device_id=args.device,
+        )
+    elif command == "replay":
+        replay_data(
+            args.source,
+            sink=args.sink,
+            pace=args.pace,
+            speed=args.speed,
+            device_id=args.device,
+            diffs_out=args.diffs_out,
+            show=args.show,
+            fail_on_diff=args.fail_on_diff,
+        )
 
 
 if __name__ == "__main__":
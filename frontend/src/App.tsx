@@ -1,4 +1,4 @@
-import { useState } from 'react';
+import { useEffect, useRef, useState } from 'react';
 import {
     ConfigProvider, theme, Layout, Row, Col,
     Card, Statistic, Spin, Alert, Switch, Typography, Space, Button, Badge, message, Tooltip,
@@ -10,7 +10,7 @@ import {
     ReloadOutlined, ClockCircleOutlined, TeamOutlined, BarChartOutlined,
     PlayCircleOutlined,
 } from '@ant-design/icons';
-import { useSupabaseData } from './hooks/useSupabaseData';
+import { subscribeToCommandStatus, useSupabaseData } from './hooks/useSupabaseData';
 import { useDeviceHeartbeat } from './hooks/useDeviceHeartbeat';
 import ChartCard from './components/ChartCard';
 import DataTable from './components/DataTable';
@@ -40,7 +40,25 @@ export default function App() {
         refetch,
         broadcastStartReading,
     } = useSupabaseData();
-    const { isLive, secondsSinceHeartbeat, isDeviceRunning } = useDeviceHeartbeat();
+    const { isLive, secondsSinceHeartbeat, isDeviceRunning, telemetry } = useDeviceHeartbeat();
+    const cycleLatency =
+        telemetry?.cycle_p50_ms != null && telemetry.cycle_p95_ms != null
+            ? ` · cycle p50 ${(telemetry.cycle_p50_ms / 1000).toFixed(1)}s / p95 ${(telemetry.cycle_p95_ms / 1000).toFixed(1)}s`
+            : '';
+    const pendingRequests = useRef(new Set<string>());
+
+    useEffect(() => {
+        return subscribeToCommandStatus((event, payload) => {
+            if (event !== 'command_completed' || !pendingRequests.current.delete(payload.request_id)) return;
+            const seconds = ((payload.total_ms ?? 0) / 1000).toFixed(1);
+            if (payload.ok) {
+                messageApi.success(`Reading cycle finished in ${seconds}s.`);
+                void refetch();
+            } else {
+                messageApi.error(`Reading cycle failed: ${payload.error ?? 'Unknown error'}`);
+            }
+        });
+    }, [messageApi, refetch]);
 
     const latestRow = data?.rows[data.rows.length - 1];
 
@@ -62,8 +80,9 @@ export default function App() {
     const handleStartReading = async () => {
         setActiveCommand('start');
         try {
-            await broadcastStartReading();
-            messageApi.success('Reading cycle started.');
+            const requestId = await broadcastStartReading();
+            pendingRequests.current.add(requestId);
+            messageApi.success('Reading cycle requested.');
         } catch (err) {
             const text = err instanceof Error ? err.message : 'Unknown error';
             messageApi.error(`Failed to send command: ${text}`);
@@ -162,7 +181,7 @@ export default function App() {
                     {/* Controls row */}
                     <Space size={10} style={{ paddingTop: 4, paddingBottom: 4 }}>
                         {page === 'dashboard' && (
-                            <Tooltip title={isDeviceRunning ? 'Backend running cycle' : isLive ? `Backend alive (${secondsSinceHeartbeat}s ago)` : 'Backend disconnected or not running listener mode'}>
+                            <Tooltip title={isDeviceRunning ? 'Backend running cycle' : isLive ? `Backend alive (${secondsSinceHeartbeat}s ago)${cycleLatency}` : 'Backend disconnected or not running listener mode'}>
                                 <Badge
                                     status={isDeviceRunning ? 'processing' : isLive ? 'processing' : 'error'}
                                     color={isDeviceRunning ? '#f59e0b' : isLive ? '#22c55e' : '#ef4444'}
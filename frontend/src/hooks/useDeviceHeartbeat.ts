@@ -9,11 +9,13 @@ export interface ConnectionState {
   lastHeartbeat: Date | null;
   secondsSinceHeartbeat: number;
   isDeviceRunning: boolean;
+  telemetry: HeartbeatPayload | null;
 }
 
 export function useDeviceHeartbeat(): ConnectionState {
   const [lastHeartbeat, setLastHeartbeat] = useState<Date | null>(null);
   const [isDeviceRunning, setIsDeviceRunning] = useState(false);
+  const [telemetry, setTelemetry] = useState<HeartbeatPayload | null>(null);
   const [secondsSinceHeartbeat, setSecondsSinceHeartbeat] = useState(0);
 
   useEffect(() => {
@@ -22,6 +24,7 @@ export function useDeviceHeartbeat(): ConnectionState {
         setLastHeartbeat(new Date(payload.timestamp));
         setSecondsSinceHeartbeat(0);
         setIsDeviceRunning(payload.is_running ?? false);
+        setTelemetry(payload);
       },
       () => {
         setIsDeviceRunning(false);
@@ -62,5 +65,6 @@ export function useDeviceHeartbeat(): ConnectionState {
     lastHeartbeat,
     secondsSinceHeartbeat,
     isDeviceRunning,
+    telemetry,
   };
 }
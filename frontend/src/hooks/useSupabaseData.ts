@@ -4,15 +4,75 @@ import { getSupabaseClient } from '../lib/supabase';
 import type { PlantRow, ProcessedData, TodoItem } from '../types';
 
 const REFRESH_MS = 60_000;
-const CONTROL_CHANNEL = import.meta.env.VITE_SUPABASE_CONTROL_CHANNEL ?? 'plant-control';
+const BASE_CONTROL_CHANNEL = import.meta.env.VITE_SUPABASE_CONTROL_CHANNEL ?? 'plant-control';
+// Matches backend/config.py device_channel(): the default device keeps the bare channel name.
+const DEVICE_ID: string | undefined = import.meta.env.VITE_DEVICE_ID || undefined;
+const CONTROL_CHANNEL =
+  DEVICE_ID && DEVICE_ID !== 'default' ? `${BASE_CONTROL_CHANNEL}:${DEVICE_ID}` : BASE_CONTROL_CHANNEL;
 const HEARTBEAT_RETRY_INITIAL_MS = 2_000;
 const HEARTBEAT_RETRY_MAX_MS = 30_000;
 const HEARTBEAT_RETRY_MULTIPLIER = 1.5;
 
+export interface CycleTiming {
+  finished_at: string;
+  trace_id?: string | null;
+  outcome: string;
+  duration_ms: number;
+  stages_ms: Record<string, number>;
+}
+
+export interface SensorHealth {
+  checked_at: string;
+  dht_ok: number;
+  dht_total: number;
+  soil_pins: number;
+  light: string;
+}
+
+// Only `full` heartbeats carry every field; the rest carry what changed and
+// are merged onto the previous state before listeners see them.
 export interface HeartbeatPayload {
   timestamp: string;
   status: string;
   is_running: boolean;
+  full?: boolean;
+  cycles?: number;
+  cycle_failures?: number;
+  cycle_p50_ms?: number | null;
+  cycle_p95_ms?: number | null;
+  last_cycle?: CycleTiming | null;
+  queue_depth?: number;
+  // Trace id of the running cycle, null while idle
+  trace_id?: string | null;
+  sensor_health?: SensorHealth | null;
+  cpu_pct?: number;
+  rss_mb?: number | null;
+  started_at?: string;
+  uptime_s?: number;
+}
+
+export type CommandEvent = 'command_accepted' | 'command_started' | 'command_completed';
+const COMMAND_EVENTS: CommandEvent[] = ['command_accepted', 'command_started', 'command_completed'];
+
+export interface CommandStatusPayload {
+  request_id: string;
+  command: string;
+  source: string;
+  // Shared by every request coalesced into one run; matches plant_cycles.trace_id
+  trace_id?: string;
+  timestamp: string;
+  coalesced?: boolean;
+  queue_depth?: number;
+  running?: boolean;
+  batch_size?: number;
+  ok?: boolean;
+  error?: string | null;
+  queued_ms?: number;
+  run_ms?: number;
+  total_ms?: number;
+  // Set on acks for direct commands (pump_for, fan_on, fan_off, read_sensors_only, profile_next_cycle)
+  direct?: boolean;
+  result?: unknown;
 }
 
 interface SensorReading {
@@ -34,6 +94,7 @@ interface AIAnalysis {
   todos: TodoItem[] | null;
   prompt_markdown: string | null;
   response_markdown: string | null;
+  response_zlib?: string | null;
 }
 
 interface ActuatorAction {
@@ -148,6 +209,32 @@ function parseTodosFromResponse(response: string | null): TodoItem[] {
   }
 }
 
+async function inflateZlibHex(value: string): Promise<string> {
+  const hex = value.startsWith('\\x') ? value.slice(2) : value;
+  const bytes = new Uint8Array(hex.length / 2);
+  for (let i = 0; i < bytes.length; i += 1) {
+    bytes[i] = parseInt(hex.slice(i * 2, i * 2 + 2), 16);
+  }
+  const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('deflate'));
+  return new Response(stream).text();
+}
+
+// Responses are stored zlib-compressed in `response_zlib` (bytea, `\x<hex>` over PostgREST);
+// older rows still carry plain `response_markdown`.
+async function inflateResponses(cycles: PlantCycleRow[]): Promise<void> {
+  await Promise.all(
+    cycles.map(async (cycle) => {
+      const ai = pickOne(cycle.ai_analyses);
+      if (!ai || ai.response_markdown || !ai.response_zlib) return;
+      try {
+        ai.response_markdown = await inflateZlibHex(ai.response_zlib);
+      } catch {
+        ai.response_markdown = null;
+      }
+    }),
+  );
+}
+
 function parseRows(cycles: PlantCycleRow[]): ProcessedData {
   const labels: string[] = [];
   const temps: (number | null)[] = [];
@@ -263,7 +350,9 @@ let _retryTimeout: ReturnType<typeof setTimeout> | null = null;
 let _isReconnectScheduled = false;
 let _retryCount = 0;
 let _isStarted = false;
+let _heartbeatState: HeartbeatPayload | null = null;
 const _listeners = new Set<HeartbeatListener>();
+const _commandListeners = new Set<(event: CommandEvent, payload: CommandStatusPayload) => void>();
 
 function _calculateBackoffMs(): number {
   const delay = HEARTBEAT_RETRY_INITIAL_MS * Math.pow(HEARTBEAT_RETRY_MULTIPLIER, _retryCount);
@@ -274,6 +363,7 @@ async function _removeChannel(target?: RealtimeChannel | null): Promise<void> {
   const ch = target ?? _channel;
   if (!ch) return;
   if (_channel === ch) _channel = null;
+  _heartbeatState = null;
   try {
     await getSupabaseClient().removeChannel(ch);
   } catch {
@@ -316,7 +406,18 @@ function _startListening(): void {
     const data = payload?.payload as HeartbeatPayload | undefined;
     if (!data) return;
     _retryCount = 0;
-    _listeners.forEach((l) => l.onHeartbeat(data));
+    _heartbeatState = data.full || !_heartbeatState ? data : { ..._heartbeatState, ...data };
+    const merged = _heartbeatState;
+    _listeners.forEach((l) => l.onHeartbeat(merged));
+  });
+
+  COMMAND_EVENTS.forEach((event) => {
+    currentChannel.on('broadcast', { event }, (payload: any) => {
+      if (_channel !== currentChannel) return;
+      const data = payload?.payload as CommandStatusPayload | undefined;
+      if (!data) return;
+      _commandListeners.forEach((l) => l(event, data));
+    });
   });
 
   currentChannel.subscribe((status, err) => {
@@ -386,6 +487,17 @@ export function subscribeToHeartbeat(
   };
 }
 
+// Command acknowledgements arrive on the heartbeat channel; callers need an
+// active heartbeat subscription for these to be delivered.
+export function subscribeToCommandStatus(
+  onStatus: (event: CommandEvent, payload: CommandStatusPayload) => void,
+): () => void {
+  _commandListeners.add(onStatus);
+  return () => {
+    _commandListeners.delete(onStatus);
+  };
+}
+
 export function useSupabaseData() {
   const [data, setData] = useState<ProcessedData | null>(null);
   const [loading, setLoading] = useState(true);
@@ -394,26 +506,32 @@ export function useSupabaseData() {
   const fetchData = useCallback(async () => {
     try {
       const supabase = getSupabaseClient();
-      const { data: rawCycles, error: queryError } = await supabase
+      let query = supabase
         .from('plant_cycles')
         .select(
           `
             id,
             captured_at,
             image_url,
-            sensor_readings(temp_c, humidity_pct, light_state, soil_summary, soil_majority, temp_readings, hum_readings, soil_readings, soil_wetness_pct),
-            ai_analyses(disease, plant, confidence, todos, prompt_markdown, response_markdown),
+            sensor_readings:sensor_readings_compat(temp_c, humidity_pct, light_state, soil_summary, soil_majority, temp_readings, hum_readings, soil_readings, soil_wetness_pct),
+            ai_analyses(disease, plant, confidence, todos, prompt_markdown:rendered_prompt, response_markdown, response_zlib),
             actuator_actions(actions)
           `,
         )
         .order('captured_at', { ascending: false })
         .limit(20);
+      if (DEVICE_ID) {
+        // Served by idx_plant_cycles_device_captured_at
+        query = query.eq('device_id', DEVICE_ID);
+      }
+      const { data: rawCycles, error: queryError } = await query;
 
       if (queryError) {
         throw queryError;
       }
 
       const ordered = ((rawCycles ?? []) as PlantCycleRow[]).slice().reverse();
+      await inflateResponses(ordered);
       setData(parseRows(ordered));
       setError(null);
     } catch (err) {
@@ -425,21 +543,25 @@ export function useSupabaseData() {
   }, []);
 
   // Reuse the singleton channel managed by subscribeToHeartbeat — no new subscription needed.
-  const broadcastStartReading = useCallback(async () => {
+  // Resolves with the request id the device echoes in its command_* events.
+  const broadcastStartReading = useCallback(async (): Promise<string> => {
     if (!_channel) {
       throw new Error('Not connected — heartbeat channel is not subscribed yet');
     }
+    const requestId = crypto.randomUUID();
     const sendStatus = await _channel.send({
       type: 'broadcast',
       event: 'start_reading',
       payload: {
         source: 'dashboard-ui',
+        request_id: requestId,
         requested_at: new Date().toISOString(),
       },
     });
     if (sendStatus !== 'ok') {
       throw new Error(`Failed to send command: broadcast returned ${sendStatus}`);
     }
+    return requestId;
   }, []);
 
   useEffect(() => {